@@ -0,0 +1,185 @@
+import math
+import threading
+from collections import OrderedDict
+
+# Métricas acompanhadas: nome -> caminho no relatório
+TRACKED = {
+    'response_time': ('basic_metrics', 'response_time'),
+    'ttfb': ('basic_metrics', 'timing', 'ttfb')
+}
+
+def extract(metrics):
+    """Valores numéricos das métricas acompanhadas presentes no relatório"""
+    values = {}
+    for name, path in TRACKED.items():
+        value = metrics
+        for key in path:
+            value = value.get(key) if isinstance(value, dict) else None
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            values[name] = value
+    return values
+
+# Fração do peso normal com que amostras de uma regressão entram na linha de base
+REGRESSION_WEIGHT = 0.1
+
+class Baseline:
+    """Estatísticas móveis de uma métrica de uma URL, em O(1) por amostra
+
+    Média e variância exponenciais e p50/p95 por aproximação estocástica:
+    cada amostra empurra o quantil um passo proporcional à dispersão, para
+    cima ou para baixo. Nas primeiras amostras o peso é 1/n, então a média
+    começa exata. `streak` conta as amostras elevadas recentes.
+    """
+
+    __slots__ = ('count', 'mean', 'var', 'p50', 'p95', 'streak')
+
+    def __init__(self):
+        self.count = self.streak = 0
+        self.mean = self.var = self.p50 = self.p95 = 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.var)
+
+    def update(self, value, alpha):
+        self.count += 1
+        if self.count == 1:
+            self.mean = self.p50 = self.p95 = float(value)
+            return
+
+        weight = max(alpha, 1 / self.count) if self.count < 1 / alpha else alpha
+        diff = value - self.mean
+        self.mean += weight * diff
+        self.var = (1 - weight) * (self.var + weight * diff * diff)
+
+        step = 2 * weight * max(self.std, abs(self.mean) * 0.01, 1e-9)
+        self.p50 += step * (0.5 - (value < self.p50))
+        self.p95 += step * (0.95 - (value < self.p95))
+        self.p95 = max(self.p95, self.p50)
+
+    def to_dict(self):
+        return {
+            'samples': self.count,
+            'mean': round(self.mean, 2),
+            'std': round(self.std, 2),
+            'p50': round(self.p50, 2),
+            'p95': round(self.p95, 2)
+        }
+
+class AnomalyDetector:
+    """Detecta picos e regressões de cada URL contra o seu próprio histórico
+
+    Cada amostra é comparada com a linha de base *antes* de entrar nela.
+    Uma amostra é elevada quando passa do p95 e de `min_ratio` vezes o p50:
+    - 'regression': `persistence` amostras elevadas seguidas (severidade
+      'bad'), até que as amostras normais voltem a predominar;
+    - 'spike': uma amostra isolada `threshold` desvios acima da média
+      (severidade 'warning').
+    Amostras anômalas entram na linha de base limitadas a `threshold`
+    desvios acima da média, e durante uma regressão com peso reduzido: um
+    pico não a infla, e uma regressão que continua só vira o novo normal
+    depois de muitas amostras.
+
+    O estado fica só em memória, no máximo `max_urls` URLs (as menos
+    recentes saem primeiro); nada é relido do banco.
+    """
+
+    def __init__(self, alpha=0.05, min_samples=20, threshold=4.0, min_ratio=1.5,
+                 persistence=3, max_urls=50000):
+        self.alpha = alpha
+        self.min_samples = min_samples
+        self.threshold = threshold
+        self.min_ratio = min_ratio
+        self.persistence = persistence
+        self.max_urls = max_urls
+        self._states = OrderedDict()  # (modo, url) -> {métrica: Baseline}
+        self._lock = threading.Lock()
+        self._counters = {'samples': 0, 'spikes': 0, 'regressions': 0}
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            alpha=config.ANOMALY_ALPHA,
+            min_samples=config.ANOMALY_MIN_SAMPLES,
+            threshold=config.ANOMALY_THRESHOLD,
+            min_ratio=config.ANOMALY_MIN_RATIO,
+            persistence=config.ANOMALY_PERSISTENCE,
+            max_urls=config.ANOMALY_MAX_URLS
+        )
+
+    def observe(self, url, values, mode='audit'):
+        """Avalia e incorpora as amostras de uma análise; devolve as anomalias"""
+        findings = []
+        if not values:
+            return findings
+        with self._lock:
+            key = (mode, url)
+            state = self._states.get(key)
+            if state is None:
+                state = self._states[key] = {}
+                while len(self._states) > self.max_urls:
+                    self._states.popitem(last=False)
+            else:
+                self._states.move_to_end(key)
+
+            for metric, value in values.items():
+                baseline = state.get(metric)
+                if baseline is None:
+                    baseline = state[metric] = Baseline()
+                finding = self._check(metric, value, baseline)
+                alpha = self.alpha
+                if finding:
+                    # Picos entram limitados; durante uma regressão, também com peso menor
+                    value = min(value, baseline.mean + self.threshold * self._std(baseline))
+                    if finding['kind'] == 'regression':
+                        alpha *= REGRESSION_WEIGHT
+                baseline.update(value, alpha)
+                if finding:
+                    self._counters[finding['kind'] + 's'] += 1
+                    findings.append(finding)
+            self._counters['samples'] += 1
+        return findings
+
+    def baseline(self, url, mode='audit'):
+        with self._lock:
+            state = self._states.get((mode, url)) or {}
+            return {metric: baseline.to_dict() for metric, baseline in state.items()}
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters, urls=len(self._states))
+
+    def clear(self):
+        with self._lock:
+            self._states.clear()
+
+    @staticmethod
+    def _std(baseline):
+        # Piso de 5% da média: séries muito estáveis não viram alarme por 1 ms
+        return max(baseline.std, abs(baseline.mean) * 0.05, 1e-9)
+
+    def _check(self, metric, value, baseline):
+        if baseline.count < self.min_samples:
+            return None
+        score = (value - baseline.mean) / self._std(baseline)
+        elevated = value > baseline.p95 and value >= self.min_ratio * baseline.p50
+        # Histerese: uma regressão só termina depois de algumas amostras normais
+        if elevated:
+            baseline.streak = min(baseline.streak + 1, 2 * self.persistence)
+        else:
+            baseline.streak = baseline.streak - 1 if baseline.streak > self.persistence else 0
+
+        if baseline.streak >= self.persistence:
+            kind = 'regression'
+        elif elevated and score >= self.threshold:
+            kind = 'spike'
+        else:
+            return None
+        return {
+            'metric': metric,
+            'kind': kind,
+            'severity': 'bad' if kind == 'regression' else 'warning',
+            'value': value,
+            'score': round(score, 2),
+            'baseline': baseline.to_dict()
+        }
@@ -0,0 +1,88 @@
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
+from app.telemetry.trace import submit
+
+def host_of(url):
+    return urlparse(url).netloc.lower()
+
+def run_batch(func, urls, concurrency=8, per_host=2, rate=None, host=host_of):
+    """Executa func(url) para várias URLs com concorrência limitada
+
+    No máximo `concurrency` execuções ao mesmo tempo e `per_host` por host;
+    com `rate`, cada host recebe no máximo `rate` execuções novas por
+    segundo. Os resultados são devolvidos como (url, resultado) na ordem em
+    que terminam, não na ordem de entrada; se func levantar uma exceção,
+    ela própria é devolvida como resultado. `host(item)` permite passar
+    itens que não são URLs. Limites menores que 1 (ou `rate` <= 0)
+    levantam ValueError já na chamada, antes de qualquer execução.
+    """
+    check_limits(concurrency, per_host, rate)
+    return _run_batch(func, urls, concurrency, per_host, rate, host)
+
+def check_limits(concurrency, per_host, rate=None):
+    """Com zero nada seria despachado e o laço do run_batch nunca terminaria"""
+    if concurrency < 1 or per_host < 1:
+        raise ValueError('concurrency and per_host must be at least 1')
+    if rate is not None and rate <= 0:
+        raise ValueError('rate must be greater than zero')
+
+def _run_batch(func, urls, concurrency, per_host, rate, host):
+    # Uma fila por host, para não percorrer URLs de hosts já saturados
+    queues = OrderedDict()
+    for url in urls:
+        queues.setdefault(host(url), deque()).append(url)
+    in_flight = {}  # future -> url
+    per_host_count = {}
+    next_start = {}  # host -> instante em que o limite de taxa libera o próximo
+
+    def dispatch(executor):
+        progress = True
+        while progress and queues and len(in_flight) < concurrency:
+            progress = False
+            now = time.monotonic()
+            for name in list(queues):
+                if len(in_flight) >= concurrency:
+                    return
+                if per_host_count.get(name, 0) >= per_host:
+                    continue
+                if rate and next_start.get(name, 0) > now:
+                    continue
+                url = queues[name].popleft()
+                if not queues[name]:
+                    del queues[name]
+                per_host_count[name] = per_host_count.get(name, 0) + 1
+                if rate:
+                    next_start[name] = max(now, next_start.get(name, 0)) + 1 / rate
+                in_flight[submit(executor, func, url)] = url
+                progress = True
+
+    def delay():
+        # Espera até o primeiro host que só está parado pelo limite de taxa
+        if not rate:
+            return None
+        now = time.monotonic()
+        waiting = [
+            next_start[name] - now for name in queues
+            if next_start.get(name, 0) > now and per_host_count.get(name, 0) < per_host
+        ]
+        return min(waiting) if waiting else None
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='analyzer-batch') as executor:
+        dispatch(executor)
+        while in_flight or queues:
+            if not in_flight:
+                time.sleep(delay() or 0)
+                dispatch(executor)
+                continue
+            done, _ = wait(in_flight, timeout=delay(), return_when=FIRST_COMPLETED)
+            for future in done:
+                url = in_flight.pop(future)
+                per_host_count[host(url)] -= 1
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = e
+                yield url, result
+            dispatch(executor)
@@ -0,0 +1,107 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from urllib.parse import urlsplit, urlunsplit
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+def normalize_url(url):
+    """Chave canônica: esquema/host em minúsculas, sem porta padrão nem fragmento"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f'{host}:{parts.port}'
+    return urlunsplit((scheme, host, parts.path or '/', parts.query, ''))
+
+def is_fresh(metrics):
+    """Indica se o resultado veio de uma nova análise (e deve ser gravado)"""
+    info = metrics.get('cache') or {}
+    return not info.get('hit') and not info.get('coalesced')
+
+class ResultCache:
+    """Cache LRU com TTL para resultados de análise
+
+    Análises concorrentes da mesma URL são coalescidas: apenas a primeira
+    executa, e as demais esperam pelo mesmo resultado.
+    """
+
+    def __init__(self, ttl=300, max_entries=1000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self._entries = OrderedDict()  # chave -> (instante, valor)
+        self._inflight = {}  # chave -> Future
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'coalesced': 0, 'evictions': 0}
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(ttl=config.CACHE_TIMEOUT, max_entries=config.CACHE_MAX_ENTRIES)
+
+    def get_or_compute(self, url, compute, cacheable=lambda value: True, variant=None):
+        """Devolve (valor, info) onde info diz se houve hit e a idade do resultado
+
+        `variant` separa resultados diferentes da mesma URL (por exemplo, um
+        subconjunto de etapas).
+        """
+        key = (normalize_url(url), variant)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                age = time.monotonic() - stored_at
+                if age <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self._counters['hits'] += 1
+                    return value, {'hit': True, 'age': round(age, 3)}
+                del self._entries[key]
+
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+                self._counters['misses'] += 1
+            else:
+                self._counters['coalesced'] += 1
+
+        if not leader:
+            return future.result(), {'hit': False, 'age': 0, 'coalesced': True}
+
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._inflight[key]
+            if cacheable(value):
+                self._entries[key] = (time.monotonic(), value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._counters['evictions'] += 1
+        future.set_result(value)
+        return value, {'hit': False, 'age': 0}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._counters['hits'] + self._counters['misses'] + self._counters['coalesced']
+            return {
+                'enabled': True,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hit_ratio': round(self._counters['hits'] / lookups, 3) if lookups else 0.0,
+                **self._counters
+            }
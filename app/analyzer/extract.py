@@ -0,0 +1,183 @@
+import codecs
+from html.parser import HTMLParser
+
+try:
+    from lxml import etree
+except ImportError:  # backend opcional
+    etree = None
+
+# Valor de `as` em <link rel="preload"> para o tipo de recurso
+PRELOAD_TYPES = {
+    'script': 'script',
+    'style': 'style',
+    'image': 'image',
+    'font': 'font',
+    'audio': 'media',
+    'video': 'media'
+}
+
+class PageCollector:
+    """Coleta, em uma única passagem, os dados de SEO e recursos da página"""
+
+    def __init__(self):
+        self.title = None
+        self.meta_description = None
+        self.h1_count = 0
+        self.images = 0
+        self.images_without_alt = 0
+        self.scripts = 0
+        self.stylesheets = 0
+        self.base_url = None
+        # (tipo, URL) dos sub-recursos, na ordem do documento
+        self.resources = []
+        self._media_depth = 0
+        self._in_title = False
+        self._title_parts = []
+
+    def start(self, tag, attrs):
+        if tag == 'title' and self.title is None:
+            self._in_title = True
+        elif tag == 'meta':
+            if (attrs.get('name') or '').lower() == 'description' and self.meta_description is None:
+                self.meta_description = attrs.get('content')
+        elif tag == 'h1':
+            self.h1_count += 1
+        elif tag == 'img':
+            self.images += 1
+            if not attrs.get('alt'):
+                self.images_without_alt += 1
+            self._resource('image', attrs.get('src'))
+        elif tag == 'script':
+            self.scripts += 1
+            self._resource('script', attrs.get('src'))
+        elif tag == 'link':
+            # rel pode ter vários valores e vir em qualquer posição
+            rel = (attrs.get('rel') or '').lower().split()
+            if 'stylesheet' in rel:
+                self.stylesheets += 1
+                self._resource('style', attrs.get('href'))
+            elif 'preload' in rel:
+                kind = PRELOAD_TYPES.get((attrs.get('as') or '').lower())
+                if kind:
+                    self._resource(kind, attrs.get('href'))
+            elif 'icon' in rel:
+                self._resource('image', attrs.get('href'))
+        elif tag in ('video', 'audio'):
+            self._media_depth += 1
+            self._resource('media', attrs.get('src'))
+            self._resource('image', attrs.get('poster'))
+        elif tag == 'source' and self._media_depth:
+            self._resource('media', attrs.get('src'))
+        elif tag == 'base' and self.base_url is None:
+            self.base_url = attrs.get('href')
+
+    def _resource(self, kind, url):
+        if url and url.strip():
+            self.resources.append((kind, url.strip()))
+
+    def end(self, tag):
+        if tag in ('video', 'audio') and self._media_depth:
+            self._media_depth -= 1
+        elif tag == 'title' and self._in_title:
+            self._in_title = False
+            self.title = ''.join(self._title_parts).strip()
+
+    def data(self, text):
+        if self._in_title:
+            self._title_parts.append(text)
+
+class _StdlibParser(HTMLParser):
+    """Backend padrão: html.parser da biblioteca padrão, em modo de eventos"""
+
+    def __init__(self, collector):
+        super().__init__(convert_charrefs=True)
+        self.collector = collector
+
+    def handle_starttag(self, tag, attrs):
+        self.collector.start(tag, dict(attrs))
+
+    def handle_startendtag(self, tag, attrs):
+        self.collector.start(tag, dict(attrs))
+        self.collector.end(tag)
+
+    def handle_endtag(self, tag):
+        self.collector.end(tag)
+
+    def handle_data(self, data):
+        self.collector.data(data)
+
+class _LxmlTarget:
+    def __init__(self, collector):
+        self.collector = collector
+
+    def start(self, tag, attrib):
+        self.collector.start(tag, dict(attrib))
+
+    def end(self, tag):
+        self.collector.end(tag)
+
+    def data(self, data):
+        self.collector.data(data)
+
+    def close(self):
+        return self.collector
+
+def _make_parser(backend, collector):
+    if backend == 'auto':
+        backend = 'lxml' if etree is not None else 'html.parser'
+    if backend == 'lxml':
+        if etree is None:
+            raise ValueError('lxml backend requested but lxml is not installed')
+        return etree.HTMLParser(target=_LxmlTarget(collector))
+    if backend == 'html.parser':
+        return _StdlibParser(collector)
+    raise ValueError(f'Unknown HTML parser backend: {backend}')
+
+def extract_page(chunks, encoding=None, max_bytes=5 * 1024 * 1024, backend='auto'):
+    """Extrai título, meta description, h1, imagens, scripts, estilos e as
+    URLs dos sub-recursos
+
+    Os blocos de bytes são decodificados e entregues ao parser um a um, sem
+    montar o documento inteiro em memória nem construir uma árvore. Só os
+    primeiros `max_bytes` são analisados.
+    """
+    collector = PageCollector()
+    parser = _make_parser(backend, collector)
+    try:
+        decoder = codecs.getincrementaldecoder(encoding or 'utf-8')(errors='replace')
+    except LookupError:
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+    parsed = 0
+    truncated = False
+    for chunk in chunks:
+        if parsed + len(chunk) > max_bytes:
+            chunk = chunk[:max_bytes - parsed]
+            truncated = True
+        parsed += len(chunk)
+        text = decoder.decode(chunk)
+        if text:
+            parser.feed(text)
+        if truncated:
+            break
+
+    tail = decoder.decode(b'', final=True)
+    if tail:
+        parser.feed(tail)
+    if parsed:
+        # O lxml recusa fechar um documento vazio
+        parser.close()
+
+    return {
+        'title': collector.title,
+        'meta_description': collector.meta_description,
+        'h1_count': collector.h1_count,
+        'images': collector.images,
+        'images_without_alt': collector.images_without_alt,
+        'scripts': collector.scripts,
+        'stylesheets': collector.stylesheets,
+        'base_url': collector.base_url,
+        'resources': collector.resources,
+        'parsed_bytes': parsed,
+        'truncated': truncated
+    }
@@ -0,0 +1,170 @@
+import requests
+from urllib.parse import urlparse
+import threading
+from time import perf_counter
+from app.analyzer.extract import extract_page
+from app.analyzer.timing import trace_requests
+from app.analyzer.tls import TLSInspector
+
+class FetchContext:
+    """Busca a página uma única vez e compartilha o resultado entre as análises"""
+
+    def __init__(self, url, session=None, timeout=30, max_bytes=5 * 1024 * 1024,
+                 chunk_size=64 * 1024, parser='auto', resolver=None, tls=None):
+        self.url = url
+        # Qualquer objeto com get(url, timeout=...): o pool do analisador
+        # ou o próprio módulo requests
+        self.http = session or requests
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.parser = parser
+        # Cache de DNS do analisador; sem ele o handshake TLS resolve de novo
+        self.resolver = resolver
+        # Inspetor TLS do analisador (sessões e certificados em cache)
+        self.tls = tls
+        self.parsed_url = urlparse(url)
+
+        self._response = None
+        self._response_time = None
+        self._fetch_error = None
+        self.timing = None
+        self._chunks = []
+        self.content_size = None
+        self.truncated = False
+        self._page = None
+        self._ssl_info = None
+        self._probes = {}
+        # Um lock por recurso, para que etapas concorrentes esperem pela
+        # mesma busca em vez de repeti-la
+        self._locks = {}
+
+    @classmethod
+    def of(cls, target, **kwargs):
+        """Aceita uma URL ou um contexto já existente"""
+        if isinstance(target, cls):
+            return target
+        return cls(target, **kwargs)
+
+    def _lock(self, name):
+        return self._locks.setdefault(name, threading.Lock())
+
+    @property
+    def base_url(self):
+        return f"{self.parsed_url.scheme}://{self.parsed_url.netloc}"
+
+    @property
+    def hostname(self):
+        return self.parsed_url.hostname or self.parsed_url.netloc
+
+    @property
+    def tls_port(self):
+        if self.parsed_url.scheme == 'https' and self.parsed_url.port:
+            return self.parsed_url.port
+        return 443
+
+    @property
+    def response(self):
+        """Resposta da página; o download acontece só no primeiro acesso"""
+        with self._lock('response'):
+            if self._response is None and self._fetch_error is None:
+                self._fetch()
+
+        if self._fetch_error is not None:
+            raise self._fetch_error
+        return self._response
+
+    def _fetch(self):
+        """Busca a página medindo as fases na mesma conexão"""
+        with trace_requests() as trace:
+            start = perf_counter()
+            try:
+                # stream=True separa a chegada dos cabeçalhos do download do corpo
+                response = self.http.get(self.url, timeout=self.timeout, stream=True)
+                headers_at = perf_counter()
+                self._read_body(response)
+                self._response = response
+            except Exception as e:
+                self._fetch_error = e
+                headers_at = perf_counter()
+            end = perf_counter()
+
+        self._response_time = int((end - start) * 1000)
+        self.timing = trace.summary(
+            ttfb=headers_at - start,
+            download=end - headers_at,
+            total=end - start
+        )
+
+    def _read_body(self, response):
+        """Lê o corpo em blocos, guardando no máximo max_bytes"""
+        size = 0
+        try:
+            for chunk in response.iter_content(chunk_size=self.chunk_size):
+                size += len(chunk)
+                if size > self.max_bytes:
+                    # Páginas maiores que o limite não são baixadas até o fim
+                    self._chunks.append(chunk[:len(chunk) - (size - self.max_bytes)])
+                    self.truncated = True
+                    break
+                self._chunks.append(chunk)
+        finally:
+            response.close()
+        # Numa página truncada, é o tamanho lido (um limite inferior)
+        self.content_size = min(size, self.max_bytes)
+
+    @property
+    def response_time(self):
+        self.response
+        return self._response_time
+
+    @property
+    def headers(self):
+        return self.response.headers
+
+    @property
+    def cookies(self):
+        return self.response.cookies
+
+    @property
+    def html(self):
+        self.response
+        return b''.join(self._chunks).decode(self.response.encoding or 'utf-8', errors='replace')
+
+    @property
+    def page(self):
+        """Dados de SEO e recursos extraídos em uma única passagem pelo corpo"""
+        self.response
+        with self._lock('page'):
+            if self._page is None:
+                self._page = extract_page(
+                    self._chunks,
+                    encoding=self.response.encoding,
+                    max_bytes=self.max_bytes,
+                    backend=self.parser
+                )
+                self._page['truncated'] = self.truncated
+        return self._page
+
+    def ssl_info(self):
+        """Faz um único handshake TLS e reaproveita o resultado"""
+        with self._lock('ssl'):
+            if self._ssl_info is None:
+                try:
+                    if self.tls is None:
+                        self.tls = TLSInspector(resolver=self.resolver, timeout=self.timeout)
+                    self._ssl_info = self.tls.inspect(self.hostname, self.tls_port)
+                except:
+                    self._ssl_info = {'error': 'SSL analysis failed'}
+        return self._ssl_info
+
+    def probe(self, path):
+        """Verifica se um caminho auxiliar (robots.txt, sitemap.xml) existe"""
+        with self._lock(f'probe:{path}'):
+            if path not in self._probes:
+                try:
+                    response = self.http.get(f"{self.base_url}{path}", timeout=self.timeout)
+                    self._probes[path] = response.status_code == 200
+                except:
+                    self._probes[path] = False
+        return self._probes[path]
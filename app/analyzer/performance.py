@@ -1,15 +1,56 @@
-import requests
-import time
+import threading
 from datetime import datetime
-from urllib.parse import urlparse
-import ssl
-import socket
-import http.client
-from bs4 import BeautifulSoup
+from urllib.parse import urljoin
+from app.analyzer.anomaly import AnomalyDetector, extract
+from app.analyzer.batch import run_batch
+from app.analyzer.cache import ResultCache, is_fresh
+from app.analyzer.registry import registry, parse_stages
+from app.analyzer.resolver import Resolver
+from app.analyzer.scheduler import Stage, StageScheduler
+from app.analyzer.security import analyze_security
+from app.telemetry.metrics import (
+    ANALYSES, ANALYSIS_SECONDS, ANALYSES_IN_FLIGHT, ANALYSIS_REQUESTS, ANOMALIES, STAGE_SECONDS
+)
+from app.telemetry.trace import span, measured
+from config import Config
+
+# Nome das métricas da linha de base nas recomendações
+ANOMALY_LABELS = {'response_time': 'Tempo de resposta', 'ttfb': 'TTFB'}
+
+def _fetch_timeout(config):
+    """Prazo das etapas que buscam pela rede: todas as tentativas do pool HTTP
+
+    Cada tentativa pode levar o timeout de conexão mais o de leitura, e entre
+    elas vem o backoff do Retry (fator × 2^n); a folga cobre o resto.
+    """
+    attempts = config.HTTP_MAX_RETRIES + 1
+    backoff = sum(config.HTTP_BACKOFF_FACTOR * 2 ** retry for retry in range(config.HTTP_MAX_RETRIES))
+    return attempts * (config.HTTP_CONNECT_TIMEOUT + config.HTTP_TIMEOUT) + backoff + 5
+
+def _tls_timeout(config):
+    # Um único handshake, sem novas tentativas
+    return config.HTTP_TIMEOUT + 5
+
+def _worst(statuses):
+    """'bad' > 'warning' > 'good'"""
+    statuses = set(statuses)
+    return 'bad' if 'bad' in statuses else 'warning' if 'warning' in statuses else 'good'
 
 class PerformanceAnalyzer:
-    def __init__(self):
+    # 'audit' é a análise completa; 'probe' só verifica a disponibilidade
+    MODES = ('audit', 'probe')
+    
+    def __init__(self, config=Config, registry=registry, resolver=None):
         self.metrics = {}
+        self.config = config
+        # Etapas disponíveis; novas análises são registradas como plugins
+        self.registry = registry
+        self.scheduler = StageScheduler.from_config(config)
+        # Cache de DNS compartilhado pelas etapas e pelo pool de conexões
+        self.resolver = resolver or Resolver.from_config(config)
+        self.cache = ResultCache.from_config(config) if config.CACHE_ENABLED else None
+        # Linha de base de cada URL, para comparar cada análise com o próprio histórico
+        self.anomalies = AnomalyDetector.from_config(config) if config.ANOMALY_ENABLED else None
         
         # Definir thresholds
         self.thresholds = {
@@ -24,193 +65,534 @@ class PerformanceAnalyzer:
             'resources': {
                 'good': 50,
                 'warning': 100
+            },
+            'certificate_days': {
+                'warning': 30,   # dias até expirar
+                'critical': 7
             }
         }
+        
+        # Pool HTTP, TLS e inventário de recursos são criados no primeiro uso:
+        # requests, urllib3 e os certificados do SSLContext só carregam quando
+        # uma etapa precisa deles
+        self._http = self._tls = self._resources = None
+        self._lazy_lock = threading.Lock()
+    
+    @property
+    def http(self):
+        """Pool de conexões mantido entre as chamadas de analyze_url"""
+        if self._http is None:
+            with self._lazy_lock:
+                if self._http is None:
+                    from app.analyzer.session import SessionPool
+                    self._http = SessionPool.from_config(self.config, resolver=self.resolver)
+        return self._http
+    
+    @property
+    def tls(self):
+        """SSLContext, sessões TLS e certificados reaproveitados entre análises"""
+        if self._tls is None:
+            with self._lazy_lock:
+                if self._tls is None:
+                    from app.analyzer.tls import TLSInspector
+                    self._tls = TLSInspector.from_config(self.config, resolver=self.resolver)
+        return self._tls
+    
+    @property
+    def resources(self):
+        """Inventário dos sub-recursos (None com RESOURCES_CRAWL_ENABLED desligado)"""
+        if self._resources is None and self.config.RESOURCES_CRAWL_ENABLED:
+            http = self.http
+            with self._lazy_lock:
+                if self._resources is None:
+                    from app.analyzer.resources import ResourceCrawler
+                    self._resources = ResourceCrawler.from_config(http, self.config)
+        return self._resources
+    
+    def warmup(self):
+        """Carrega de antemão tudo o que as etapas usam no primeiro uso
+        
+        Para servidores com pre-fork: chamado no processo mestre, os workers
+        herdam os módulos, o pool e o SSLContext prontos.
+        """
+        import app.analyzer.fetch
+        import app.analyzer.probe
+        return self.http, self.tls, self.resources
+    
+    def analyze_url(self, url, use_cache=True, mode='audit', stages=None):
+        """Análise completa com recomendações, ou uma sonda leve (mode='probe')
+        
+        `stages` limita a auditoria a algumas etapas ('basic,dns' ou uma
+        lista de nomes); as etapas de que elas dependem rodam junto.
+        """
+        if mode not in self.MODES:
+            raise ValueError(f'Unknown mode: {mode}')
+        
+        with span('analyze_url', kind='analysis', url=url, mode=mode) as current, \
+                ANALYSES_IN_FLIGHT.track(), ANALYSIS_SECONDS.time(mode=mode):
+            metrics = self._analyze_url(url, use_cache, mode, stages)
+        
+        if not is_fresh(metrics):
+            outcome = 'cached'
+        else:
+            outcome = 'error' if 'error' in metrics else 'ok'
+            ANALYSIS_REQUESTS.observe(current.count('http'))
+        ANALYSES.inc(mode=mode, outcome=outcome)
+        return metrics
+    
+    def _analyze_url(self, url, use_cache, mode, stages):
+        if mode == 'probe':
+            # Sondas medem o estado atual e nunca passam pelo cache
+            return self._probe(url)
+        
+        stages = parse_stages(stages)
+        plugins = self.registry.resolve(stages)
+        # Subconjuntos diferentes da mesma URL são guardados separadamente
+        variant = tuple(plugin.name for plugin in plugins) if stages else None
+        
+        if self.cache is None or not use_cache:
+            return self._analyze(url, plugins)
+        
+        # Resultados com erro não são guardados no cache
+        metrics, info = self.cache.get_or_compute(
+            url,
+            lambda: self._analyze(url, plugins),
+            cacheable=lambda result: 'error' not in result,
+            variant=variant
+        )
+        return {**metrics, 'cache': info}
     
-    def analyze_url(self, url):
-        """Análise completa com recomendações"""
+    def _probe(self, url):
+        """Disponibilidade e TTFB, sem baixar nem analisar o corpo"""
+        from app.analyzer.probe import probe
         try:
+            basic = probe(self.http, url, method=self.config.PROBE_METHOD, timeout=self.config.PROBE_TIMEOUT)
+        except Exception as e:
+            return {'error': str(e), 'timestamp': datetime.utcnow().isoformat(), 'mode': 'probe'}
+        
+        available = basic['status_code'] < 400
+        performance = 'good'
+        if basic['response_time'] > self.thresholds['response_time']['warning']:
+            performance = 'bad'
+        elif basic['response_time'] > self.thresholds['response_time']['good']:
+            performance = 'warning'
+        
+        result = {
+            'timestamp': datetime.utcnow().isoformat(),
+            'url': url,
+            'mode': 'probe',
+            'basic_metrics': basic,
+            'health_check': {
+                'availability': 'good' if available else 'bad',
+                'performance': performance,
+                'overall': performance if available else 'bad'
+            }
+        }
+        if self.anomalies is not None:
+            # Sondas têm a sua própria linha de base, separada da auditoria
+            result['anomalies'] = self._detect_anomalies(url, result, mode='probe')
+            health = result['health_check']
+            health['baseline'] = _worst(finding['severity'] for finding in result['anomalies'])
+            health['overall'] = _worst((health['overall'], health['baseline']))
+        return result
+    
+    def _analyze(self, url, plugins=None):
+        plugins = plugins or self.registry.resolve()
+        try:
+            # Página baixada uma única vez e compartilhada entre as análises
+            ctx = self._context(url)
+            run = self.scheduler.run(self._build_stages(ctx, plugins))
+            
+            # Sem a página não há análise possível
+            if 'basic_metrics' in run.errors:
+                raise Exception(run.errors['basic_metrics'])
+            
             metrics = {
                 'timestamp': datetime.utcnow().isoformat(),
                 'url': url,
-                'basic_metrics': self._analyze_basic_metrics(url),
-                'dns_metrics': self._analyze_dns(url),
-                'ssl_metrics': self._analyze_ssl(url),
-                'resource_metrics': self._analyze_resources(url),
-                'seo_metrics': self._analyze_seo(url),
-                'security_metrics': self._analyze_security(url),
-                'availability_metrics': self._analyze_availability(url)
+                'mode': 'audit'
             }
+            for plugin in plugins:
+                if plugin.report:
+                    metrics[plugin.name] = run.get(plugin.name)
+            
+            if 'anomalies' in run.results:
+                metrics['anomalies'] = run.get('anomalies')
             
             # Adicionar análise de saúde e recomendações
-            metrics['health_check'] = self._analyze_health(metrics)
-            metrics['recommendations'] = self._generate_recommendations(metrics)
+            metrics['health_check'] = run.get('health_check')
+            metrics['recommendations'] = run.get('recommendations')
             
             return metrics
             
         except Exception as e:
             return {'error': str(e), 'timestamp': datetime.utcnow().isoformat()}
     
-    def _analyze_basic_metrics(self, url):
+    def analyze_many(self, urls, concurrency=None, per_host=None, rate=None):
+        """Analisa várias URLs, devolvendo cada resultado assim que termina
+        
+        Limites inválidos levantam ValueError na chamada (veja run_batch).
+        """
+        results = run_batch(
+            self.analyze_url,
+            urls,
+            self.config.BATCH_CONCURRENCY if concurrency is None else concurrency,
+            self.config.BATCH_PER_HOST if per_host is None else per_host,
+            self.config.BATCH_HOST_RATE if rate is None else rate
+        )
+        return self._collect(results)
+    
+    @staticmethod
+    def _collect(results):
+        for url, metrics in results:
+            if isinstance(metrics, Exception):
+                metrics = {'error': str(metrics), 'timestamp': datetime.utcnow().isoformat()}
+            metrics.setdefault('url', url)
+            yield metrics
+    
+    def _context(self, target):
+        """Contexto de busca que usa o pool de conexões do analisador"""
+        from app.analyzer.fetch import FetchContext
+        return FetchContext.of(
+            target,
+            session=self.http,
+            timeout=self.config.HTTP_TIMEOUT,
+            max_bytes=self.config.HTML_MAX_BYTES,
+            parser=self.config.HTML_PARSER,
+            resolver=self.resolver,
+            tls=self.tls
+        )
+    
+    def _build_stages(self, ctx, plugins):
+        """Monta o grafo de etapas de uma análise a partir dos plugins
+        
+        DNS, TLS, robots.txt, sitemap.xml e a busca da página são esperas de
+        rede independentes e rodam em paralelo; as análises que dependem da
+        página, e a saúde/recomendações, esperam suas entradas.
+        """
+        stages = [
+            Stage(
+                plugin.name,
+                lambda deps, plugin=plugin: plugin.func(self, ctx, deps),
+                depends_on=plugin.inputs,
+                timeout=plugin.timeout_for(self.config),
+                partial=plugin.partial
+            )
+            for plugin in plugins
+        ]
+        
+        # Saúde e recomendações usam as etapas que rodaram, sejam quais forem
+        reported = tuple(plugin.name for plugin in plugins if plugin.report)
+        if self.anomalies is not None and 'basic_metrics' in reported:
+            stages.append(Stage(
+                'anomalies',
+                lambda deps: self._detect_anomalies(ctx.url, deps),
+                depends_on=('basic_metrics',)
+            ))
+            reported += ('anomalies',)
+        # Rodam mesmo que alguma entrada tenha estourado o tempo
+        stages.append(Stage('health_check', self._analyze_health, depends_on=reported, partial=True))
+        stages.append(Stage('recommendations', self._generate_recommendations, depends_on=reported,
+                            partial=True))
+        
+        # Cada etapa vira um span da análise e alimenta o histograma por etapa
+        for stage in stages:
+            stage.func = self._instrumented(stage.name, stage.func)
+        return stages
+    
+    @staticmethod
+    def _instrumented(name, func):
+        def run(deps):
+            with measured(name, STAGE_SECONDS, kind='stage', stage=name):
+                return func(deps)
+        return run
+    
+    @registry.stage(
+        'basic_metrics',
+        alias='basic',
+        order=10,
+        cost='network',
+        timeout=_fetch_timeout,
+        schema={
+            'response_time': int,
+            'status_code': int,
+            'content_size': int,
+            'truncated': bool,
+            'headers': dict,
+            'encoding': str,
+            'redirect_count': int,
+            'is_redirect': bool,
+            'final_url': str,
+            'timing': dict
+        }
+    )
+    def _analyze_basic_metrics(self, ctx, inputs=None):
         """Analisa métricas básicas como tempo de resposta e status"""
-        start_time = time.time()
-        response = requests.get(url, timeout=30)
-        response_time = int((time.time() - start_time) * 1000)
+        ctx = self._context(ctx)
+        response = ctx.response
         
         return {
-            'response_time': response_time,
+            'response_time': ctx.response_time,
             'status_code': response.status_code,
-            'content_size': len(response.content),
+            'content_size': ctx.content_size,
+            'truncated': ctx.truncated,
             'headers': dict(response.headers),
             'encoding': response.encoding,
             'redirect_count': len(response.history),
             'is_redirect': len(response.history) > 0,
-            'final_url': response.url
+            'final_url': response.url,
+            # DNS, conexão, TLS, espera, download e saltos da própria busca
+            'timing': ctx.timing
         }
     
-    def _analyze_dns(self, url):
-        """Analisa métricas de DNS"""
-        domain = urlparse(url).netloc
-        start_time = time.time()
+    @registry.stage(
+        'dns_metrics',
+        alias='dns',
+        order=20,
+        cost='network',
+        schema={
+            'ip': str,
+            'ipv4': list,
+            'ipv6': list,
+            'dns_time': int,
+            'lookup_time': int,
+            'cached': bool,
+            'ttl': int
+        }
+    )
+    def _analyze_dns(self, ctx, inputs=None):
+        """Analisa métricas de DNS
+        
+        `dns_time` é o tempo da resolução (A e AAAA em paralelo); com o
+        cache quente `lookup_time` fica perto de zero e `cached` é True.
+        """
+        ctx = self._context(ctx)
         try:
-            ip = socket.gethostbyname(domain)
-            dns_time = int((time.time() - start_time) * 1000)
-            return {
-                'ip': ip,
-                'dns_time': dns_time
-            }
-        except:
+            result = self.resolver.resolve(ctx.hostname)
+        except Exception:
             return {'error': 'DNS resolution failed'}
+        return {
+            'ip': (result['ipv4'] + result['ipv6'])[0],
+            'ipv4': result['ipv4'],
+            'ipv6': result['ipv6'],
+            'dns_time': result['resolution_time'],
+            'lookup_time': result['lookup_time'],
+            'cached': result['cached'],
+            'ttl': result['ttl']
+        }
     
-    def _analyze_ssl(self, url):
-        """Analisa métricas de SSL"""
-        domain = urlparse(url).netloc
-        try:
-            start_time = time.time()
-            context = ssl.create_default_context()
-            with socket.create_connection((domain, 443)) as sock:
-                with context.wrap_socket(sock, server_hostname=domain) as ssock:
-                    ssl_time = int((time.time() - start_time) * 1000)
-                    return {
-                        'ssl_time': ssl_time,
-                        'version': ssock.version(),
-                        'cipher': ssock.cipher()
-                    }
-        except:
-            return {'error': 'SSL analysis failed'}
+    @registry.stage(
+        'ssl_metrics',
+        alias='ssl',
+        order=30,
+        cost='network',
+        timeout=_tls_timeout,
+        schema={
+            'ssl_time': int,
+            'handshake_time': float,
+            'resumed': bool,
+            'full_handshake_time': float,
+            'resumed_handshake_time': float,
+            'version': str,
+            'cipher': list,
+            'certificate': dict
+        }
+    )
+    def _analyze_ssl(self, ctx, inputs=None):
+        """Analisa métricas de SSL: handshake (completo ou retomado) e certificado"""
+        return self._context(ctx).ssl_info()
+    
+    @registry.stage('robots_txt', cost='network', timeout=_fetch_timeout, report=False)
+    def _has_robots_txt(self, ctx, inputs=None):
+        return self._context(ctx).probe('/robots.txt')
+    
+    @registry.stage('sitemap_xml', cost='network', timeout=_fetch_timeout, report=False)
+    def _has_sitemap_xml(self, ctx, inputs=None):
+        return self._context(ctx).probe('/sitemap.xml')
     
-    def _analyze_resources(self, url):
-        """Analisa recursos da página (imagens, scripts, etc)"""
+    @registry.stage(
+        'resource_metrics',
+        alias='resources',
+        order=40,
+        inputs=('basic_metrics',),
+        cost='crawl',
+        timeout=lambda config: config.RESOURCES_STAGE_TIMEOUT,
+        schema={
+            'images': int,
+            'scripts': int,
+            'styles': int,
+            'fonts': int,
+            'media': int,
+            'requests': int,
+            'html_size': int,
+            'total_size': int,
+            'by_type': dict,
+            'largest': list,
+            'uncompressed': list,
+            'failed': int,
+            'skipped': int
+        }
+    )
+    def _analyze_resources(self, ctx, inputs=None):
+        """Analisa recursos da página (imagens, scripts, etc) e o peso total"""
+        ctx = self._context(ctx)
         try:
-            response = requests.get(url)
-            html = response.text
+            page = ctx.page
             
             resources = {
-                'images': html.count('<img'),
-                'scripts': html.count('<script'),
-                'styles': html.count('<link rel="stylesheet"'),
-                'total_size': len(response.content)
+                'images': page['images'],
+                'scripts': page['scripts'],
+                'styles': page['stylesheets'],
+                'html_size': ctx.content_size,
+                'total_size': ctx.content_size
             }
             
+            if self.resources is not None:
+                base_url = urljoin(ctx.response.url, page['base_url'] or '')
+                inventory = self.resources.crawl(base_url, page['resources'])
+                resources.update({
+                    'fonts': inventory['by_type']['font']['count'],
+                    'media': inventory['by_type']['media']['count'],
+                    # A página mais os sub-recursos medidos
+                    'requests': inventory['requests'] + 1,
+                    'total_size': ctx.content_size + inventory['bytes'],
+                    'by_type': inventory['by_type'],
+                    'largest': inventory['largest'],
+                    'uncompressed': inventory['uncompressed'],
+                    'failed': inventory['failed'],
+                    'skipped': inventory['skipped']
+                })
+            
             return resources
         except:
             return {'error': 'Resource analysis failed'}
     
-    def _analyze_seo(self, url):
+    @registry.stage(
+        'seo_metrics',
+        alias='seo',
+        order=50,
+        inputs=('basic_metrics', 'robots_txt', 'sitemap_xml'),
+        # Uma sonda lenta não derruba título, descrição e cabeçalhos já baixados
+        partial=('robots_txt', 'sitemap_xml'),
+        cost='local',
+        schema={
+            'title': str,
+            'meta_description': str,
+            'h1_count': int,
+            'images_without_alt': int,
+            'has_robots_txt': bool,
+            'has_sitemap': bool
+        }
+    )
+    def _analyze_seo(self, ctx, inputs=None):
+        ctx = self._context(ctx)
+        inputs = inputs or {}
         try:
-            response = requests.get(url)
-            soup = BeautifulSoup(response.text, 'html.parser')
+            page = ctx.page
             
             return {
-                'title': soup.title.string if soup.title else None,
-                'meta_description': soup.find('meta', {'name': 'description'})['content'] if soup.find('meta', {'name': 'description'}) else None,
-                'h1_count': len(soup.find_all('h1')),
-                'images_without_alt': len([img for img in soup.find_all('img') if not img.get('alt')]),
-                'has_robots_txt': requests.get(f"{urlparse(url).scheme}://{urlparse(url).netloc}/robots.txt").status_code == 200,
-                'has_sitemap': requests.get(f"{urlparse(url).scheme}://{urlparse(url).netloc}/sitemap.xml").status_code == 200
+                'title': page['title'],
+                'meta_description': page['meta_description'],
+                'h1_count': page['h1_count'],
+                'images_without_alt': page['images_without_alt'],
+                # Resultado das etapas robots_txt/sitemap_xml; uma que falhou conta como ausente
+                'has_robots_txt': inputs.get('robots_txt') is True,
+                'has_sitemap': inputs.get('sitemap_xml') is True
             }
         except:
             return {'error': 'SEO analysis failed'}
     
-    def _analyze_security(self, url):
-        try:
-            domain = urlparse(url).netloc
-            ssl_info = self._analyze_ssl(url)
-            
-            security_headers = [
-                'Strict-Transport-Security',
-                'Content-Security-Policy',
-                'X-Frame-Options',
-                'X-Content-Type-Options',
-                'X-XSS-Protection'
-            ]
-            
-            response = requests.get(url)
-            headers = response.headers
-            
-            return {
-                'ssl_valid': not isinstance(ssl_info, dict) or 'error' not in ssl_info,
-                'security_headers_present': {
-                    header: header.lower() in map(str.lower, headers.keys())
-                    for header in security_headers
-                },
-                'cookies_secure': all(cookie.secure for cookie in response.cookies),
-                'https_redirect': response.url.startswith('https')
-            }
-        except:
-            return {'error': 'Security analysis failed'}
+    def _analyze_security(self, ctx, inputs=None):
+        return analyze_security(self, ctx, inputs)
     
-    def _analyze_availability(self, url):
+    @registry.stage(
+        'availability_metrics',
+        alias='availability',
+        order=70,
+        inputs=('basic_metrics',),
+        cost='local',
+        schema={'us': dict, 'eu': dict, 'asia': dict}
+    )
+    def _analyze_availability(self, ctx, inputs=None):
+        ctx = self._context(ctx)
         locations = ['us', 'eu', 'asia']  # Simulated locations
         results = {}
         
+        # As localizações são simuladas a partir do mesmo host, então todas
+        # compartilham o resultado do download único da página
+        try:
+            ctx.response
+            result = {
+                'available': True,
+                'response_time': ctx.response_time
+            }
+        except:
+            result = {
+                'available': False,
+                'response_time': None
+            }
+        
         for location in locations:
-            try:
-                start_time = time.time()
-                requests.get(url, timeout=5)
-                response_time = int((time.time() - start_time) * 1000)
-                results[location] = {
-                    'available': True,
-                    'response_time': response_time
-                }
-            except:
-                results[location] = {
-                    'available': False,
-                    'response_time': None
-                }
+            results[location] = dict(result)
         
         return results
     
+    def _detect_anomalies(self, url, metrics, mode='audit'):
+        """Compara a análise com a linha de base da URL e a incorpora nela"""
+        findings = self.anomalies.observe(url, extract(metrics), mode=mode)
+        for finding in findings:
+            ANOMALIES.inc(mode=mode, kind=finding['kind'])
+        return findings
+    
     def _analyze_health(self, metrics):
-        health_status = {
-            'performance': 'good',
-            'security': 'good',
-            'seo': 'good',
-            'overall': 'good'
-        }
+        """Saúde por categoria, só das categorias cujas etapas rodaram"""
+        health_status = {}
         
         # Análise de Performance
-        response_time = metrics['basic_metrics']['response_time']
-        if response_time > self.thresholds['response_time']['warning']:
-            health_status['performance'] = 'bad'
-        elif response_time > self.thresholds['response_time']['good']:
-            health_status['performance'] = 'warning'
+        if 'basic_metrics' in metrics or 'resource_metrics' in metrics:
+            health_status['performance'] = 'good'
+            response_time = (metrics.get('basic_metrics') or {}).get('response_time')
+            if response_time is not None:
+                if response_time > self.thresholds['response_time']['warning']:
+                    health_status['performance'] = 'bad'
+                elif response_time > self.thresholds['response_time']['good']:
+                    health_status['performance'] = 'warning'
+            
+            # Peso da página e número de requisições
+            resources = metrics.get('resource_metrics') or {}
+            for value, limits in ((resources.get('total_size'), self.thresholds['size']),
+                                  (resources.get('requests'), self.thresholds['resources'])):
+                if value is None:
+                    continue
+                if value > limits['warning']:
+                    health_status['performance'] = 'bad'
+                elif value > limits['good'] and health_status['performance'] == 'good':
+                    health_status['performance'] = 'warning'
         
         # Análise de Segurança
-        security = metrics['security_metrics']
-        if not security.get('ssl_valid', False):
-            health_status['security'] = 'bad'
-        elif not all(security.get('security_headers_present', {}).values()):
-            health_status['security'] = 'warning'
+        if 'security_metrics' in metrics:
+            security = metrics['security_metrics'] or {}
+            health_status['security'] = 'good'
+            if not security.get('ssl_valid', False):
+                health_status['security'] = 'bad'
+            elif not all(security.get('security_headers_present', {}).values()):
+                health_status['security'] = 'warning'
         
         # Análise de SEO
-        seo = metrics['seo_metrics']
-        if not seo.get('title') or not seo.get('meta_description'):
-            health_status['seo'] = 'warning'
-        if seo.get('images_without_alt', 0) > 0:
-            health_status['seo'] = 'warning'
+        if 'seo_metrics' in metrics:
+            seo = metrics['seo_metrics'] or {}
+            health_status['seo'] = 'good'
+            if not seo.get('title') or not seo.get('meta_description'):
+                health_status['seo'] = 'warning'
+            if seo.get('images_without_alt', 0) > 0:
+                health_status['seo'] = 'warning'
+        
+        # Comparação com o histórico da própria URL
+        if 'anomalies' in metrics:
+            health_status['baseline'] = _worst(finding['severity'] for finding in metrics['anomalies'] or [])
         
         # Status Geral
+        health_status['overall'] = 'good'
         if 'bad' in health_status.values():
             health_status['overall'] = 'bad'
         elif 'warning' in health_status.values():
@@ -222,25 +604,75 @@ class PerformanceAnalyzer:
         recommendations = []
         
         # Recomendações de Performance
-        if metrics['basic_metrics']['response_time'] > self.thresholds['response_time']['good']:
+        response_time = (metrics.get('basic_metrics') or {}).get('response_time')
+        if response_time is not None and response_time > self.thresholds['response_time']['good']:
             recommendations.append({
                 'type': 'performance',
                 'priority': 'high',
                 'message': 'Tempo de resposta alto. Considere usar CDN ou otimizar o servidor.'
             })
         
+        resources = metrics.get('resource_metrics') or {}
+        total_size = resources.get('total_size')
+        if total_size and total_size > self.thresholds['size']['good']:
+            largest = ', '.join(item['url'] for item in resources.get('largest', [])[:3])
+            recommendations.append({
+                'type': 'performance',
+                'priority': 'high' if total_size > self.thresholds['size']['warning'] else 'medium',
+                'message': f'Página pesada ({total_size / (1024 * 1024):.1f} MB). '
+                           f'Reduza ou adie os maiores recursos{": " + largest if largest else ""}.'
+            })
+        
+        if resources.get('requests', 0) > self.thresholds['resources']['good']:
+            recommendations.append({
+                'type': 'performance',
+                'priority': 'medium',
+                'message': f'Muitas requisições ({resources["requests"]}). Combine arquivos ou adie recursos não essenciais.'
+            })
+        
+        if resources.get('uncompressed'):
+            recommendations.append({
+                'type': 'performance',
+                'priority': 'medium',
+                'message': f'{len(resources["uncompressed"])} scripts/estilos sem compressão. Ative gzip ou brotli no servidor.'
+            })
+        
+        for finding in metrics.get('anomalies') or []:
+            label = ANOMALY_LABELS.get(finding['metric'], finding['metric'])
+            ratio = finding['value'] / finding['baseline']['p50'] if finding['baseline']['p50'] else 0
+            if finding['kind'] == 'regression':
+                message = (f'{label} piorou: {finding["value"]:.0f} ms, {ratio:.1f}x o normal desta URL '
+                           f'(p50 {finding["baseline"]["p50"]:.0f} ms). Verifique mudanças recentes no servidor ou na página.')
+            else:
+                message = (f'Pico isolado de {label.lower()}: {finding["value"]:.0f} ms, {ratio:.1f}x o normal '
+                           f'desta URL (p50 {finding["baseline"]["p50"]:.0f} ms).')
+            recommendations.append({
+                'type': 'performance',
+                'priority': 'high' if finding['kind'] == 'regression' else 'medium',
+                'message': message
+            })
+        
         # Recomendações de Segurança
-        security = metrics['security_metrics']
-        if not security.get('ssl_valid', False):
+        security = metrics.get('security_metrics')
+        if security is not None and not security.get('ssl_valid', False):
             recommendations.append({
                 'type': 'security',
                 'priority': 'critical',
                 'message': 'SSL inválido ou ausente. Instale um certificado SSL válido.'
             })
         
+        certificate = (metrics.get('ssl_metrics') or {}).get('certificate') or {}
+        days = certificate.get('days_to_expiry')
+        if days is not None and days <= self.thresholds['certificate_days']['warning']:
+            recommendations.append({
+                'type': 'security',
+                'priority': 'critical' if days <= self.thresholds['certificate_days']['critical'] else 'high',
+                'message': f'Certificado expira em {max(days, 0)} dias ({certificate["not_after"][:10]}). Renove-o.'
+            })
+        
         # Recomendações de SEO
-        seo = metrics['seo_metrics']
-        if not seo.get('meta_description'):
+        seo = metrics.get('seo_metrics')
+        if seo is not None and not seo.get('meta_description'):
             recommendations.append({
                 'type': 'seo',
                 'priority': 'medium',
@@ -0,0 +1,43 @@
+from time import perf_counter
+from app.analyzer.timing import trace_requests
+
+PROBE_METHODS = ('head', 'range')
+
+def _request(http, url, method, timeout):
+    if method == 'head':
+        response = http.head(url, timeout=timeout, allow_redirects=True)
+        # Servidores sem HEAD recebem o GET com Range
+        if response.status_code not in (405, 501):
+            return response, 'head'
+        response.close()
+    response = http.get(url, timeout=timeout, stream=True, headers={'Range': 'bytes=0-0'})
+    return response, 'range'
+
+def probe(http, url, method='head', timeout=None):
+    """Verifica a disponibilidade sem baixar nem analisar o corpo
+
+    Com 'head' faz um HEAD; com 'range', um GET só do primeiro byte. O
+    tempo de resposta é o tempo até os cabeçalhos (TTFB).
+    """
+    if method not in PROBE_METHODS:
+        raise ValueError(f'Unknown probe method: {method}')
+
+    with trace_requests() as trace:
+        start = perf_counter()
+        response, used = _request(http, url, method, timeout)
+        headers_at = perf_counter()
+        if response.status_code == 206:
+            # Ler o byte pedido devolve a conexão ao pool
+            response.content
+        # Se o Range foi ignorado, fechar descarta a conexão sem baixar a página
+        response.close()
+        end = perf_counter()
+
+    return {
+        'response_time': int((headers_at - start) * 1000),
+        'status_code': response.status_code,
+        'method': used,
+        'final_url': response.url,
+        'redirect_count': len(response.history),
+        'timing': trace.summary(ttfb=headers_at - start, download=end - headers_at, total=end - start)
+    }
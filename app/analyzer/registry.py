@@ -0,0 +1,125 @@
+from collections import OrderedDict
+
+# Custo de uma etapa: 'local' só usa a página já baixada e as entradas,
+# 'network' faz as próprias requisições, 'crawl' faz muitas
+COST_CLASSES = ('local', 'network', 'crawl')
+
+class AnalyzerPlugin:
+    """Etapa de análise registrada: nome, entradas, custo e esquema de saída
+
+    `func(analyzer, ctx, inputs)` recebe o analisador, o contexto de busca
+    compartilhado e o resultado das etapas listadas em `inputs`. `schema`
+    descreve os campos devolvidos ({campo: tipo}). Etapas com
+    `report=False` só alimentam outras etapas e não aparecem no relatório.
+    `order` fixa a posição da etapa no relatório, independente da ordem em
+    que os módulos são importados; sem ela a etapa vem depois das
+    ordenadas, na ordem de registro. `partial` lista as entradas opcionais
+    (ou True para todas): se uma delas estourar o tempo a etapa roda assim
+    mesmo, recebendo o erro no lugar do valor.
+    """
+
+    def __init__(self, name, func, inputs=(), cost='network', schema=None,
+                 alias=None, timeout=None, report=True, order=None, partial=False):
+        if cost not in COST_CLASSES:
+            raise ValueError(f'Unknown cost class: {cost}')
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.cost = cost
+        self.schema = dict(schema or {})
+        self.alias = alias
+        self.timeout = timeout
+        self.report = report
+        self.order = order
+        self.partial = partial
+
+    def timeout_for(self, config):
+        """Tempo limite da etapa; pode depender da configuração"""
+        return self.timeout(config) if callable(self.timeout) else self.timeout
+
+    def describe(self):
+        return {
+            'name': self.name,
+            'alias': self.alias,
+            'inputs': list(self.inputs),
+            'cost': self.cost,
+            'order': self.order,
+            'schema': {field: kind.__name__ for field, kind in self.schema.items()}
+        }
+
+class AnalyzerRegistry:
+    """Etapas de análise disponíveis, na ordem em que aparecem no relatório"""
+
+    def __init__(self):
+        self._plugins = OrderedDict()
+        self._aliases = {}
+
+    def add(self, plugin):
+        if plugin.name in self._plugins:
+            raise ValueError(f'Stage already registered: {plugin.name}')
+        self._plugins[plugin.name] = plugin
+        if plugin.alias:
+            self._aliases[plugin.alias] = plugin.name
+        return plugin
+
+    def stage(self, name, **kwargs):
+        """Decorador que registra a função como etapa e a devolve inalterada"""
+        def decorator(func):
+            self.add(AnalyzerPlugin(name, func, **kwargs))
+            return func
+        return decorator
+
+    def get(self, name):
+        """Etapa pelo nome ou pelo apelido curto (ex.: 'basic')"""
+        name = self._aliases.get(name, name)
+        if name not in self._plugins:
+            raise ValueError(f'Unknown stage: {name}')
+        return self._plugins[name]
+
+    def __iter__(self):
+        # sorted é estável: empates ficam na ordem de registro
+        return iter(sorted(
+            self._plugins.values(),
+            key=lambda plugin: float('inf') if plugin.order is None else plugin.order
+        ))
+
+    def report_names(self):
+        return tuple(plugin.name for plugin in self if plugin.report)
+
+    def resolve(self, names=None):
+        """Etapas pedidas mais as entradas de que dependem, na ordem do relatório
+
+        Sem `names`, todas as etapas registradas.
+        """
+        if names is None:
+            return list(self)
+
+        selected = set()
+
+        def include(plugin):
+            if plugin.name in selected:
+                return
+            selected.add(plugin.name)
+            for dep in plugin.inputs:
+                include(self.get(dep))
+
+        for name in names:
+            include(self.get(name))
+        return [plugin for plugin in self if plugin.name in selected]
+
+    def describe(self):
+        return [plugin.describe() for plugin in self]
+
+def parse_stages(value):
+    """Aceita 'basic,dns' ou ['basic', 'dns']; None ou vazio é tudo"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.split(',')
+    if not isinstance(value, (list, tuple)) or not all(isinstance(name, str) for name in value):
+        raise ValueError('stages must be a list of stage names')
+    names = [name.strip() for name in value if name and name.strip()]
+    return names or None
+
+# Registro padrão, usado pelo PerformanceAnalyzer
+registry = AnalyzerRegistry()
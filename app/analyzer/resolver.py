@@ -0,0 +1,203 @@
+import ipaddress
+import os
+import socket
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+try:
+    import dns.resolver
+    import dns.exception
+except ImportError:  # dnspython é opcional; sem ele o TTL vem da configuração
+    dns = None
+
+FAMILIES = {'ipv4': socket.AF_INET, 'ipv6': socket.AF_INET6}
+
+def system_lookup(host, family):
+    """Endereços pelo resolvedor do sistema; não informa TTL"""
+    infos = socket.getaddrinfo(host, None, FAMILIES[family], socket.SOCK_STREAM)
+    return list(OrderedDict.fromkeys(info[4][0] for info in infos)), None
+
+def dnspython_lookup(host, family, timeout=5):
+    """Endereços e TTL da resposta, via dnspython
+
+    Nomes que o DNS não conhece (localhost, /etc/hosts) ainda passam pelo
+    resolvedor do sistema.
+    """
+    try:
+        answer = dns.resolver.resolve(host, 'A' if family == 'ipv4' else 'AAAA', lifetime=timeout)
+    except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer, dns.resolver.NoNameservers,
+            dns.exception.Timeout):
+        return system_lookup(host, family)
+    return [record.address for record in answer], answer.rrset.ttl
+
+def default_lookup():
+    return dnspython_lookup if dns is not None else system_lookup
+
+def is_ip(host):
+    try:
+        ipaddress.ip_address(host.strip('[]'))
+        return True
+    except ValueError:
+        return False
+
+class Resolver:
+    """Resolução DNS com cache por TTL, compartilhada por etapas e conexões
+
+    As consultas A e AAAA de um host correm em paralelo. O resultado fica
+    em cache pelo TTL da resposta (limitado a `max_ttl`) ou por `ttl`
+    quando o resolvedor não informa; falhas ficam `negative_ttl` segundos.
+    Consultas concorrentes do mesmo host esperam pela mesma resolução.
+
+    `lookup(host, família)` devolve (endereços, ttl ou None) e levanta
+    socket.gaierror se o nome não existe; nos testes é um stub.
+    """
+
+    def __init__(self, lookup=None, ttl=300, max_ttl=3600, negative_ttl=30,
+                 max_entries=10000, workers=8):
+        self.lookup = lookup or default_lookup()
+        self.ttl = ttl
+        self.max_ttl = max_ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.workers = workers
+        # Criado no primeiro uso; um processo filho (fork) cria o seu
+        self._executor = None
+        self._pid = None
+        self._entries = OrderedDict()  # host -> (expira em, resultado ou exceção)
+        self._pending = {}  # host -> Future
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'coalesced': 0, 'failures': 0}
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            ttl=config.DNS_CACHE_TTL,
+            max_ttl=config.DNS_CACHE_MAX_TTL,
+            negative_ttl=config.DNS_NEGATIVE_TTL,
+            max_entries=config.DNS_CACHE_MAX_ENTRIES
+        )
+
+    def resolve(self, host):
+        """Endereços do host, com o tempo desta chamada e o da resolução real
+
+        Devolve {host, ipv4, ipv6, lookup_time, resolution_time, cached, ttl}:
+        `lookup_time` é o tempo gasto agora (quase zero com o cache quente) e
+        `resolution_time` o da consulta que preencheu o cache.
+        """
+        host = host.lower().rstrip('.')
+        start = time.perf_counter()
+        if is_ip(host):
+            address = host.strip('[]')
+            family = 'ipv6' if ':' in address else 'ipv4'
+            result = {'ipv4': [], 'ipv6': [], 'resolution_time': 0, 'ttl': None}
+            result[family] = [address]
+            return {'host': host, **result, 'lookup_time': 0, 'cached': False}
+
+        result, cached = self._cached(host)
+        if isinstance(result, socket.gaierror):
+            raise socket.gaierror(*result.args)
+        if isinstance(result, Exception):
+            raise result
+        expires_at = result['expires_at']
+        return {
+            'host': host,
+            'ipv4': list(result['ipv4']),
+            'ipv6': list(result['ipv6']),
+            'lookup_time': int((time.perf_counter() - start) * 1000),
+            'resolution_time': result['resolution_time'],
+            'cached': cached,
+            'ttl': max(int(expires_at - time.monotonic()), 0)
+        }
+
+    def addresses(self, host):
+        """IPv4 primeiro, depois IPv6: a ordem em que as conexões tentam"""
+        result = self.resolve(host)
+        return result['ipv4'] + result['ipv6']
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters, entries=len(self._entries), pending=len(self._pending))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def executor(self):
+        if self._executor is None or self._pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='dns')
+                    self._pid = os.getpid()
+        return self._executor
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    def _cached(self, host):
+        with self._lock:
+            entry = self._entries.get(host)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(host)
+                self._counters['hits'] += 1
+                return entry[1], True
+            future = self._pending.get(host)
+            leader = future is None
+            if leader:
+                future = self._pending[host] = Future()
+                self._counters['misses'] += 1
+            else:
+                self._counters['coalesced'] += 1
+
+        if not leader:
+            return future.result(), True
+
+        try:
+            result = self._query(host)
+        except Exception as e:
+            result = e
+        with self._lock:
+            # Só nomes inexistentes entram no cache negativo
+            if not isinstance(result, Exception) or isinstance(result, socket.gaierror):
+                self._store(host, result)
+            del self._pending[host]
+        future.set_result(result)
+        return result, False
+
+    def _query(self, host):
+        """A e AAAA em paralelo; basta uma das famílias responder"""
+        start = time.perf_counter()
+        aaaa = self.executor.submit(self.lookup, host, 'ipv6')
+        try:
+            ipv4, ipv4_ttl = self.lookup(host, 'ipv4')
+        except socket.gaierror:
+            ipv4, ipv4_ttl = [], None
+        try:
+            ipv6, ipv6_ttl = aaaa.result()
+        except socket.gaierror:
+            ipv6, ipv6_ttl = [], None
+        if not ipv4 and not ipv6:
+            raise socket.gaierror(socket.EAI_NONAME, f'Could not resolve {host}')
+
+        ttls = [ttl for ttl in (ipv4_ttl, ipv6_ttl) if ttl is not None]
+        ttl = min(min(ttls), self.max_ttl) if ttls else self.ttl
+        return {
+            'ipv4': ipv4,
+            'ipv6': ipv6,
+            'resolution_time': int((time.perf_counter() - start) * 1000),
+            'expires_at': time.monotonic() + ttl
+        }
+
+    def _store(self, host, result):
+        if isinstance(result, Exception):
+            self._counters['failures'] += 1
+            expires_at = time.monotonic() + self.negative_ttl
+        else:
+            expires_at = result['expires_at']
+        self._entries[host] = (expires_at, result)
+        self._entries.move_to_end(host)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
@@ -0,0 +1,164 @@
+import re
+from urllib.parse import urljoin, urldefrag, urlparse
+from app.analyzer.batch import run_batch
+
+RESOURCE_TYPES = ('script', 'style', 'image', 'font', 'media')
+
+# Tipos de texto que deveriam chegar comprimidos
+COMPRESSIBLE_TYPES = ('script', 'style')
+COMPRESSED_ENCODINGS = ('gzip', 'br', 'deflate', 'zstd')
+
+# Fontes referenciadas por url(...) nas folhas de estilo
+FONT_URL = re.compile(
+    r'''url\(\s*['"]?([^'")\s]+?\.(?:woff2?|ttf|otf|eot)(?:[?#][^'")\s]*)?)['"]?\s*\)''',
+    re.IGNORECASE
+)
+
+CHUNK_SIZE = 64 * 1024
+
+def resolve_resources(base_url, resources):
+    """URLs absolutas e sem duplicatas, só http(s), com o primeiro tipo visto"""
+    resolved = {}
+    for kind, url in resources:
+        url, _ = urldefrag(urljoin(base_url, url))
+        if urlparse(url).scheme in ('http', 'https'):
+            resolved.setdefault(url, kind)
+    return resolved
+
+def summarize(entries, skipped=0, top=5):
+    """Contagens, bytes e compressão por tipo, mais os maiores recursos"""
+    by_type = {kind: {'count': 0, 'bytes': 0, 'compressed': 0, 'failed': 0} for kind in RESOURCE_TYPES}
+    for entry in entries:
+        totals = by_type[entry['type']]
+        totals['count'] += 1
+        if 'error' in entry:
+            totals['failed'] += 1
+            continue
+        totals['bytes'] += entry['bytes'] or 0
+        totals['compressed'] += 1 if entry['compressed'] else 0
+
+    measured = [entry for entry in entries if entry.get('bytes') is not None]
+    largest = sorted(measured, key=lambda entry: entry['bytes'], reverse=True)[:top]
+    uncompressed = [
+        entry['url'] for entry in entries
+        if entry['type'] in COMPRESSIBLE_TYPES and 'error' not in entry and not entry['compressed']
+    ]
+
+    return {
+        'requests': len(entries),
+        'bytes': sum(totals['bytes'] for totals in by_type.values()),
+        'by_type': by_type,
+        'largest': [{key: entry[key] for key in ('url', 'type', 'bytes')} for entry in largest],
+        'uncompressed': uncompressed,
+        'failed': sum(totals['failed'] for totals in by_type.values()),
+        'skipped': skipped
+    }
+
+class ResourceCrawler:
+    """Mede o peso real da página buscando os seus sub-recursos
+
+    Cada recurso é medido com HEAD (Content-Length e Content-Encoding); se o
+    servidor não aceitar HEAD ou não informar o tamanho, o corpo é baixado
+    e os bytes transferidos são contados. As folhas de estilo são sempre
+    baixadas, para encontrar as fontes que elas carregam. As requisições
+    usam o pool do analisador, com limite de concorrência total e por host.
+    """
+
+    def __init__(self, http, concurrency=8, per_host=4, max_resources=200,
+                 timeout=10, max_download=10 * 1024 * 1024):
+        self.http = http
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.max_resources = max_resources
+        self.timeout = timeout
+        self.max_download = max_download
+
+    @classmethod
+    def from_config(cls, http, config):
+        return cls(
+            http,
+            concurrency=config.RESOURCES_CONCURRENCY,
+            per_host=config.RESOURCES_PER_HOST,
+            max_resources=config.RESOURCES_MAX,
+            timeout=config.RESOURCES_TIMEOUT
+        )
+
+    def crawl(self, base_url, resources):
+        """Inventário dos recursos [(tipo, url)] referenciados pela página"""
+        kinds = resolve_resources(base_url, resources)
+        skipped = max(len(kinds) - self.max_resources, 0)
+        pending = list(kinds)[:self.max_resources]
+        seen = set(pending)
+        entries = []
+
+        while pending:
+            fonts = []
+            for url, result in run_batch(
+                lambda url: self._measure(url, kinds[url]),
+                pending,
+                concurrency=self.concurrency,
+                per_host=self.per_host
+            ):
+                if isinstance(result, Exception):
+                    result = {'url': url, 'type': kinds[url], 'error': type(result).__name__}
+                # Fontes encontradas nas folhas de estilo entram na próxima rodada
+                for font in result.pop('fonts', ()):
+                    if font in seen:
+                        continue
+                    if len(seen) >= self.max_resources:
+                        skipped += 1
+                        continue
+                    seen.add(font)
+                    kinds.setdefault(font, 'font')
+                    fonts.append(font)
+                entries.append(result)
+            pending = fonts
+
+        return summarize(entries, skipped)
+
+    def _measure(self, url, kind):
+        if kind == 'style':
+            return self._download(url, kind, keep_body=True)
+
+        response = self.http.head(url, timeout=self.timeout, allow_redirects=True)
+        size = response.headers.get('Content-Length')
+        if response.status_code >= 400 or not (size or '').isdigit():
+            return self._download(url, kind)
+        return self._entry(url, kind, response, int(size))
+
+    def _download(self, url, kind, keep_body=False):
+        """Baixa o corpo e conta os bytes que vieram pela rede (comprimidos)"""
+        response = self.http.get(url, timeout=self.timeout, stream=True)
+        body = []
+        try:
+            if response.status_code >= 400:
+                return {'url': url, 'type': kind, 'error': f'HTTP {response.status_code}'}
+            read = 0
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                read += len(chunk)
+                if keep_body:
+                    body.append(chunk)
+                if read >= self.max_download:
+                    break
+            # tell() conta os bytes do corpo antes da descompressão
+            entry = self._entry(url, kind, response, response.raw.tell())
+        finally:
+            response.close()
+
+        if keep_body:
+            text = b''.join(body).decode(response.encoding or 'utf-8', errors='replace')
+            entry['fonts'] = [
+                urldefrag(urljoin(response.url, match))[0] for match in FONT_URL.findall(text)
+            ]
+        return entry
+
+    def _entry(self, url, kind, response, size):
+        encoding = (response.headers.get('Content-Encoding') or '').lower() or None
+        return {
+            'url': url,
+            'type': kind,
+            'status_code': response.status_code,
+            'bytes': size,
+            'encoding': encoding,
+            'compressed': encoding in COMPRESSED_ENCODINGS
+        }
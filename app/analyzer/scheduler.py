@@ -0,0 +1,184 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from app.telemetry.trace import submit
+
+class Stage:
+    """Etapa de análise com suas dependências e tempo limite
+
+    Uma etapa com `partial=True` roda mesmo quando uma dependência estourou
+    o tempo (recebe o erro, como nas outras falhas); `partial` também pode
+    ser a lista das dependências opcionais, as únicas cujo estouro é
+    tolerado. As demais falham sem rodar, porque a thread atrasada pode
+    continuar segurando o que elas iriam esperar (os locks do FetchContext).
+    """
+
+    def __init__(self, name, func, depends_on=(), timeout=None, partial=False):
+        self.name = name
+        self.func = func
+        self.depends_on = tuple(depends_on)
+        self.timeout = timeout
+        self.partial = partial if isinstance(partial, bool) else frozenset(partial)
+
+    def tolerates(self, dep):
+        """Se a etapa roda mesmo com `dep` tendo estourado o tempo"""
+        return self.partial if isinstance(self.partial, bool) else dep in self.partial
+
+class StageRun:
+    """Resultado de uma execução: valores, erros e duração de cada etapa"""
+
+    def __init__(self):
+        self.results = {}
+        self.errors = {}
+        self.durations = {}
+        # Etapas que estouraram o tempo ou dependiam de uma que estourou
+        self.timed_out = set()
+
+    def get(self, name):
+        """Valor da etapa ou um dicionário de erro, como nas análises"""
+        if name in self.errors:
+            return {'error': self.errors[name]}
+        return self.results.get(name)
+
+class StageScheduler:
+    """Executa etapas independentes em paralelo respeitando as dependências
+
+    Cada etapa roda assim que todas as suas dependências terminam, com
+    sucesso ou não. As dependências que falharam chegam como
+    {'error': ...}, e uma falha fica isolada na própria etapa; um estouro
+    de tempo passa para as dependentes (veja Stage.partial).
+
+    As execuções compartilham um único pool de `max_workers` threads, criado
+    no primeiro uso. O prazo de cada etapa conta a partir do momento em que
+    ela começa a rodar, não do tempo na fila do pool; uma etapa que estourou
+    o tempo continua ocupando a sua thread até a chamada de rede desistir.
+    """
+
+    def __init__(self, default_timeout=30, max_workers=32):
+        self.default_timeout = default_timeout
+        self.max_workers = max_workers
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(default_timeout=config.STAGE_TIMEOUT, max_workers=config.STAGE_WORKERS)
+
+    @property
+    def executor(self):
+        """Pool compartilhado; um processo filho (fork) cria o seu"""
+        if self._executor is None or self._pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix='analyzer-stage'
+                    )
+                    self._pid = os.getpid()
+        return self._executor
+
+    def run(self, stages):
+        stages = list(stages)
+        self._validate(stages)
+
+        run = StageRun()
+        waiting = list(stages)
+        pending = {}  # future -> etapa
+        started = {}  # etapa -> início da execução, marcado pela própria thread
+
+        try:
+            while waiting or pending:
+                # Dispara todas as etapas cujas dependências já terminaram
+                for stage in list(waiting):
+                    if not all(dep in run.results or dep in run.errors for dep in stage.depends_on):
+                        continue
+                    waiting.remove(stage)
+                    late = [dep for dep in stage.depends_on if dep in run.timed_out and not stage.tolerates(dep)]
+                    if late:
+                        run.errors[stage.name] = f'Dependency {late[0]} timed out'
+                        run.durations[stage.name] = 0
+                        run.timed_out.add(stage.name)
+                        continue
+                    inputs = {dep: run.get(dep) for dep in stage.depends_on}
+                    future = submit(self.executor, self._started(stage, started), inputs)
+                    pending[future] = stage
+
+                if not pending:
+                    continue
+
+                # Etapas ainda na fila têm o prazo inteiro a partir de agora
+                now = time.perf_counter()
+                next_deadline = min(
+                    started.get(stage.name, now) + self._timeout(stage) for stage in pending.values()
+                )
+                done, _ = wait(
+                    pending,
+                    timeout=max(0, next_deadline - now),
+                    return_when=FIRST_COMPLETED
+                )
+
+                now = time.perf_counter()
+                for future in list(pending):
+                    stage = pending[future]
+                    start = started.get(stage.name)
+                    if future in done:
+                        try:
+                            run.results[stage.name] = future.result()
+                        except Exception as e:
+                            run.errors[stage.name] = str(e) or e.__class__.__name__
+                    elif start is not None and now >= start + self._timeout(stage):
+                        # A thread não pode ser interrompida; o resultado
+                        # atrasado é simplesmente descartado
+                        future.cancel()
+                        run.errors[stage.name] = f'Stage timed out after {self._timeout(stage)}s'
+                        run.timed_out.add(stage.name)
+                    else:
+                        continue
+                    run.durations[stage.name] = int((now - (start or now)) * 1000)
+                    del pending[future]
+        finally:
+            # Só sobra alguma coisa aqui se a própria execução falhou
+            for future in pending:
+                future.cancel()
+
+        return run
+
+    def _timeout(self, stage):
+        return stage.timeout or self.default_timeout
+
+    @staticmethod
+    def _started(stage, started):
+        def run(inputs):
+            started[stage.name] = time.perf_counter()
+            return stage.func(inputs)
+        return run
+
+    def _validate(self, stages):
+        """Garante nomes únicos, dependências conhecidas e ausência de ciclos"""
+        names = [stage.name for stage in stages]
+        if len(names) != len(set(names)):
+            raise ValueError('Duplicate stage names')
+
+        graph = {stage.name: stage.depends_on for stage in stages}
+        for name, deps in graph.items():
+            for dep in deps:
+                if dep not in graph:
+                    raise ValueError(f'Stage {name} depends on unknown stage {dep}')
+
+        visited, visiting = set(), set()
+
+        def visit(name):
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f'Dependency cycle at stage {name}')
+            visiting.add(name)
+            for dep in graph[name]:
+                visit(dep)
+            visiting.discard(name)
+            visited.add(name)
+
+        for name in graph:
+            visit(name)
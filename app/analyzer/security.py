@@ -0,0 +1,44 @@
+from app.analyzer.registry import registry
+
+SECURITY_HEADERS = (
+    'Strict-Transport-Security',
+    'Content-Security-Policy',
+    'X-Frame-Options',
+    'X-Content-Type-Options',
+    'X-XSS-Protection'
+)
+
+@registry.stage(
+    'security_metrics',
+    alias='security',
+    order=60,
+    inputs=('basic_metrics', 'ssl_metrics'),
+    cost='local',
+    schema={
+        'ssl_valid': bool,
+        'security_headers_present': dict,
+        'cookies_secure': bool,
+        'https_redirect': bool
+    }
+)
+def analyze_security(analyzer, ctx, inputs=None):
+    """Cabeçalhos de segurança, cookies seguros, HTTPS e validade do TLS"""
+    ctx = analyzer._context(ctx)
+    try:
+        # Reaproveita o handshake TLS já feito pela etapa ssl_metrics
+        ssl_info = (inputs or {}).get('ssl_metrics') or ctx.ssl_info()
+        
+        response = ctx.response
+        headers = response.headers
+        
+        return {
+            'ssl_valid': not isinstance(ssl_info, dict) or 'error' not in ssl_info,
+            'security_headers_present': {
+                header: header.lower() in map(str.lower, headers.keys())
+                for header in SECURITY_HEADERS
+            },
+            'cookies_secure': all(cookie.secure for cookie in response.cookies),
+            'https_redirect': response.url.startswith('https')
+        }
+    except:
+        return {'error': 'Security analysis failed'}
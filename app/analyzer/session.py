@@ -0,0 +1,125 @@
+import threading
+from time import perf_counter
+from http.cookiejar import DefaultCookiePolicy
+import requests
+from urllib3.util.retry import Retry
+from app.analyzer.timing import TimedHTTPAdapter
+from app.telemetry.metrics import HTTP_REQUESTS, HTTP_SECONDS, HTTP_IN_FLIGHT
+from app.telemetry.trace import span
+
+class SessionPool:
+    """Pool de conexões keep-alive compartilhado entre as análises
+
+    Uma única Session com um HTTPAdapter que mantém um pool de conexões por
+    host. O pool vive enquanto o analisador existir, então as buscas
+    seguintes ao mesmo host (robots.txt, sitemap.xml, novas análises)
+    reaproveitam a conexão e não pagam outro handshake TCP/TLS. Com um
+    `resolver`, as conexões novas usam o cache de DNS do analisador.
+    """
+
+    def __init__(self, max_hosts=100, connections_per_host=10, max_retries=2,
+                 backoff_factor=0.3, connect_timeout=5, timeout=30, resolver=None):
+        self.max_hosts = max_hosts
+        self.connections_per_host = connections_per_host
+        self.connect_timeout = connect_timeout
+        self.timeout = timeout
+
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=('GET', 'HEAD'),
+            raise_on_status=False
+        )
+        # Adapter instrumentado: as buscas rastreadas registram cada fase
+        self.adapter = TimedHTTPAdapter(
+            pool_connections=max_hosts,
+            pool_maxsize=connections_per_host,
+            max_retries=retry,
+            resolver=resolver
+        )
+
+        self.session = requests.Session()
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+        # Cookies de uma análise não podem vazar para a próxima
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+
+        self._lock = threading.Lock()
+        self._requests = 0
+
+    @classmethod
+    def from_config(cls, config, resolver=None):
+        return cls(
+            max_hosts=config.HTTP_POOL_MAX_HOSTS,
+            connections_per_host=config.HTTP_POOL_CONNECTIONS_PER_HOST,
+            max_retries=config.HTTP_MAX_RETRIES,
+            backoff_factor=config.HTTP_BACKOFF_FACTOR,
+            connect_timeout=config.HTTP_CONNECT_TIMEOUT,
+            timeout=config.HTTP_TIMEOUT,
+            resolver=resolver
+        )
+
+    def _timeout(self, timeout):
+        """Timeout numérico vira (conexão, leitura)"""
+        timeout = timeout or self.timeout
+        if isinstance(timeout, (int, float)):
+            timeout = (min(self.connect_timeout, timeout), timeout)
+        return timeout
+
+    def _count(self):
+        with self._lock:
+            self._requests += 1
+
+    def get(self, url, timeout=None, **kwargs):
+        return self._send('GET', self.session.get, url, timeout, kwargs)
+
+    def head(self, url, timeout=None, **kwargs):
+        return self._send('HEAD', self.session.head, url, timeout, kwargs)
+
+    def _send(self, method, send, url, timeout, kwargs):
+        """Requisição contada nas métricas e registrada na árvore da análise"""
+        self._count()
+        status = 'error'
+        start = perf_counter()
+        try:
+            with HTTP_IN_FLIGHT.track(), span(method, kind='http', url=url) as current:
+                response = send(url, timeout=self._timeout(timeout), **kwargs)
+                status = str(response.status_code)
+                current.attrs['status_code'] = response.status_code
+                return response
+        finally:
+            # Com stream=True a duração vai até os cabeçalhos, sem o corpo
+            HTTP_SECONDS.observe(perf_counter() - start, method=method)
+            HTTP_REQUESTS.inc(method=method, status=status)
+
+    def stats(self):
+        """Estatísticas de reaproveitamento de conexões por host"""
+        hosts = {}
+        pools = self.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host = f"{pool.scheme}://{pool.host}:{pool.port}"
+            hosts[host] = {
+                'requests': pool.num_requests,
+                'connections': pool.num_connections,
+                'reused': max(pool.num_requests - pool.num_connections, 0)
+            }
+
+        total_requests = sum(h['requests'] for h in hosts.values())
+        total_connections = sum(h['connections'] for h in hosts.values())
+        reused = sum(h['reused'] for h in hosts.values())
+
+        return {
+            'requests': self._requests,
+            'pooled_requests': total_requests,
+            'connections_opened': total_connections,
+            'connections_reused': reused,
+            'reuse_ratio': round(reused / total_requests, 3) if total_requests else 0.0,
+            'hosts': hosts
+        }
+
+    def close(self):
+        self.session.close()
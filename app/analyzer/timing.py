@@ -0,0 +1,190 @@
+import socket
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+# Rastreamento ativo da thread atual; as conexões anotam nele as fases
+_local = threading.local()
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+class RequestTrace:
+    """Fases de cada salto (redirecionamento) de uma busca
+
+    Os tempos são medidos com perf_counter na própria conexão usada pela
+    requisição: DNS, conexão TCP e handshake TLS só aparecem quando uma
+    conexão nova é aberta; numa conexão reaproveitada do pool eles são zero.
+    """
+
+    def __init__(self):
+        self.hops = []
+
+    def start_hop(self, url):
+        hop = {
+            'url': url,
+            'status_code': None,
+            'dns': 0.0,
+            'connect': 0.0,
+            'tls': 0.0,
+            'wait': 0.0,
+            'reused_connection': True
+        }
+        self.hops.append(hop)
+        _local.hop = hop
+        return hop
+
+    def summary(self, ttfb, download, total):
+        """Fases em ms: somadas entre os saltos, mais TTFB/download/total"""
+        hops = [
+            {key: (_ms(value) if isinstance(value, float) else value) for key, value in hop.items()}
+            for hop in self.hops
+        ]
+        timing = {
+            phase: round(sum(hop[phase] for hop in hops), 2)
+            for phase in ('dns', 'connect', 'tls', 'wait')
+        }
+        timing.update({
+            'ttfb': _ms(ttfb),
+            'download': _ms(download),
+            'total': _ms(total),
+            'connection_reused': hops[-1]['reused_connection'] if hops else None,
+            'redirects': hops[:-1],
+            'hops': len(hops)
+        })
+        return timing
+
+@contextmanager
+def trace_requests():
+    """Ativa o rastreamento de fases para as requisições desta thread"""
+    previous = getattr(_local, 'trace', None)
+    trace = RequestTrace()
+    _local.trace = trace
+    try:
+        yield trace
+    finally:
+        _local.trace = previous
+        _local.hop = None
+
+def _current_hop():
+    return getattr(_local, 'hop', None)
+
+def resolve_addresses(host, port, resolver=None):
+    """Endereços do host, pelo resolvedor do analisador (com cache) ou do sistema"""
+    if resolver is not None:
+        return resolver.addresses(host)
+    infos = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+    return list(dict.fromkeys(info[4][0] for info in infos))
+
+class TimedConnectionMixin:
+    """Separa DNS, conexão TCP e TLS na abertura de uma conexão
+
+    Com um `resolver` (definido pelo TimedHTTPAdapter) toda conexão nova
+    resolve o host pelo cache compartilhado, rastreada ou não.
+    """
+
+    resolver = None
+    # Endereços tentados antes de desistir (ex.: o IPv4 e depois o IPv6)
+    max_attempts = 2
+
+    def _new_conn(self):
+        hop = _current_hop()
+        if hop is None and self.resolver is None:
+            return super()._new_conn()
+
+        host = self._dns_host
+        start = perf_counter()
+        try:
+            addresses = resolve_addresses(host, self.port, self.resolver)
+        except socket.gaierror:
+            # Deixa a implementação original gerar o erro de resolução
+            addresses = []
+        resolved = perf_counter()
+
+        sock = self._connect_any(host, addresses[:self.max_attempts])
+        connected = perf_counter()
+        if hop is None:
+            return sock
+
+        hop['dns'] += resolved - start
+        hop['connect'] += connected - resolved
+        hop['reused_connection'] = False
+        self._socket_time = connected - start
+        return sock
+
+    def _connect_any(self, host, addresses):
+        """Conecta no primeiro endereço que aceitar; o TLS continua usando self.host"""
+        if not addresses:
+            return super()._new_conn()
+        for attempt, address in enumerate(addresses, 1):
+            self._dns_host = address
+            try:
+                return super()._new_conn()
+            except (NewConnectionError, ConnectTimeoutError):
+                if attempt == len(addresses):
+                    raise
+            finally:
+                self._dns_host = host
+
+    def connect(self):
+        hop = _current_hop()
+        self._socket_time = 0.0
+        start = perf_counter()
+        super().connect()
+        if hop is not None and isinstance(self, HTTPSConnection):
+            hop['tls'] += perf_counter() - start - self._socket_time
+
+class TimedHTTPConnection(TimedConnectionMixin, HTTPConnection):
+    pass
+
+class TimedHTTPSConnection(TimedConnectionMixin, HTTPSConnection):
+    pass
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+def _with_resolver(pool_cls, resolver):
+    """Variante do pool cujas conexões resolvem pelo resolver dado"""
+    if resolver is None:
+        return pool_cls
+    connection_cls = type(pool_cls.ConnectionCls.__name__, (pool_cls.ConnectionCls,), {'resolver': resolver})
+    return type(pool_cls.__name__, (pool_cls,), {'ConnectionCls': connection_cls})
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter que registra as fases de cada requisição rastreada"""
+
+    def __init__(self, *args, resolver=None, **kwargs):
+        self.resolver = resolver
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        resolver = getattr(self, 'resolver', None)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _with_resolver(TimedHTTPConnectionPool, resolver),
+            'https': _with_resolver(TimedHTTPSConnectionPool, resolver)
+        }
+
+    def send(self, request, **kwargs):
+        trace = getattr(_local, 'trace', None)
+        if trace is None:
+            return super().send(request, **kwargs)
+
+        hop = trace.start_hop(request.url)
+        start = perf_counter()
+        try:
+            response = super().send(request, **kwargs)
+        finally:
+            elapsed = perf_counter() - start
+            # Espera do servidor: do envio até os cabeçalhos, sem a abertura
+            hop['wait'] = max(elapsed - hop['dns'] - hop['connect'] - hop['tls'], 0.0)
+            _local.hop = None
+        hop['status_code'] = response.status_code
+        return response
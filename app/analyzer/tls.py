@@ -0,0 +1,182 @@
+import select
+import socket
+import ssl
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from time import perf_counter
+
+def _ms(seconds):
+    return round(seconds * 1000, 2)
+
+def _name(rdns):
+    """Nome distinto do getpeercert() como dicionário"""
+    return {key: value for rdn in rdns for key, value in rdn}
+
+def _utc(value):
+    return datetime.fromtimestamp(ssl.cert_time_to_seconds(value), timezone.utc)
+
+def parse_certificate(cert, chain_length=None):
+    """Metadados do certificado devolvido por getpeercert()"""
+    subject = _name(cert.get('subject', ()))
+    issuer = _name(cert.get('issuer', ()))
+    return {
+        'subject': subject.get('commonName'),
+        'issuer': issuer.get('organizationName') or issuer.get('commonName'),
+        'not_before': _utc(cert['notBefore']).isoformat(),
+        'not_after': _utc(cert['notAfter']).isoformat(),
+        'san': [value for kind, value in cert.get('subjectAltName', ()) if kind in ('DNS', 'IP Address')],
+        'serial_number': cert.get('serialNumber'),
+        'chain_length': chain_length
+    }
+
+def _chain_length(ssock):
+    # Público a partir do Python 3.13; antes só no objeto interno
+    getter = getattr(ssock, 'get_verified_chain', None) or \
+        getattr(getattr(ssock, '_sslobj', None), 'get_verified_chain', None)
+    if getter is None:
+        return None
+    try:
+        return len(getter())
+    except Exception:
+        return None
+
+class TLSInspector:
+    """Handshakes TLS com um SSLContext único, retomada de sessão e cache de certificados
+
+    A sessão do último handshake com cada host é guardada e oferecida no
+    seguinte, de modo que auditorias repetidas fazem um handshake
+    abreviado; os tempos do último handshake completo e do último
+    retomado ficam no relatório para comparação. Os metadados do
+    certificado ficam em cache por `cert_ttl` segundos (nunca além da
+    validade do certificado).
+    """
+
+    def __init__(self, resolver=None, timeout=10, cert_ttl=3600, max_hosts=10000,
+                 ticket_wait=0.1, context=None):
+        self.context = context or ssl.create_default_context()
+        self.resolver = resolver
+        self.timeout = timeout
+        self.cert_ttl = cert_ttl
+        self.max_hosts = max_hosts
+        self.ticket_wait = ticket_wait
+        self._hosts = OrderedDict()  # (host, porta) -> estado
+        self._lock = threading.Lock()
+        self._counters = {'handshakes': 0, 'resumed': 0, 'certificate_hits': 0}
+
+    @classmethod
+    def from_config(cls, config, resolver=None):
+        return cls(
+            resolver=resolver,
+            timeout=config.HTTP_TIMEOUT,
+            cert_ttl=config.TLS_CERT_CACHE_TTL,
+            max_hosts=config.TLS_CACHE_MAX_HOSTS,
+            ticket_wait=config.TLS_TICKET_WAIT
+        )
+
+    def inspect(self, host, port=443):
+        """Faz um handshake (retomado, se possível) e descreve a conexão"""
+        key = (host.lower(), port)
+        state = self._state(key)
+        address = self.resolver.addresses(host)[0] if self.resolver else host
+
+        start = perf_counter()
+        with socket.create_connection((address, port), timeout=self.timeout) as sock:
+            connected = perf_counter()
+            with self.context.wrap_socket(sock, server_hostname=host, session=state.get('session')) as ssock:
+                done = perf_counter()
+                resumed = ssock.session_reused
+                version = ssock.version()
+                cipher = ssock.cipher()
+                certificate, cached = self._certificate(state, ssock)
+                if version == 'TLSv1.3':
+                    # Numa retomada a sessão oferecida continua valendo; não há o que esperar
+                    self._await_ticket(ssock, 0 if resumed else self.ticket_wait)
+                session = ssock.session
+
+        handshake_time = _ms(done - connected)
+        with self._lock:
+            state['session'] = session
+            state['resumed_time' if resumed else 'full_time'] = handshake_time
+            self._counters['handshakes'] += 1
+            self._counters['resumed'] += resumed
+            full_time, resumed_time = state.get('full_time'), state.get('resumed_time')
+
+        return {
+            # Conexão TCP + handshake, como nas versões anteriores
+            'ssl_time': int((done - start) * 1000),
+            'handshake_time': handshake_time,
+            'resumed': resumed,
+            'full_handshake_time': full_time,
+            'resumed_handshake_time': resumed_time,
+            'version': version,
+            'cipher': cipher,
+            'certificate': self._describe(certificate, cached)
+        }
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters, hosts=len(self._hosts))
+
+    def _state(self, key):
+        with self._lock:
+            state = self._hosts.get(key)
+            if state is None:
+                state = self._hosts[key] = {}
+            self._hosts.move_to_end(key)
+            while len(self._hosts) > self.max_hosts:
+                self._hosts.popitem(last=False)
+            return state
+
+    def _certificate(self, state, ssock):
+        """Metadados do cache ou, se expirados, lidos da cadeia recebida"""
+        now = time.time()
+        with self._lock:
+            if state.get('certificate') and state['certificate_expires'] > now:
+                self._counters['certificate_hits'] += 1
+                return state['certificate'], True
+
+        cert = ssock.getpeercert()
+        if not cert:
+            return None, False
+        certificate = parse_certificate(cert, _chain_length(ssock))
+        expires = ssl.cert_time_to_seconds(cert['notAfter'])
+        with self._lock:
+            state['certificate'] = certificate
+            state['certificate_expires'] = min(now + self.cert_ttl, expires)
+        return certificate, False
+
+    def _await_ticket(self, ssock, wait):
+        """No TLS 1.3 o ticket de sessão chega depois do handshake
+
+        Processa sem bloquear o que já chegou e espera no máximo `wait`
+        segundos, parando assim que a sessão tiver um ticket.
+        """
+        deadline = perf_counter() + wait
+        try:
+            ssock.setblocking(False)
+            while True:
+                try:
+                    if ssock.recv(1) == b'':
+                        return
+                except ssl.SSLWantReadError:
+                    pass
+                if ssock.session is not None and ssock.session.has_ticket:
+                    return
+                remaining = deadline - perf_counter()
+                if remaining <= 0 or not select.select([ssock], [], [], remaining)[0]:
+                    return
+        except (OSError, ssl.SSLError):
+            pass
+
+    @staticmethod
+    def _describe(certificate, cached):
+        if certificate is None:
+            return None
+        not_after = datetime.fromisoformat(certificate['not_after'])
+        return {
+            **certificate,
+            'days_to_expiry': (not_after - datetime.now(timezone.utc)).days,
+            'cached': cached
+        }
@@ -0,0 +1,250 @@
+"""Auditorias em lote fora do servidor web (cron, CI)
+
+Os alvos vêm de linhas em texto (uma URL por linha, `#` comenta) ou JSONL
+({"url": ..., "mode": ..., "stages": ...}). Cada resultado sai como uma
+linha JSONL assim que fica pronto e, opcionalmente, é gravado no banco em
+blocos. Os alvos concluídos sem erro vão para um arquivo de progresso
+depois de gravados, então uma execução interrompida pode ser retomada sem
+refazer o que já terminou (um alvo pode sair duas vezes no JSONL se a
+interrupção vier entre a saída e o registro no arquivo).
+"""
+import json
+import os
+import sys
+import time
+from collections import Counter, namedtuple
+from datetime import datetime
+from urllib.parse import urlparse
+from app.analyzer.batch import check_limits, run_batch, host_of
+from app.analyzer.cache import is_fresh
+from app.analyzer.registry import parse_stages
+
+class Target(namedtuple('Target', 'url mode stages')):
+    """Uma auditoria pedida: URL, modo e subconjunto de etapas (ou None)"""
+
+    __slots__ = ()
+
+    @property
+    def key(self):
+        return json.dumps([self.url, self.mode, self.stages])
+
+def parse_target(line, fmt='auto', modes=('audit', 'probe')):
+    """Alvo de uma linha de entrada; None para linhas vazias e comentários"""
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+
+    if fmt == 'jsonl' or (fmt == 'auto' and line.startswith('{')):
+        try:
+            item = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f'Invalid JSON: {e}')
+        if not isinstance(item, dict) or not isinstance(item.get('url'), str):
+            raise ValueError('JSON lines must be objects with a "url"')
+        url, mode, stages = item['url'].strip(), item.get('mode', 'audit'), item.get('stages')
+    else:
+        url, mode, stages = line, 'audit', None
+
+    if urlparse(url).scheme not in ('http', 'https') or not urlparse(url).netloc:
+        raise ValueError(f'Not an http(s) URL: {url}')
+    if mode not in modes:
+        raise ValueError(f"mode must be one of: {', '.join(modes)}")
+    stages = parse_stages(stages)
+    return Target(url, mode, tuple(stages) if stages else None)
+
+class Checkpoint:
+    """Arquivo de progresso: uma linha por alvo concluído, só acrescentada"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return set()
+        with open(self.path) as f:
+            # Uma última linha cortada no meio de uma interrupção é ignorada
+            return {line.rstrip('\n') for line in f if line.endswith('\n')}
+
+    def add(self, targets):
+        if not self.path or not targets:
+            return
+        with open(self.path, 'a') as f:
+            f.writelines(target.key + '\n' for target in targets)
+            f.flush()
+            os.fsync(f.fileno())
+
+class Progress:
+    """Andamento em stderr: concluídas, vazão, falhas e tempo restante
+
+    Num terminal a mesma linha é reescrita; fora dele (logs do cron/CI)
+    sai uma linha a cada `interval` segundos.
+    """
+
+    def __init__(self, total, stream=None, interval=5.0):
+        self.total = total
+        self.stream = stream
+        self.interval = interval
+        self.tty = bool(stream) and stream.isatty()
+        self.done = self.failed = 0
+        self._started = self._last = time.monotonic()
+
+    def update(self, failed=False):
+        self.done += 1
+        self.failed += 1 if failed else 0
+        now = time.monotonic()
+        if self.stream and (now - self._last >= (0.2 if self.tty else self.interval) or self.done == self.total):
+            self._last = now
+            self.stream.write(('\r' if self.tty else '') + self.line() + ('' if self.tty else '\n'))
+            self.stream.flush()
+
+    def line(self):
+        elapsed = time.monotonic() - self._started
+        rate = self.done / elapsed if elapsed else 0
+        remaining = (self.total - self.done) / rate if rate else 0
+        percent = self.done * 100 // self.total if self.total else 100
+        return (f'[{self.done}/{self.total}] {percent}%  {rate:.2f}/s  '
+                f'falhas: {self.failed}  restante: {int(remaining) // 60}m{int(remaining) % 60:02d}s')
+
+    def finish(self):
+        if self.stream and self.tty:
+            self.stream.write('\n')
+            self.stream.flush()
+
+class AuditRunner:
+    """Executa auditorias em lote com concorrência e limite de taxa por host
+
+    No máximo `concurrency` análises ao mesmo tempo, `per_host` por host e,
+    com `rate`, `rate` análises novas por segundo em cada host. Com um
+    banco, os resultados são gravados em transações de `save_size`.
+    """
+
+    def __init__(self, analyzer, db=None, concurrency=8, per_host=2, rate=None, save_size=50,
+                 checkpoint=None):
+        check_limits(concurrency, per_host, rate)
+        if save_size < 1:
+            raise ValueError('save_size must be at least 1')
+        self.analyzer = analyzer
+        self.db = db
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.rate = rate
+        self.save_size = save_size
+        self.checkpoint = Checkpoint(checkpoint)
+
+    @classmethod
+    def from_config(cls, analyzer, db, config, **overrides):
+        options = {
+            'concurrency': config.BATCH_CONCURRENCY,
+            'per_host': config.BATCH_PER_HOST,
+            'rate': config.BATCH_HOST_RATE,
+            'save_size': config.BATCH_SAVE_SIZE
+        }
+        options.update({name: value for name, value in overrides.items() if value is not None})
+        return cls(analyzer, db, **options)
+
+    def read(self, lines, fmt='auto'):
+        """Alvos únicos das linhas de entrada e os erros das linhas inválidas"""
+        targets, invalid, seen = [], [], set()
+        for number, line in enumerate(lines, 1):
+            try:
+                target = parse_target(line, fmt, self.analyzer.MODES)
+                if target and target.stages:
+                    self.analyzer.registry.resolve(target.stages)
+            except ValueError as e:
+                invalid.append(f'line {number}: {e}')
+                continue
+            if target and target.key not in seen:
+                seen.add(target.key)
+                targets.append(target)
+        return targets, invalid
+
+    def run(self, targets, output=None, progress=None):
+        """Audita os alvos ainda não concluídos e devolve o resumo
+
+        `output` recebe uma linha JSONL por resultado e `progress` (um
+        stream, normalmente stderr) o andamento.
+        """
+        finished = self.checkpoint.load()
+        pending = [target for target in targets if target.key not in finished]
+        summary = {
+            'total': len(targets),
+            'skipped': len(targets) - len(pending),
+            'ok': 0,
+            'failed': 0,
+            'saved': 0,
+            'interrupted': False,
+            'health': Counter(),
+            'errors': Counter()
+        }
+        tracker = Progress(len(pending), progress)
+        buffer = []
+        start = time.monotonic()
+
+        try:
+            for target, metrics in run_batch(self._analyze, pending, self.concurrency, self.per_host,
+                                             self.rate, host=lambda target: host_of(target.url)):
+                if isinstance(metrics, Exception):
+                    metrics = {'error': str(metrics), 'timestamp': datetime.utcnow().isoformat()}
+                metrics.setdefault('url', target.url)
+                failed = 'error' in metrics
+                if failed:
+                    summary['failed'] += 1
+                    summary['errors'][metrics['error']] += 1
+                else:
+                    summary['ok'] += 1
+                    summary['health'][(metrics.get('health_check') or {}).get('overall', 'unknown')] += 1
+
+                if output is not None:
+                    output.write(json.dumps(metrics) + '\n')
+                    output.flush()
+                buffer.append((target, metrics))
+                if len(buffer) >= self.save_size:
+                    summary['saved'] += self._flush(buffer)
+                tracker.update(failed)
+        except KeyboardInterrupt:
+            summary['interrupted'] = True
+        finally:
+            summary['saved'] += self._flush(buffer)
+            tracker.finish()
+
+        summary['duration'] = round(time.monotonic() - start, 3)
+        audited = summary['ok'] + summary['failed']
+        summary['per_second'] = round(audited / summary['duration'], 2) if summary['duration'] else None
+        summary['health'] = dict(summary['health'])
+        summary['errors'] = dict(summary['errors'].most_common())
+        return summary
+
+    def _analyze(self, target):
+        return self.analyzer.analyze_url(target.url, mode=target.mode, stages=target.stages)
+
+    def _flush(self, buffer):
+        """Grava o bloco no banco e só depois marca os alvos como concluídos"""
+        if not buffer:
+            return 0
+        rows = [(target.url, metrics) for target, metrics in buffer if is_fresh(metrics)]
+        if self.db is not None and rows:
+            self.db.save_many(rows)
+        self.checkpoint.add([target for target, metrics in buffer if 'error' not in metrics])
+        buffer.clear()
+        return len(rows) if self.db is not None else 0
+
+def print_summary(summary, stream=sys.stderr):
+    """Resumo legível da execução"""
+    print(f"auditadas: {summary['ok'] + summary['failed']} (ok: {summary['ok']}, falhas: {summary['failed']}), "
+          f"puladas: {summary['skipped']} já concluídas, inválidas: {len(summary.get('invalid', []))}",
+          file=stream)
+    print(f"tempo: {summary['duration']:.1f} s, {summary['per_second'] or 0:.2f} análises/s"
+          + (f", gravadas no banco: {summary['saved']}" if summary['saved'] else ''), file=stream)
+    if summary['health']:
+        print('saúde: ' + ', '.join(f'{status} {count}' for status, count in sorted(summary['health'].items())),
+              file=stream)
+    if summary['errors']:
+        print('falhas mais comuns:', file=stream)
+        for message, count in list(summary['errors'].items())[:5]:
+            print(f'  {count:>5}  {message}', file=stream)
+    if summary.get('invalid'):
+        print('linhas inválidas:', file=stream)
+        for error in summary['invalid'][:5]:
+            print(f'  {error}', file=stream)
+    if summary['interrupted']:
+        print('interrompido: rode de novo com o mesmo --resume para continuar', file=stream)
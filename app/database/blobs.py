@@ -0,0 +1,209 @@
+"""Formato compacto do metrics_data
+
+Cada linha guarda o JSON da análise compactado com zlib (deflate puro com
+um dicionário pré-definido das chaves do relatório, que é o que faz
+diferença em documentos de poucos KB). O primeiro byte indica o codec;
+linhas em texto são do formato antigo e continuam legíveis.
+
+Sub-documentos que quase não mudam entre execuções (cabeçalhos, SEO,
+segurança, certificado) vão para a tabela metric_docs, endereçada pelo
+hash do conteúdo, e a linha guarda só {"$doc": hash}. Campos voláteis
+desses documentos (Date, Set-Cookie...) ficam na linha, em "$with".
+"""
+import hashlib
+import json
+import re
+import threading
+import zlib
+from collections import OrderedDict
+
+CODECS = ('zlib', 'json')
+
+# Primeiro byte das linhas binárias
+ZLIB_V1 = 1
+
+REF = '$doc'
+EXTRA = '$with'
+
+# Cabeçalhos que mudam a cada resposta e não entram no documento compartilhado
+VOLATILE_HEADERS = frozenset({
+    'date', 'age', 'expires', 'last-modified', 'etag', 'set-cookie', 'content-length',
+    'cf-ray', 'x-request-id', 'x-amz-request-id', 'x-amz-cf-id', 'x-amz-cf-pop',
+    'x-served-by', 'x-cache', 'x-cache-hits', 'x-timer', 'x-runtime', 'server-timing',
+    'x-trace-id', 'traceparent', 'report-to', 'nel'
+})
+
+# Caminho do sub-documento -> função que diz se uma chave é volátil
+SHARED_DOCUMENTS = (
+    (('basic_metrics', 'headers'), lambda key: key.lower() in VOLATILE_HEADERS),
+    (('ssl_metrics', 'certificate'), lambda key: key in ('days_to_expiry', 'cached')),
+    (('resource_metrics', 'by_type'), None),
+    (('security_metrics',), None),
+    (('seo_metrics',), None)
+)
+
+# Dicionário do deflate: trechos frequentes, os mais comuns no final
+ZDICT = ''.join((
+    '"recommendations":[{"type":"seo","priority":"medium","message":"',
+    '"type":"security","priority":"critical","message":"',
+    '"type":"performance","priority":"high","message":"',
+    '"availability_metrics":{"us":{"available":true,"response_time":',
+    '"eu":{"available":true,"response_time":',
+    '"asia":{"available":true,"response_time":',
+    '"resource_metrics":{"images":',
+    ',"scripts":',
+    ',"styles":',
+    ',"html_size":',
+    ',"total_size":',
+    ',"fonts":0,"media":0,"requests":',
+    ',"largest":[{"url":"https://',
+    '","type":"image","bytes":',
+    '","type":"script","bytes":',
+    '],"uncompressed":[],"failed":0,"skipped":0}',
+    '"ssl_metrics":{"ssl_time":',
+    ',"handshake_time":',
+    ',"resumed":true,"full_handshake_time":',
+    ',"resumed_handshake_time":',
+    ',"version":"TLSv1.3","cipher":["TLS_AES_256_GCM_SHA384","TLSv1.3",256]',
+    ',"certificate":{"$doc":"',
+    '"dns_metrics":{"ip":"',
+    '","ipv4":["',
+    '"],"ipv6":[],"dns_time":',
+    ',"lookup_time":0,"cached":true,"ttl":',
+    '"basic_metrics":{"response_time":',
+    ',"status_code":200,"content_size":',
+    ',"truncated":false,"headers":{"$doc":"',
+    '","$with":{"Date":"',
+    ' GMT","Content-Length":"',
+    '"},"encoding":"utf-8","redirect_count":0,"is_redirect":false,"final_url":"https://',
+    '","timing":{"dns":0.0,"connect":',
+    ',"tls":',
+    ',"wait":',
+    ',"ttfb":',
+    ',"download":',
+    ',"total":',
+    ',"connection_reused":false,"redirects":[],"hops":1}}',
+    '"security_metrics":{"$doc":"',
+    '"seo_metrics":{"$doc":"',
+    '"health_check":{"performance":"good","security":"good","seo":"good","overall":"good"}',
+    '{"timestamp":"',
+    '","url":"https://',
+    '","mode":"audit",'
+)).encode()
+
+_REF_PATTERN = re.compile(r'"\$doc":\s*"([0-9a-f]{32})"')
+
+def _compact(value):
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False)
+
+def _deflate(text):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -15, zdict=ZDICT)
+    return bytes([ZLIB_V1]) + compressor.compress(text.encode()) + compressor.flush()
+
+def unpack(data):
+    """Texto JSON de uma linha ou documento, em qualquer codec"""
+    if data is None or isinstance(data, str):
+        return data
+    if data[0] == ZLIB_V1:
+        decompressor = zlib.decompressobj(-15, zdict=ZDICT)
+        return (decompressor.decompress(data[1:]) + decompressor.flush()).decode()
+    raise ValueError(f'Unknown metrics_data codec: {data[0]}')
+
+def references(data):
+    """Hashes dos documentos compartilhados citados por uma linha"""
+    text = unpack(data)
+    return set(_REF_PATTERN.findall(text)) if text else set()
+
+class BlobCodec:
+    """Codifica e decodifica o metrics_data, com cache dos documentos compartilhados
+
+    Documentos são imutáveis (o hash é o conteúdo), então o cache nunca
+    fica desatualizado.
+    """
+
+    def __init__(self, codec='zlib', cache_size=4096):
+        if codec not in CODECS:
+            raise ValueError(f"codec must be one of: {', '.join(CODECS)}")
+        self.codec = codec
+        self.cache_size = cache_size
+        self._docs = OrderedDict()  # hash -> texto JSON
+        self._packed = OrderedDict()  # hash -> documento codificado
+        self._lock = threading.Lock()
+
+    def pack(self, text):
+        return _deflate(text) if self.codec == 'zlib' else text
+
+    def encode(self, metrics):
+        """Devolve (linha codificada, [(hash, documento codificado)])"""
+        row = dict(metrics)
+        docs = []
+        for path, volatile in SHARED_DOCUMENTS:
+            parent = row
+            for key in path[:-1]:
+                value = parent.get(key)
+                if not isinstance(value, dict):
+                    parent = None
+                    break
+                # Copia só o caminho alterado; o resto é compartilhado
+                parent[key] = parent = dict(value)
+            if parent is None or not isinstance(parent.get(path[-1]), dict) or not parent[path[-1]]:
+                continue
+
+            document = parent[path[-1]]
+            shared = {k: v for k, v in document.items() if not (volatile and volatile(k))}
+            extra = {k: v for k, v in document.items() if volatile and volatile(k)}
+            text = json.dumps(shared, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+            digest = hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+            docs.append((bytes.fromhex(digest), self._packed_doc(digest, text)))
+            parent[path[-1]] = {REF: digest, EXTRA: extra} if extra else {REF: digest}
+
+        return self.pack(_compact(row)), docs
+
+    def decode(self, data, fetch):
+        """Análise original de uma linha; `fetch(hashes)` busca {hash: documento} no banco"""
+        text = unpack(data)
+        if not text:
+            return None
+        metrics = json.loads(text)
+        for path, _ in SHARED_DOCUMENTS:
+            parent = metrics
+            for key in path[:-1]:
+                parent = parent.get(key) if isinstance(parent, dict) else None
+            if not isinstance(parent, dict):
+                continue
+            value = parent.get(path[-1])
+            if isinstance(value, dict) and REF in value:
+                parent[path[-1]] = {**self._document(value[REF], fetch), **value.get(EXTRA, {})}
+        return metrics
+
+    def _packed_doc(self, digest, text):
+        with self._lock:
+            packed = self._packed.get(digest)
+            if packed is not None:
+                self._packed.move_to_end(digest)
+                return packed
+        packed = self.pack(text)
+        with self._lock:
+            self._remember(self._packed, digest, packed)
+        return packed
+
+    def _document(self, digest, fetch):
+        with self._lock:
+            text = self._docs.get(digest)
+            if text is not None:
+                self._docs.move_to_end(digest)
+        if text is None:
+            found = fetch([bytes.fromhex(digest)])
+            data = found.get(bytes.fromhex(digest))
+            if data is None:
+                return {'error': 'Missing shared document'}
+            text = unpack(data)
+            with self._lock:
+                self._remember(self._docs, digest, text)
+        return json.loads(text)
+
+    def _remember(self, cache, key, value):
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > self.cache_size:
+            cache.popitem(last=False)
@@ -0,0 +1,263 @@
+import itertools
+import os
+import queue
+import sqlite3
+import threading
+import weakref
+from concurrent.futures import Future
+from app.telemetry.metrics import DB_COMMIT_SECONDS, DB_COMMIT_WRITES
+
+_memory_ids = itertools.count()
+
+# Gerenciadores e writers vivos; depois de um fork o filho não pode usar as
+# conexões nem a thread do pai (workers de servidores com pre-fork)
+_forked = weakref.WeakSet()
+
+def _after_fork():
+    for owner in list(_forked):
+        owner._after_fork()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork)
+
+# Conexões herdadas do pai: mantidas vivas para que nenhum close() (nem o
+# do coletor de lixo) faça checkpoint ou apague o WAL que o pai ainda usa
+_inherited = []
+
+class _ThreadConnection:
+    """Conexão de uma thread, fechada quando a thread termina
+
+    Só o threading.local da thread guarda uma referência forte; quando a
+    thread acaba ele é descartado e a conexão fecha junto.
+    """
+
+    __slots__ = ('conn', '__weakref__')
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def close(self):
+        conn, self.conn = self.conn, None
+        if conn is not None:
+            conn.close()
+
+    def __del__(self):
+        self.close()
+
+class ConnectionManager:
+    """Uma conexão SQLite por thread, reaproveitada entre as requisições
+
+    As conexões são abertas em modo WAL com pragmas ajustados, para que as
+    leituras não bloqueiem a escrita. ':memory:' vira um banco em memória
+    compartilhado, visível por todas as conexões do gerenciador.
+    """
+
+    def __init__(self, db_path, busy_timeout=5000, synchronous='NORMAL',
+                 cache_size=-20000, mmap_size=256 * 1024 * 1024, auto_vacuum='INCREMENTAL'):
+        self.db_path = db_path
+        self.busy_timeout = busy_timeout
+        self.synchronous = synchronous
+        self.cache_size = cache_size
+        self.mmap_size = mmap_size
+        self.auto_vacuum = auto_vacuum
+
+        self._memory_uri = None
+        if db_path == ':memory:':
+            self._memory_uri = f'file:performanceguard-{next(_memory_ids)}?mode=memory&cache=shared'
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # Referências fracas: as conexões das threads que já terminaram saem sozinhas
+        self._connections = weakref.WeakSet()
+        self._closed = False
+        # Mantém o banco em memória vivo enquanto o gerenciador existir
+        self._keepalive = self._connect() if self._memory_uri else None
+        _forked.add(self)
+
+    def _connect(self):
+        if self._memory_uri:
+            conn = sqlite3.connect(self._memory_uri, uri=True, check_same_thread=False)
+        else:
+            conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout / 1000,
+                                   check_same_thread=False)
+            # Vale para bancos novos; um banco existente só muda no próximo VACUUM
+            conn.execute(f'PRAGMA auto_vacuum = {self.auto_vacuum}')
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute(f'PRAGMA synchronous = {self.synchronous}')
+            conn.execute(f'PRAGMA mmap_size = {int(self.mmap_size)}')
+        conn.execute(f'PRAGMA busy_timeout = {int(self.busy_timeout)}')
+        conn.execute(f'PRAGMA cache_size = {int(self.cache_size)}')
+        return conn
+
+    def connection(self):
+        """Conexão da thread atual, aberta no primeiro uso e fechada quando a thread termina"""
+        holder = getattr(self._local, 'conn', None)
+        if holder is None:
+            if self._closed:
+                raise sqlite3.ProgrammingError('Database is closed')
+            holder = _ThreadConnection(self._connect())
+            self._local.conn = holder
+            with self._lock:
+                self._connections.add(holder)
+        return holder.conn
+
+    def open_connections(self):
+        """Conexões ainda abertas (uma por thread viva que usou o banco)"""
+        with self._lock:
+            return len(self._connections)
+
+    def release(self):
+        """Fecha as conexões abertas até aqui; as threads abrem outras no próximo uso
+
+        Usado pelo processo mestre antes do fork, para que os workers não
+        herdem conexão nenhuma.
+        """
+        with self._lock:
+            connections, self._connections = list(self._connections), weakref.WeakSet()
+            self._local = threading.local()
+        for holder in connections:
+            holder.close()
+
+    def close(self):
+        self._closed = True
+        self.release()
+        if self._keepalive is not None:
+            self._keepalive.close()
+
+    def _after_fork(self):
+        # As conexões herdadas são do processo pai: ficam abandonadas, sem close()
+        for holder in list(self._connections):
+            if holder.conn is not None:
+                _inherited.append(holder.conn)
+                holder.conn = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = weakref.WeakSet()
+
+class WriteQueue:
+    """Fila de escrita com um único writer que agrupa commits
+
+    Cada escrita é uma função que recebe um cursor. O writer junta tudo o que
+    estiver na fila (até `batch_size` itens) em uma única transação, de modo
+    que escritas concorrentes pagam um só commit. Se a transação do grupo
+    falhar, cada item é refeito isoladamente para que um erro não derrube
+    os demais.
+    """
+
+    _STOP = object()
+
+    def __init__(self, manager, batch_size=500, max_delay=0.0):
+        self.manager = manager
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._counters = {'writes': 0, 'commits': 0, 'failures': 0}
+        _forked.add(self)
+
+    def submit(self, write):
+        """Enfileira uma escrita e devolve um Future com o seu resultado"""
+        self._start()
+        future = Future()
+        self._queue.put((write, future))
+        return future
+
+    def execute(self, write):
+        """Executa uma escrita pelo writer e espera o commit"""
+        return self.submit(write).result()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters, pending=self._queue.qsize())
+
+    def close(self):
+        with self._lock:
+            thread = self._thread
+        if thread is not None:
+            self._queue.put(self._STOP)
+            thread.join()
+
+    def _after_fork(self):
+        # A thread do writer não existe no filho; o próximo submit abre outra
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='database-writer', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is self._STOP:
+                break
+
+            batch = [item]
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=self.max_delay) if self.max_delay else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self._commit(batch)
+            if stop:
+                break
+
+        with self._lock:
+            self._thread = None
+
+    def _commit(self, batch):
+        conn = self.manager.connection()
+        DB_COMMIT_WRITES.observe(len(batch))
+        try:
+            with DB_COMMIT_SECONDS.time():
+                results = self._transaction(conn, [write for write, _ in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                self._record(failures=1)
+                batch[0][1].set_exception(e)
+            else:
+                for write, future in batch:
+                    self._retry(conn, write, future)
+            return
+
+        self._record(writes=len(batch), commits=1)
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def _retry(self, conn, write, future):
+        """Refaz uma escrita sozinha, propagando o erro só para ela"""
+        try:
+            result = self._transaction(conn, [write])[0]
+        except Exception as e:
+            self._record(failures=1)
+            future.set_exception(e)
+            return
+        self._record(writes=1, commits=1)
+        future.set_result(result)
+
+    def _record(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                self._counters[name] += value
+
+    def _transaction(self, conn, writes):
+        cursor = conn.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+        try:
+            results = [write(cursor) for write in writes]
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return results
@@ -1,66 +1,439 @@
-import sqlite3
+import base64
+from collections import Counter
 from datetime import datetime
 import json
+from app.database.blobs import BlobCodec, REF, references, unpack
+from app.database.connection import ConnectionManager, WriteQueue
+from app.database.migrations import migrate
+from app.database.rollup import update_rollups, query_rollups, is_error
+from app.telemetry.metrics import DB_SECONDS
+from app.telemetry.trace import measured
+
+# Colunas no formato de linha original, mantido para quem consome get_metrics
+METRIC_COLUMNS = 'id, url, timestamp, response_time, status_code, metrics_data'
+
+# Campos que o histórico pode projetar, com a coluna de origem
+HISTORY_FIELDS = (
+    'timestamp',
+    'response_time',
+    'status_code',
+    'dns_time',
+    'tls_time',
+    'content_size',
+    'health_status',
+    'metrics_data'
+)
+
+def encode_cursor(timestamp, row_id):
+    return base64.urlsafe_b64encode(f'{timestamp}|{row_id}'.encode()).decode()
+
+def decode_cursor(cursor):
+    try:
+        timestamp, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return timestamp, int(row_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+def _section(metrics, name):
+    value = metrics.get(name)
+    return value if isinstance(value, dict) else {}
+
+def _store_docs(cursor, docs, refs):
+    """Grava os documentos novos e soma as referências; devolve quantos eram novos"""
+    cursor.executemany('INSERT OR IGNORE INTO metric_docs (hash, data) VALUES (?, ?)', docs.items())
+    added = max(cursor.rowcount, 0)
+    cursor.executemany('UPDATE metric_docs SET refs = refs + ? WHERE hash = ?',
+                       ((count, digest) for digest, count in refs.items()))
+    return added
+
+def _release_docs(cursor, rows):
+    """Desconta as referências das linhas (metrics_data) que vão ser apagadas"""
+    refs = Counter()
+    for data in rows:
+        refs.update(bytes.fromhex(digest) for digest in references(data))
+    cursor.executemany('UPDATE metric_docs SET refs = refs - ? WHERE hash = ?',
+                       ((count, digest) for digest, count in refs.items()))
 
 class Database:
-    def __init__(self, db_path):
+    def __init__(self, db_path, busy_timeout=5000, write_batch_size=500, blob_codec='zlib',
+                 rollup_retention=None, **pragmas):
         self.db_path = db_path
+        # Dias mantidos de cada resolução dos agregados (ver retention.py)
+        self.rollup_retention = rollup_retention
+        # Formato do metrics_data: compactado e com sub-documentos deduplicados
+        self.blobs = BlobCodec(blob_codec)
+        # Conexões persistentes por thread e um único writer com group commit
+        self.connections = ConnectionManager(db_path, busy_timeout=busy_timeout, **pragmas)
+        self.writer = WriteQueue(self.connections, batch_size=write_batch_size)
         self.init_db()
     
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            config.DATABASE_PATH,
+            busy_timeout=config.DATABASE_BUSY_TIMEOUT,
+            write_batch_size=config.DATABASE_WRITE_BATCH_SIZE,
+            blob_codec=config.DATABASE_BLOB_CODEC,
+            rollup_retention=config.RETENTION_ROLLUP_DAYS,
+            synchronous=config.DATABASE_SYNCHRONOUS,
+            cache_size=config.DATABASE_CACHE_SIZE,
+            mmap_size=config.DATABASE_MMAP_SIZE
+        )
+    
     def init_db(self):
-        """Inicializa o banco de dados"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            # Tabela de métricas
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS metrics (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    url TEXT NOT NULL,
-                    timestamp TEXT NOT NULL,
-                    response_time INTEGER,
-                    status_code INTEGER,
-                    metrics_data TEXT
-                )
-            ''')
-            
-            conn.commit()
+        """Inicializa o banco de dados e aplica as migrações pendentes"""
+        self.schema_version = migrate(self.connections.connection())
+    
+    def close(self):
+        """Espera as escritas pendentes e fecha as conexões"""
+        self.writer.close()
+        self.connections.close()
     
     def save_metrics(self, url, metrics):
         """Salva métricas no banco de dados"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO metrics (url, timestamp, response_time, status_code, metrics_data)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (
+        self.save_many([(url, metrics)])
+    
+    @measured('save_many', DB_SECONDS, kind='db', operation='save_many')
+    def save_many(self, items):
+        """Salva vários pares (url, métricas) em uma única transação"""
+        timestamp = datetime.utcnow().isoformat()
+        docs = {}
+        refs = Counter()
+        encoded = []
+        for _, metrics in items:
+            data, shared = self.blobs.encode(metrics)
+            encoded.append(data)
+            docs.update(shared)
+            refs.update({digest for digest, _ in shared})
+        rows = [
+            (
                 url,
-                datetime.utcnow().isoformat(),
-                metrics.get('basic_metrics', {}).get('response_time'),
-                metrics.get('basic_metrics', {}).get('status_code'),
-                json.dumps(metrics)
-            ))
-            
-            conn.commit()
+                timestamp,
+                _section(metrics, 'basic_metrics').get('response_time'),
+                _section(metrics, 'basic_metrics').get('status_code'),
+                data,
+                url,
+                # Campos mais consultados extraídos para colunas numéricas
+                _section(metrics, 'dns_metrics').get('dns_time'),
+                _section(metrics, 'ssl_metrics').get('ssl_time'),
+                _section(metrics, 'basic_metrics').get('content_size'),
+                _section(metrics, 'health_check').get('overall')
+            )
+            for (url, metrics), data in zip(items, encoded)
+        ]
+        if not rows:
+            return
+        
+        samples = [
+            (
+                row[0],
+                row[1],
+                {'response_time': row[2], 'dns_time': row[6], 'tls_time': row[7]},
+                is_error(row[3])
+            )
+            for row in rows
+        ]
+        
+        def write(cursor):
+            # Documentos já conhecidos não são gravados de novo, só ganham referências
+            _store_docs(cursor, docs, refs)
+            cursor.executemany(
+                'INSERT OR IGNORE INTO urls (url) VALUES (?)',
+                {(row[0],) for row in rows}
+            )
+            cursor.executemany('''
+                INSERT INTO metrics (
+                    url, timestamp, response_time, status_code, metrics_data,
+                    url_id, dns_time, tls_time, content_size, health_status
+                )
+                VALUES (?, ?, ?, ?, ?, (SELECT id FROM urls WHERE url = ?), ?, ?, ?, ?)
+            ''', rows)
+            # Agregados atualizados na mesma transação das linhas brutas
+            update_rollups(cursor, samples)
+        
+        # O writer agrupa gravações concorrentes em um único commit
+        self.writer.execute(write)
     
+    @measured('get_metrics', DB_SECONDS, kind='db', operation='get_metrics')
     def get_metrics(self, url=None, limit=100):
         """Recupera métricas do banco de dados"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            
-            if url:
-                cursor.execute('''
-                    SELECT * FROM metrics 
-                    WHERE url = ? 
-                    ORDER BY timestamp DESC 
-                    LIMIT ?
-                ''', (url, limit))
+        cursor = self.connections.connection().cursor()
+        if url:
+            # Usa o índice (url_id, timestamp): sem varredura nem ordenação
+            cursor.execute(f'''
+                SELECT {METRIC_COLUMNS} FROM metrics 
+                WHERE url_id = (SELECT id FROM urls WHERE url = ?) 
+                ORDER BY timestamp DESC, id DESC 
+                LIMIT ?
+            ''', (url, limit))
+        else:
+            cursor.execute(f'''
+                SELECT {METRIC_COLUMNS} FROM metrics 
+                ORDER BY timestamp DESC, id DESC 
+                LIMIT ?
+            ''', (limit,))
+        
+        # metrics_data volta como o texto JSON de sempre, qualquer que seja o formato gravado
+        return [row[:5] + (self._metrics_text(row[5]),) for row in cursor.fetchall()]
+    
+    def decode_metrics(self, data):
+        """Análise gravada em metrics_data, como dicionário"""
+        return self.blobs.decode(data, self._fetch_docs)
+    
+    def _metrics_text(self, data):
+        if data is None or (isinstance(data, str) and REF not in data):
+            return data
+        return json.dumps(self.decode_metrics(data))
+    
+    def _fetch_docs(self, hashes):
+        hashes = list(hashes)
+        rows = self.connections.connection().execute(
+            f"SELECT hash, data FROM metric_docs WHERE hash IN ({', '.join('?' * len(hashes))})",
+            hashes
+        )
+        return dict(rows)
+    
+    def iter_history(self, url, fields=None, since=None, until=None, cursor=None, limit=100):
+        """Histórico de uma URL do mais recente para o mais antigo
+        
+        Paginação por cursor (keyset sobre timestamp/id), projeção só das
+        colunas pedidas e filtro por intervalo de tempo. As linhas são
+        devolvidas uma a uma, sem carregar a página inteira em memória;
+        cada linha traz o cursor que continua a listagem a partir dela.
+        """
+        fields = list(fields or ('timestamp', 'response_time', 'status_code'))
+        unknown = [field for field in fields if field not in HISTORY_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        for value in (since, until):
+            if value:
+                datetime.fromisoformat(value)
+        
+        conditions = ['url_id = (SELECT id FROM urls WHERE url = ?)']
+        params = [url]
+        if since:
+            conditions.append('timestamp >= ?')
+            params.append(since)
+        if until:
+            conditions.append('timestamp < ?')
+            params.append(until)
+        if cursor:
+            timestamp, row_id = decode_cursor(cursor)
+            conditions.append('(timestamp < ? OR (timestamp = ? AND id < ?))')
+            params.extend([timestamp, timestamp, row_id])
+        
+        columns = ['id', 'timestamp'] + [field for field in fields if field != 'timestamp']
+        rows = self.connections.connection().execute(f'''
+            SELECT {', '.join(columns)} FROM metrics
+            WHERE {' AND '.join(conditions)}
+            ORDER BY timestamp DESC, id DESC
+            LIMIT ?
+        ''', params + [limit])
+        
+        for row in rows:
+            item = dict(zip(columns, row))
+            row_id = item.pop('id')
+            if 'timestamp' not in fields:
+                timestamp = item.pop('timestamp')
             else:
-                cursor.execute('''
-                    SELECT * FROM metrics 
-                    ORDER BY timestamp DESC 
-                    LIMIT ?
-                ''', (limit,))
+                timestamp = item['timestamp']
+            if 'metrics_data' in item:
+                item['metrics_data'] = self.decode_metrics(item['metrics_data'])
+            yield item, encode_cursor(timestamp, row_id)
+    
+    @measured('get_rollups', DB_SECONDS, kind='db', operation='get_rollups')
+    def get_rollups(self, url, since, until=None, max_points=500):
+        """Série agregada (contagem, erros, min/max/média/p50/p95/p99)
+        
+        A resolução (minuto, hora ou dia) é escolhida pela janela pedida,
+        para que o número de pontos não passe de max_points; resoluções já
+        expiradas pela retenção no início da janela ficam de fora.
+        """
+        return query_rollups(self.connections.connection(), url, since, until, max_points,
+                             self.rollup_retention)
+
+    
+    def add_target(self, url, interval=60, mode='audit'):
+        """Cadastra um alvo do monitoramento (ou atualiza o seu intervalo)"""
+        self.add_targets([(url, interval, mode)])
+    
+    @measured('add_targets', DB_SECONDS, kind='db', operation='add_targets')
+    def add_targets(self, items):
+        """Cadastra vários alvos (url, intervalo em segundos[, modo]) de uma vez"""
+        created_at = datetime.utcnow().isoformat()
+        rows = [(item[0], item[2] if len(item) > 2 else 'audit', int(item[1]), created_at) for item in items]
+        if any(interval <= 0 for _, _, interval, _ in rows):
+            raise ValueError('Interval must be positive')
+        
+        def write(cursor):
+            cursor.executemany('''
+                INSERT INTO targets (url, mode, interval, enabled, created_at) VALUES (?, ?, ?, 1, ?)
+                ON CONFLICT (url, mode) DO UPDATE SET interval = excluded.interval, enabled = 1
+            ''', rows)
+        
+        self.writer.execute(write)
+    
+    @measured('remove_target', DB_SECONDS, kind='db', operation='remove_target')
+    def remove_target(self, url, mode=None):
+        """Remove um alvo (todos os modos, se mode for None); False se não existia"""
+        def write(cursor):
+            if mode is None:
+                cursor.execute('DELETE FROM targets WHERE url = ?', (url,))
+            else:
+                cursor.execute('DELETE FROM targets WHERE url = ? AND mode = ?', (url, mode))
+            return cursor.rowcount > 0
+        
+        return self.writer.execute(write)
+    
+    @measured('get_targets', DB_SECONDS, kind='db', operation='get_targets')
+    def get_targets(self, enabled_only=True):
+        """Alvos cadastrados como dicionários {url, mode, interval, enabled}"""
+        query = 'SELECT url, mode, interval, enabled FROM targets'
+        if enabled_only:
+            query += ' WHERE enabled = 1'
+        rows = self.connections.connection().execute(query + ' ORDER BY id')
+        return [
+            {'url': url, 'mode': mode, 'interval': interval, 'enabled': bool(enabled)}
+            for url, mode, interval, enabled in rows
+        ]
+    
+    @measured('save_job', DB_SECONDS, kind='db', operation='save_job')
+    def save_job(self, job, result=None):
+        """Grava o estado de um job (dicionário de Job.to_dict) e, se houver, o resultado"""
+        row = (
+            job['id'], job['url'], job['mode'],
+            json.dumps(job['stages']) if job['stages'] else None,
+            job['status'], job['error'],
+            None if result is None else self.blobs.pack(json.dumps(result)),
+            job['submitted_at'], job['started_at'], job['finished_at']
+        )
+        self.writer.execute(lambda cursor: cursor.execute(
+            'INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', row
+        ))
+    
+    @measured('get_job', DB_SECONDS, kind='db', operation='get_job')
+    def get_job(self, job_id):
+        """Estado do job (como Job.to_dict, mais `result`) ou None"""
+        row = self.connections.connection().execute('''
+            SELECT id, url, mode, stages, status, error, result, submitted_at, started_at, finished_at
+            FROM jobs WHERE id = ?
+        ''', (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(('id', 'url', 'mode', 'stages', 'status', 'error', 'result',
+                        'submitted_at', 'started_at', 'finished_at'), row))
+        job['stages'] = json.loads(job['stages']) if job['stages'] else None
+        job['result'] = json.loads(unpack(job['result'])) if job['result'] is not None else None
+        return job
+    
+    def delete_job(self, job_id):
+        self.writer.execute(lambda cursor: cursor.execute('DELETE FROM jobs WHERE id = ?', (job_id,)))
+    
+    def expire_jobs(self, before):
+        """Apaga os jobs terminados antes de `before`; devolve quantos"""
+        return self.writer.execute(lambda cursor: cursor.execute(
+            'DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?', (before,)
+        ).rowcount)
+    
+    def compact(self, batch_size=1000):
+        """Converte linhas antigas (texto JSON) para o formato atual e remove documentos órfãos
+        
+        As linhas são regravadas em lotes pelo writer, então a aplicação pode
+        continuar gravando; os documentos sem referência também saem em
+        lotes. O espaço liberado só volta ao disco com vacuum().
+        
+        Linhas em texto que já citam documentos (codec 'json') só são
+        regravadas quando o codec atual é outro; nesse caso as referências
+        antigas são descontadas na mesma transação que soma as novas.
+        """
+        stats = {'rows': 0, 'bytes_before': 0, 'bytes_after': 0, 'docs_added': 0, 'docs_removed': 0}
+        conn = self.connections.connection()
+        last_id = 0
+        while True:
+            rows = conn.execute('''
+                SELECT id, metrics_data FROM metrics
+                WHERE id > ? AND typeof(metrics_data) = 'text'
+                ORDER BY id LIMIT ?
+            ''', (last_id, batch_size)).fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            
+            updates, docs = [], {}
+            for row_id, data in rows:
+                if self.blobs.codec == 'json' and references(data):
+                    continue  # já está no formato atual
+                try:
+                    metrics = self.decode_metrics(data)
+                except ValueError:
+                    continue  # JSON inválido fica como está
+                if not isinstance(metrics, dict):
+                    continue
+                encoded, shared = self.blobs.encode(metrics)
+                docs.update(shared)
+                updates.append((row_id, data, encoded, {digest for digest, _ in shared}))
             
-            return cursor.fetchall()
\ No newline at end of file
+            def write(cursor):
+                refs, replaced = Counter(), []
+                for row_id, data, encoded, digests in updates:
+                    # Só se a linha não mudou (nem foi apagada) desde a leitura
+                    cursor.execute('UPDATE metrics SET metrics_data = ? WHERE id = ? AND metrics_data = ?',
+                                   (encoded, row_id, data))
+                    if cursor.rowcount:
+                        refs.update(digests)
+                        replaced.append((data, encoded))
+                added = _store_docs(cursor, docs, refs)
+                _release_docs(cursor, [data for data, _ in replaced])
+                return added, replaced
+            
+            added, replaced = self.writer.execute(write)
+            stats['docs_added'] += added
+            stats['rows'] += len(replaced)
+            stats['bytes_before'] += sum(len(data.encode()) for data, _ in replaced)
+            stats['bytes_after'] += sum(len(encoded) for _, encoded in replaced)
+        
+        stats['docs_removed'] = self.collect_docs()
+        return stats
+    
+    def expire_metrics(self, before, limit):
+        """Apaga até `limit` linhas anteriores a `before`, descontando as referências aos documentos"""
+        def write(cursor):
+            rows = cursor.execute('''
+                SELECT id, metrics_data FROM metrics WHERE timestamp < ? ORDER BY timestamp LIMIT ?
+            ''', (before, limit)).fetchall()
+            cursor.executemany('DELETE FROM metrics WHERE id = ?', ((row_id,) for row_id, _ in rows))
+            _release_docs(cursor, (data for _, data in rows))
+            return len(rows)
+        
+        return self.writer.execute(write)
+    
+    def release_docs(self, limit):
+        """Remove até `limit` documentos compartilhados que nenhuma linha referencia"""
+        return self.writer.execute(lambda cursor: cursor.execute('''
+            DELETE FROM metric_docs WHERE hash IN (
+                SELECT hash FROM metric_docs WHERE refs <= 0 LIMIT ?
+            )
+        ''', (limit,)).rowcount)
+    
+    def collect_docs(self, batch_size=1000):
+        """Remove, em lotes curtos, todos os documentos sem referência"""
+        total = 0
+        while True:
+            removed = self.release_docs(batch_size)
+            total += removed
+            if removed < batch_size:
+                return total
+    
+    def vacuum(self):
+        """Reescreve o arquivo do banco, devolvendo ao disco o espaço livre
+        
+        Também converte bancos antigos para auto_vacuum incremental, usado
+        pela retenção para liberar espaço sem reescrever o arquivo.
+        """
+        self.connections.connection().execute('VACUUM')
+    
+    def size(self):
+        """Tamanho do banco em bytes (páginas em uso e livres)"""
+        conn = self.connections.connection()
+        return conn.execute('PRAGMA page_count').fetchone()[0] * conn.execute('PRAGMA page_size').fetchone()[0]
+
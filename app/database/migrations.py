@@ -0,0 +1,203 @@
+"""Migrações versionadas do esquema
+
+A versão atual fica em PRAGMA user_version. Cada migração roda uma única
+vez, em ordem, dentro da mesma transação que atualiza a versão.
+"""
+from app.database.rollup import update_rollups, is_error
+
+def _v1_metrics(cursor):
+    """Tabela original de métricas"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS metrics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            url TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            response_time INTEGER,
+            status_code INTEGER,
+            metrics_data TEXT
+        )
+    ''')
+
+def _v2_indexed_metrics(cursor):
+    """Tabela de URLs, colunas numéricas extraídas e índices de histórico
+
+    A coluna url continua em metrics para manter o formato de linha que
+    get_metrics devolve; as consultas usam url_id.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS urls (
+            id INTEGER PRIMARY KEY,
+            url TEXT NOT NULL UNIQUE
+        )
+    ''')
+
+    for column, kind in (
+        ('url_id', 'INTEGER REFERENCES urls(id)'),
+        ('dns_time', 'INTEGER'),
+        ('tls_time', 'INTEGER'),
+        ('content_size', 'INTEGER'),
+        ('health_status', 'TEXT')
+    ):
+        cursor.execute(f'ALTER TABLE metrics ADD COLUMN {column} {kind}')
+
+    # Preenche as novas colunas a partir dos dados já existentes
+    cursor.execute('INSERT OR IGNORE INTO urls (url) SELECT DISTINCT url FROM metrics')
+    cursor.execute('''
+        UPDATE metrics SET
+            url_id = (SELECT id FROM urls WHERE urls.url = metrics.url),
+            dns_time = json_extract(metrics_data, '$.dns_metrics.dns_time'),
+            tls_time = json_extract(metrics_data, '$.ssl_metrics.ssl_time'),
+            content_size = json_extract(metrics_data, '$.basic_metrics.content_size'),
+            health_status = json_extract(metrics_data, '$.health_check.overall')
+        WHERE json_valid(metrics_data)
+    ''')
+    cursor.execute('''
+        UPDATE metrics SET url_id = (SELECT id FROM urls WHERE urls.url = metrics.url)
+        WHERE url_id IS NULL
+    ''')
+
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_metrics_url_timestamp ON metrics (url_id, timestamp)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_metrics_timestamp ON metrics (timestamp)')
+
+def _v3_rollups(cursor):
+    """Agregados por minuto/hora/dia, preenchidos a partir do histórico"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS rollups (
+            url_id INTEGER NOT NULL REFERENCES urls(id),
+            resolution TEXT NOT NULL,
+            bucket TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            errors INTEGER NOT NULL,
+            stats TEXT NOT NULL,
+            PRIMARY KEY (url_id, resolution, bucket)
+        ) WITHOUT ROWID
+    ''')
+
+    rows = cursor.connection.execute('''
+        SELECT url, timestamp, response_time, dns_time, tls_time, status_code
+        FROM metrics ORDER BY id
+    ''')
+    while True:
+        chunk = rows.fetchmany(10000)
+        if not chunk:
+            break
+        update_rollups(cursor, (
+            (url, timestamp, {'response_time': response, 'dns_time': dns, 'tls_time': tls}, is_error(status))
+            for url, timestamp, response, dns, tls, status in chunk
+        ))
+
+def _v4_targets(cursor):
+    """Alvos do monitoramento contínuo, cada um com o seu intervalo"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS targets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            url TEXT NOT NULL UNIQUE,
+            interval INTEGER NOT NULL,
+            enabled INTEGER NOT NULL DEFAULT 1,
+            created_at TEXT NOT NULL
+        )
+    ''')
+
+def _v5_target_modes(cursor):
+    """Modo de verificação por alvo; a mesma URL pode ter sonda e auditoria"""
+    # A restrição UNIQUE muda, então a tabela é recriada
+    cursor.execute('''
+        CREATE TABLE targets_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            url TEXT NOT NULL,
+            mode TEXT NOT NULL DEFAULT 'audit',
+            interval INTEGER NOT NULL,
+            enabled INTEGER NOT NULL DEFAULT 1,
+            created_at TEXT NOT NULL,
+            UNIQUE (url, mode)
+        )
+    ''')
+    cursor.execute('''
+        INSERT INTO targets_new (id, url, interval, enabled, created_at)
+        SELECT id, url, interval, enabled, created_at FROM targets
+    ''')
+    cursor.execute('DROP TABLE targets')
+    cursor.execute('ALTER TABLE targets_new RENAME TO targets')
+
+def _v6_metric_docs(cursor):
+    """Sub-documentos compartilhados do metrics_data, endereçados pelo hash
+
+    `refs` conta as linhas de metrics que citam o documento: sobe a cada
+    gravação e desce quando a linha é apagada, então os documentos sem
+    referência saem em lotes, sem varrer a tabela de métricas. As linhas
+    existentes continuam em texto; `maintenance.py compact` converte para
+    o formato novo.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS metric_docs (
+            hash BLOB PRIMARY KEY,
+            data BLOB NOT NULL,
+            refs INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_metric_docs_unreferenced ON metric_docs (hash) WHERE refs <= 0')
+
+def _v7_jobs(cursor):
+    """Estado dos jobs da fila, compartilhado entre os processos
+
+    Cada worker do servidor tem a sua fila em memória; o estado e o
+    resultado ficam aqui para que o polling encontre o job em qualquer
+    worker. O resultado é o JSON da análise no codec do metrics_data.
+    """
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            url TEXT NOT NULL,
+            mode TEXT NOT NULL,
+            stages TEXT,
+            status TEXT NOT NULL,
+            error TEXT,
+            result BLOB,
+            submitted_at TEXT NOT NULL,
+            started_at TEXT,
+            finished_at TEXT
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_jobs_finished ON jobs (finished_at) WHERE finished_at IS NOT NULL')
+
+MIGRATIONS = [
+    (1, _v1_metrics),
+    (2, _v2_indexed_metrics),
+    (3, _v3_rollups),
+    (4, _v4_targets),
+    (5, _v5_target_modes),
+    (6, _v6_metric_docs),
+    (7, _v7_jobs)
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def migrate(conn):
+    """Aplica as migrações pendentes e devolve a versão final
+
+    Vários processos podem abrir um banco novo ao mesmo tempo (run.py,
+    monitor.py, audit.py): cada versão roda sob BEGIN IMMEDIATE e a versão
+    é relida dentro da transação, então quem chega depois pula o que outro
+    processo já aplicou.
+    """
+    current = conn.execute('PRAGMA user_version').fetchone()[0]
+
+    for version, migration in MIGRATIONS:
+        if version <= current:
+            continue
+        # BEGIN explícito para que também os comandos DDL sejam atômicos
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            current = conn.execute('PRAGMA user_version').fetchone()[0]
+            if version <= current:
+                conn.rollback()
+                continue
+            migration(conn.cursor())
+            conn.execute(f'PRAGMA user_version = {version}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        current = version
+
+    return current
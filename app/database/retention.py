@@ -0,0 +1,234 @@
+"""Retenção do histórico
+
+Linhas brutas de metrics ficam `raw_days` dias; depois disso só sobram os
+agregados de rollups, que por sua vez expiram por resolução (minutos
+antes de horas, dias para sempre). Tudo é apagado em lotes pequenos pelo
+writer do Database, intercalados com as gravações da aplicação: as linhas
+descontam as referências dos documentos compartilhados, e os documentos
+que ficam sem nenhuma saem também em lotes. Depois vêm um vacuum
+incremental e ANALYZE.
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+from app.database.rollup import RESOLUTIONS
+from app.telemetry.metrics import DB_RETENTION_DELETED
+
+try:
+    import fcntl
+except ImportError:  # fora do POSIX não há eleição: cada processo faz a sua retenção
+    fcntl = None
+
+# Linhas lidas pelo ANALYZE por índice; o suficiente para o planejador
+ANALYSIS_LIMIT = 1000
+
+def cutoffs(raw_days, rollup_days, now=None):
+    """Limite de cada tabela/resolução; None quando nada expira"""
+    now = now or datetime.utcnow()
+    limits = {'metrics': (now - timedelta(days=raw_days)).isoformat() if raw_days else None}
+    for name, _, width in RESOLUTIONS:
+        days = (rollup_days or {}).get(name)
+        limits[name] = (now - timedelta(days=days)).isoformat()[:width] if days else None
+    return limits
+
+class Retention:
+    """Expiração do histórico, sob demanda ou periodicamente em uma thread
+
+    Cada lote é uma escrita curta na fila do writer, então o /analyze e o
+    monitor continuam gravando entre um lote e outro; `pause` dá folga
+    extra entre os lotes. Com dry_run nada é alterado e o relatório traz
+    o que seria apagado.
+
+    Com `lock_path`, vários processos sobre o mesmo banco (os workers do
+    servidor) disputam um flock no arquivo a cada rodada e só quem o tem
+    faz a retenção em segundo plano; se ele sair, outro assume na rodada
+    seguinte.
+    """
+
+    def __init__(self, db, raw_days=30, rollup_days=None, batch_size=1000, pause=0.05,
+                 vacuum_pages=1000, interval=3600, lock_path=None):
+        self.db = db
+        self.raw_days = raw_days
+        self.rollup_days = rollup_days or {}
+        self.batch_size = batch_size
+        self.pause = pause
+        self.vacuum_pages = vacuum_pages
+        self.interval = interval
+        self.lock_path = lock_path
+        self.last_report = None
+        self._lock_file = None
+
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, db, config):
+        return cls(
+            db,
+            raw_days=config.RETENTION_RAW_DAYS,
+            rollup_days=config.RETENTION_ROLLUP_DAYS,
+            batch_size=config.RETENTION_BATCH_SIZE,
+            pause=config.RETENTION_BATCH_PAUSE,
+            vacuum_pages=config.RETENTION_VACUUM_PAGES,
+            interval=config.RETENTION_INTERVAL,
+            lock_path=None if db.db_path == ':memory:' else f'{db.db_path}.retention.lock'
+        )
+
+    def run(self, dry_run=False, now=None):
+        """Aplica a retenção uma vez e devolve o relatório"""
+        start = time.perf_counter()
+        limits = cutoffs(self.raw_days, self.rollup_days, now)
+        conn = self.db.connections.connection()
+        report = {
+            'dry_run': dry_run,
+            'cutoffs': limits,
+            'metrics': 0,
+            'rollups': {},
+            'docs_removed': 0,
+            'pages_freed': 0,
+            'analyzed': False
+        }
+
+        if dry_run:
+            if limits['metrics']:
+                rows, size = conn.execute('''
+                    SELECT COUNT(*), COALESCE(SUM(length(metrics_data)), 0)
+                    FROM metrics WHERE timestamp < ?
+                ''', (limits['metrics'],)).fetchone()
+                report['metrics'] = rows
+                report['metrics_bytes'] = size
+            for name, _, _ in RESOLUTIONS:
+                if limits[name]:
+                    report['rollups'][name] = conn.execute(
+                        'SELECT COUNT(*) FROM rollups WHERE resolution = ? AND bucket < ?',
+                        (name, limits[name])
+                    ).fetchone()[0]
+            report['docs_unreferenced'] = conn.execute(
+                'SELECT COUNT(*) FROM metric_docs WHERE refs <= 0'
+            ).fetchone()[0]
+            report['free_pages'] = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            report['auto_vacuum'] = self._auto_vacuum(conn)
+            report['duration'] = round(time.perf_counter() - start, 3)
+            return report
+
+        if limits['metrics']:
+            # As linhas apagadas liberam as referências aos documentos compartilhados
+            report['metrics'] = self._delete(
+                'metrics', lambda limit: self.db.expire_metrics(limits['metrics'], limit)
+            )
+        for name, _, _ in RESOLUTIONS:
+            if limits[name]:
+                report['rollups'][name] = self._delete('rollups', lambda limit, name=name: self.db.writer.execute(
+                    lambda cursor: cursor.execute('''
+                        DELETE FROM rollups WHERE (url_id, resolution, bucket) IN (
+                            SELECT url_id, resolution, bucket FROM rollups
+                            WHERE resolution = ? AND bucket < ? LIMIT ?
+                        )
+                    ''', (name, limits[name], limit)).rowcount
+                ))
+
+        if report['metrics']:
+            # Só documentos com refs = 0, em lotes curtos como as linhas
+            report['docs_removed'] = self._delete('metric_docs', self.db.release_docs)
+        if report['metrics'] or any(report['rollups'].values()):
+            report['pages_freed'] = self._incremental_vacuum(conn)
+            self.db.writer.execute(self._analyze)
+            report['analyzed'] = True
+
+        report['auto_vacuum'] = self._auto_vacuum(conn)
+        report['duration'] = round(time.perf_counter() - start, 3)
+        self.last_report = report
+        return report
+
+    def start(self):
+        """Executa a retenção a cada `interval` segundos (0 desativa)"""
+        with self._lock:
+            if not self.interval or self._thread is not None:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name='database-retention', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        self._stop.set()
+        if thread is not None:
+            thread.join()
+        with self._lock:
+            lock_file, self._lock_file = self._lock_file, None
+        if lock_file is not None:
+            lock_file.close()  # libera o flock para outro processo
+
+    def is_leader(self):
+        """Se este processo faz a retenção em segundo plano (tenta o flock sem esperar)"""
+        if self.lock_path is None or fcntl is None:
+            return True
+        with self._lock:
+            if self._lock_file is not None:
+                return True
+            lock_file = open(self.lock_path, 'a')
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                return False
+            self._lock_file = lock_file
+            return True
+
+    def _loop(self):
+        # A primeira execução espera um pouco para não competir com a inicialização
+        delay = min(self.interval, 60)
+        while not self._stop.wait(delay):
+            try:
+                if self.is_leader():
+                    self.run()
+            except Exception:
+                pass  # tenta de novo na próxima rodada
+            delay = self.interval
+
+    def _delete(self, table, batch):
+        """Chama batch(batch_size), uma transação curta por vez, até apagar menos que um lote"""
+        total = 0
+        while not self._stop.is_set():
+            deleted = batch(self.batch_size)
+            total += deleted
+            DB_RETENTION_DELETED.inc(deleted, table=table)
+            if deleted < self.batch_size:
+                break
+            if self.pause:
+                time.sleep(self.pause)
+        return total
+
+    def _incremental_vacuum(self, conn):
+        """Devolve as páginas livres ao disco, vacuum_pages por transação"""
+        if self._auto_vacuum(conn) != 'incremental':
+            return 0  # bancos antigos precisam de um VACUUM completo antes
+
+        def write(cursor):
+            pages = min(cursor.execute('PRAGMA freelist_count').fetchone()[0], self.vacuum_pages)
+            # O sqlite3 do Python avança o PRAGMA um passo só, e cada passo libera uma página
+            for _ in range(pages):
+                cursor.execute('PRAGMA incremental_vacuum(1)').fetchall()
+            return pages
+
+        total = 0
+        while not self._stop.is_set():
+            freed = self.db.writer.execute(write)
+            total += freed
+            if freed < self.vacuum_pages:
+                break
+            if self.pause:
+                time.sleep(self.pause)
+        return total
+
+    @staticmethod
+    def _analyze(cursor):
+        cursor.execute(f'PRAGMA analysis_limit = {ANALYSIS_LIMIT}')
+        cursor.execute('ANALYZE')
+
+    @staticmethod
+    def _auto_vacuum(conn):
+        mode = conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+        return {0: 'none', 1: 'full', 2: 'incremental'}.get(mode, str(mode))
@@ -0,0 +1,198 @@
+import json
+import math
+from datetime import datetime, timedelta
+
+# Resoluções da mais fina para a mais grossa: (nome, segundos, prefixo do timestamp ISO)
+RESOLUTIONS = (
+    ('minute', 60, 16),
+    ('hour', 3600, 13),
+    ('day', 86400, 10)
+)
+
+ROLLUP_METRICS = ('response_time', 'dns_time', 'tls_time')
+
+# Precisão relativa dos quantis (1%)
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+LOG_GAMMA = math.log(GAMMA)
+
+def bucket_start(bucket):
+    """Prefixo do bucket de volta para um timestamp ISO completo"""
+    return bucket + '0000-01-01T00:00:00'[len(bucket):]
+
+class Sketch:
+    """Histograma logarítmico mesclável para min/max/média/quantis
+
+    Cada valor cai em um bin de largura relativa fixa, então os quantis têm
+    erro relativo limitado e dois sketches se combinam somando os bins. O
+    estado é um dicionário pequeno, guardado como JSON em cada bucket.
+    """
+
+    def __init__(self, state=None):
+        state = state or {}
+        self.count = state.get('count', 0)
+        self.total = state.get('sum', 0)
+        self.min = state.get('min')
+        self.max = state.get('max')
+        self.zeros = state.get('zeros', 0)
+        self.bins = {int(k): v for k, v in state.get('bins', {}).items()}
+
+    def add(self, value, count=1):
+        self.count += count
+        self.total += value * count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        if value <= 0:
+            self.zeros += count
+            return
+        index = math.ceil(math.log(value) / LOG_GAMMA)
+        self.bins[index] = self.bins.get(index, 0) + count
+
+    def merge(self, other):
+        if not other.count:
+            return self
+        self.count += other.count
+        self.total += other.total
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        self.zeros += other.zeros
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        return self
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if seen > rank:
+            return 0
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen > rank:
+                value = 2 * GAMMA ** index / (GAMMA + 1)
+                return round(min(max(value, self.min), self.max), 2)
+        return self.max
+
+    def summary(self):
+        if not self.count:
+            return None
+        return {
+            'count': self.count,
+            'min': self.min,
+            'max': self.max,
+            'mean': round(self.total / self.count, 2),
+            'p50': self.quantile(0.50),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99)
+        }
+
+    def state(self):
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'min': self.min,
+            'max': self.max,
+            'zeros': self.zeros,
+            'bins': self.bins
+        }
+
+class Bucket:
+    """Agregados de uma URL em um intervalo de tempo"""
+
+    def __init__(self, count=0, errors=0, stats=None):
+        self.count = count
+        self.errors = errors
+        stats = stats or {}
+        self.sketches = {metric: Sketch(stats.get(metric)) for metric in ROLLUP_METRICS}
+
+    def add(self, values, error):
+        self.count += 1
+        self.errors += 1 if error else 0
+        for metric in ROLLUP_METRICS:
+            value = values.get(metric)
+            if isinstance(value, (int, float)):
+                self.sketches[metric].add(value)
+
+    def merge(self, other):
+        self.count += other.count
+        self.errors += other.errors
+        for metric in ROLLUP_METRICS:
+            self.sketches[metric].merge(other.sketches[metric])
+        return self
+
+    def stats_json(self):
+        return json.dumps({metric: sketch.state() for metric, sketch in self.sketches.items()})
+
+def is_error(status_code):
+    """Análises sem status (falha na busca) ou com status HTTP de erro"""
+    return status_code is None or status_code >= 400
+
+def update_rollups(cursor, samples):
+    """Atualiza os agregados incrementalmente, na transação do chamador
+
+    samples: iterável de (url, timestamp ISO, {métrica: valor}, erro)
+    As amostras são agrupadas em memória primeiro, para que cada bucket
+    seja lido e escrito uma única vez por lote.
+    """
+    pending = {}
+    for url, timestamp, values, error in samples:
+        for resolution, _, width in RESOLUTIONS:
+            key = (url, resolution, timestamp[:width])
+            pending.setdefault(key, Bucket()).add(values, error)
+
+    for (url, resolution, bucket), update in pending.items():
+        row = cursor.execute('''
+            SELECT count, errors, stats FROM rollups
+            WHERE url_id = (SELECT id FROM urls WHERE url = ?) AND resolution = ? AND bucket = ?
+        ''', (url, resolution, bucket)).fetchone()
+        if row:
+            update.merge(Bucket(row[0], row[1], json.loads(row[2])))
+
+        cursor.execute('''
+            INSERT OR REPLACE INTO rollups (url_id, resolution, bucket, count, errors, stats)
+            VALUES ((SELECT id FROM urls WHERE url = ?), ?, ?, ?, ?, ?)
+        ''', (url, resolution, bucket, update.count, update.errors, update.stats_json()))
+
+def pick_resolution(since, until, max_points, retention=None):
+    """Resolução mais fina cujo número de pontos cabe em max_points
+
+    Com `retention` ({resolução: dias}) são puladas as resoluções que já
+    expiraram no início da janela.
+    """
+    seconds = (until - since).total_seconds()
+    for name, width, _ in RESOLUTIONS:
+        days = (retention or {}).get(name)
+        if days and since < datetime.utcnow() - timedelta(days=days):
+            continue
+        if seconds / width <= max_points:
+            return name
+    return RESOLUTIONS[-1][0]
+
+def query_rollups(conn, url, since, until, max_points=500, retention=None):
+    """Série agregada de uma URL, na resolução adequada à janela pedida"""
+    since = datetime.fromisoformat(since)
+    until = datetime.fromisoformat(until) if until else datetime.utcnow()
+    resolution = pick_resolution(since, until, max_points, retention)
+    width = {name: prefix for name, _, prefix in RESOLUTIONS}[resolution]
+
+    rows = conn.execute('''
+        SELECT bucket, count, errors, stats FROM rollups
+        WHERE url_id = (SELECT id FROM urls WHERE url = ?)
+          AND resolution = ? AND bucket >= ? AND bucket < ?
+        ORDER BY bucket
+    ''', (url, resolution, since.isoformat()[:width], until.isoformat()))
+
+    points = []
+    for bucket, count, errors, stats in rows:
+        bucket_data = Bucket(count, errors, json.loads(stats))
+        point = {
+            'timestamp': bucket_start(bucket),
+            'count': count,
+            'error_rate': round(errors / count, 4) if count else 0.0
+        }
+        for metric, sketch in bucket_data.sketches.items():
+            point[metric] = sketch.summary()
+        points.append(point)
+
+    return {'resolution': resolution, 'points': points}
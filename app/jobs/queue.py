@@ -0,0 +1,211 @@
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from app.analyzer.cache import is_fresh
+
+class QueueFullError(Exception):
+    pass
+
+class Job:
+    """Análise submetida à fila, com modo, etapas, estado e resultado"""
+
+    def __init__(self, url, mode='audit', stages=None):
+        self.id = uuid.uuid4().hex
+        self.url = url
+        self.mode = mode
+        self.stages = stages
+        self.status = 'queued'
+        self.result = None
+        self.error = None
+        self.submitted_at = datetime.utcnow().isoformat()
+        self.started_at = None
+        self.finished_at = None
+        self._finished = None  # relógio monotônico, usado na limpeza
+
+    @classmethod
+    def from_dict(cls, data):
+        """Job gravado no banco por outro processo (Database.get_job)"""
+        job = cls(data['url'], data['mode'], data['stages'])
+        job.id = data['id']
+        job.status = data['status']
+        job.error = data['error']
+        job.result = data.get('result')
+        job.submitted_at = data['submitted_at']
+        job.started_at = data['started_at']
+        job.finished_at = data['finished_at']
+        return job
+
+    @property
+    def finished(self):
+        return self.status in ('done', 'failed')
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'url': self.url,
+            'mode': self.mode,
+            'stages': self.stages,
+            'status': self.status,
+            'error': self.error,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+
+class JobQueue:
+    """Fila de análises em segundo plano com um pool de workers
+
+    A submissão devolve o ID na hora; os workers executam
+    PerformanceAnalyzer.analyze_url e gravam o resultado pelo Database.
+    Jobs terminados ficam disponíveis por `result_ttl` segundos.
+
+    A fila e as estatísticas são do processo, mas o estado e o resultado de
+    cada job também vão para a tabela jobs: com vários workers no servidor,
+    o polling pode cair num worker diferente do que aceitou o job.
+    """
+
+    def __init__(self, analyzer, db, workers=4, max_queue=1000, result_ttl=3600):
+        self.analyzer = analyzer
+        self.db = db
+        self.workers = workers
+        self.result_ttl = result_ttl
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._busy = 0
+        self._busy_time = 0.0
+        self._started = time.monotonic()
+        self._counters = {'submitted': 0, 'completed': 0, 'failed': 0, 'rejected': 0}
+        self._threads = []
+        self._next_expire = 0.0
+
+    @classmethod
+    def from_config(cls, analyzer, db, config):
+        return cls(
+            analyzer,
+            db,
+            workers=config.JOBS_WORKERS,
+            max_queue=config.JOBS_MAX_QUEUE,
+            result_ttl=config.JOBS_RESULT_TTL
+        )
+
+    def start(self):
+        """Inicia os workers (chamado automaticamente na primeira submissão)"""
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f'analyzer-job-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, url, mode='audit', stages=None):
+        """Enfileira a análise; `mode` e `stages` são os do analyze_url, já validados"""
+        self.start()
+        self._prune()
+
+        job = Job(url, mode, stages)
+        # Gravado antes de entrar na fila, para que nenhum worker o atualize antes
+        self.db.save_job(job.to_dict())
+        with self._lock:
+            self._jobs[job.id] = job
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job.id]
+                self._counters['rejected'] += 1
+            self.db.delete_job(job.id)
+            raise QueueFullError('Job queue is full')
+
+        with self._lock:
+            self._counters['submitted'] += 1
+        return job
+
+    def get(self, job_id):
+        """Job deste processo ou, se não estiver aqui, o gravado por outro worker"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            data = self.db.get_job(job_id)
+            job = Job.from_dict(data) if data else None
+        return job
+
+    def stats(self):
+        """Profundidade da fila e utilização dos workers"""
+        with self._lock:
+            elapsed = time.monotonic() - self._started
+            capacity = elapsed * self.workers
+            return {
+                'queue_depth': self._queue.qsize(),
+                'workers': self.workers,
+                'busy_workers': self._busy,
+                'utilization': round(self._busy / self.workers, 3) if self.workers else 0.0,
+                'average_utilization': round(self._busy_time / capacity, 3) if capacity else 0.0,
+                'jobs_tracked': len(self._jobs),
+                **self._counters
+            }
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            start = time.monotonic()
+            with self._lock:
+                self._busy += 1
+            try:
+                self._run(job)
+            finally:
+                with self._lock:
+                    self._busy -= 1
+                    self._busy_time += time.monotonic() - start
+                self._queue.task_done()
+
+    def _run(self, job):
+        job.status = 'running'
+        job.started_at = datetime.utcnow().isoformat()
+        self._persist(job)
+        try:
+            metrics = self.analyzer.analyze_url(job.url, mode=job.mode, stages=job.stages)
+            # Como no /analyze, análises com erro também são registradas;
+            # resultados vindos do cache já foram gravados
+            if is_fresh(metrics):
+                self.db.save_metrics(job.url, metrics)
+            job.result = metrics
+            job.error = metrics.get('error')
+        except Exception as e:
+            job.error = str(e)
+
+        job.finished_at = datetime.utcnow().isoformat()
+        job._finished = time.monotonic()
+        job.status = 'failed' if job.error else 'done'
+        self._persist(job)
+        with self._lock:
+            self._counters['failed' if job.error else 'completed'] += 1
+
+    def _persist(self, job):
+        # Uma falha do banco não pode derrubar o worker; o job continua visível neste processo
+        try:
+            self.db.save_job(job.to_dict(), job.result)
+        except Exception:
+            pass
+
+    def _prune(self):
+        """Descarta jobs terminados há mais de result_ttl segundos"""
+        now = time.monotonic()
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.finished and now - job._finished > self.result_ttl
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+            expire_shared = now >= self._next_expire
+            if expire_shared:
+                self._next_expire = now + min(self.result_ttl, 60)
+        if expire_shared:
+            # Os jobs dos outros workers também expiram, no máximo uma vez por minuto
+            before = (datetime.utcnow() - timedelta(seconds=self.result_ttl)).isoformat()
+            self.db.expire_jobs(before)
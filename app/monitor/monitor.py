@@ -0,0 +1,134 @@
+import itertools
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from app.monitor.wheel import TimingWheel
+
+class Monitor:
+    """Monitoramento sintético contínuo dos alvos cadastrados no banco
+
+    Cada alvo (URL e modo: auditoria completa ou sonda leve) volta para a roda de tempo a cada `interval` segundos, com um
+    desvio aleatório de até `jitter` (fração do intervalo) para que as
+    verificações não vençam todas no mesmo tick. Um pool de workers executa
+    as análises; quando há `max_pending` verificações em andamento ou na
+    fila, as que vencem são puladas até a próxima rodada em vez de se
+    acumularem.
+    """
+
+    def __init__(self, analyzer, db, workers=64, max_pending=1000, tick=1.0,
+                 jitter=0.1, refresh_interval=30):
+        self.analyzer = analyzer
+        self.db = db
+        self.workers = workers
+        self.max_pending = max_pending
+        self.jitter = jitter
+        self.refresh_interval = refresh_interval
+
+        self.wheel = TimingWheel(tick=tick)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='monitor')
+        self._generations = itertools.count()
+        self._targets = {}  # (url, modo) -> (intervalo, geração)
+        self._running = set()
+        self._lock = threading.Lock()
+        self._counters = {'checks': 0, 'failures': 0, 'skipped': 0, 'overlapping': 0}
+
+    @classmethod
+    def from_config(cls, analyzer, db, config):
+        return cls(
+            analyzer,
+            db,
+            workers=config.MONITOR_WORKERS,
+            max_pending=config.MONITOR_MAX_PENDING,
+            tick=config.MONITOR_TICK,
+            jitter=config.MONITOR_JITTER,
+            refresh_interval=config.MONITOR_REFRESH_INTERVAL
+        )
+
+    def refresh(self):
+        """Sincroniza os alvos com o banco: novos entram na roda, removidos saem"""
+        targets = {
+            (target['url'], target['mode']): target['interval']
+            for target in self.db.get_targets()
+        }
+        with self._lock:
+            current = self._targets
+            self._targets = {}
+            for key, interval in targets.items():
+                if key in current:
+                    self._targets[key] = (interval, current[key][1])
+                    continue
+                generation = next(self._generations)
+                self._targets[key] = (interval, generation)
+                # A primeira verificação cai em qualquer ponto do intervalo
+                self.wheel.schedule((key, generation), random.uniform(0, interval))
+
+    def tick(self):
+        """Avança a roda um tick e despacha as verificações vencidas"""
+        for key, generation in self.wheel.advance():
+            with self._lock:
+                target = self._targets.get(key)
+            # Alvo removido (ou removido e cadastrado de novo) desde o agendamento
+            if target is None or target[1] != generation:
+                continue
+            interval = target[0]
+            self.wheel.schedule((key, generation), interval * random.uniform(1 - self.jitter, 1 + self.jitter))
+            self._dispatch(key)
+
+    def _dispatch(self, key):
+        with self._lock:
+            if key in self._running:
+                # A verificação anterior ainda não terminou
+                self._counters['overlapping'] += 1
+                return
+            if len(self._running) >= self.max_pending:
+                self._counters['skipped'] += 1
+                return
+            self._running.add(key)
+        self._executor.submit(self._check, key)
+
+    def _check(self, key):
+        url, mode = key
+        failed = True
+        try:
+            try:
+                metrics = self.analyzer.analyze_url(url, use_cache=False, mode=mode)
+            except Exception as e:
+                # Falhas também são gravadas, para contar na taxa de erro
+                metrics = {'timestamp': datetime.utcnow().isoformat(), 'url': url, 'mode': mode, 'error': str(e)}
+            self.db.save_metrics(url, metrics)
+            failed = 'error' in metrics
+        finally:
+            with self._lock:
+                self._running.discard(key)
+                self._counters['checks'] += 1
+                self._counters['failures'] += 1 if failed else 0
+
+    def run(self, stop=None):
+        """Laço principal: um tick por vez até `stop` ser sinalizado"""
+        stop = stop or threading.Event()
+        self.refresh()
+        next_tick = last_refresh = time.monotonic()
+
+        while not stop.is_set():
+            # Horário absoluto: um tick demorado não atrasa os seguintes
+            next_tick += self.wheel.tick
+            if stop.wait(max(next_tick - time.monotonic(), 0)):
+                break
+            self.tick()
+            if time.monotonic() - last_refresh >= self.refresh_interval:
+                self.refresh()
+                last_refresh = time.monotonic()
+
+        self._executor.shutdown(wait=True)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'targets': len(self._targets),
+                'scheduled': len(self.wheel),
+                'in_flight': len(self._running),
+                'workers': self.workers,
+                **self._counters
+            }
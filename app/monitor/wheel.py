@@ -0,0 +1,40 @@
+import math
+import threading
+
+class TimingWheel:
+    """Roda de tempo: agenda itens em slots de `tick` segundos
+
+    Cada item guarda o tick absoluto em que vence e fica no slot
+    correspondente; a cada tick só o slot atual é examinado. Agendar e
+    retirar um item custa O(1), independentemente de quantos alvos existem.
+    """
+
+    def __init__(self, tick=1.0, slots=512):
+        self.tick = tick
+        self.current = 0
+        self._slots = [[] for _ in range(slots)]
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return self._size
+
+    def schedule(self, item, delay):
+        """Agenda o item para daqui a `delay` segundos (no mínimo um tick)"""
+        ticks = max(1, math.ceil(delay / self.tick))
+        with self._lock:
+            due = self.current + ticks
+            self._slots[due % len(self._slots)].append((due, item))
+            self._size += 1
+
+    def advance(self):
+        """Avança um tick e devolve os itens que venceram"""
+        with self._lock:
+            self.current += 1
+            slot = self._slots[self.current % len(self._slots)]
+            # Itens de voltas futuras da roda continuam no slot
+            expired = [item for due, item in slot if due <= self.current]
+            slot[:] = [(due, item) for due, item in slot if due > self.current]
+            self._size -= len(expired)
+        return expired
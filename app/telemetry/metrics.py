@@ -0,0 +1,214 @@
+"""Contadores, gauges e histogramas do próprio PerformanceGuard
+
+Exportados no formato de texto do Prometheus em /internal/metrics. Cada
+observação é uma busca binária e uma soma sob um lock, barato o bastante
+para os caminhos quentes (etapas, requisições de saída, banco).
+"""
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from contextlib import contextmanager
+from time import perf_counter
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Segundos, de 1 ms a 1 min
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if len(labels) != len(self.labels):
+            raise ValueError(f"{self.name} expects labels: {', '.join(self.labels) or 'none'}")
+        try:
+            return tuple(str(labels[name]) for name in self.labels)
+        except KeyError:
+            raise ValueError(f"{self.name} expects labels: {', '.join(self.labels)}") from None
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in sorted(values):
+            lines.extend(self._samples(list(zip(self.labels, key)), value))
+        return lines
+
+    def _samples(self, pairs, value):
+        return [f'{self.name}{_labels(pairs)} {_number(value)}']
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    @contextmanager
+    def track(self, **labels):
+        """Soma 1 enquanto o bloco executa (ex.: requisições em andamento)"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        # Contagens por faixa; o acumulado só é montado na exportação
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observa a duração do bloco; preenche `outcome` (ok/error) se existir"""
+        start = perf_counter()
+        outcome = 'ok'
+        try:
+            yield
+        except BaseException:
+            outcome = 'error'
+            raise
+        finally:
+            if 'outcome' in self.labels:
+                labels['outcome'] = outcome
+            self.observe(perf_counter() - start, **labels)
+
+    def snapshot(self, **labels):
+        """Contagem e soma observadas para um conjunto de rótulos"""
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return {'count': state[2], 'sum': state[1]} if state else {'count': 0, 'sum': 0.0}
+
+    def _samples(self, pairs, value):
+        counts, total, count = value
+        lines = []
+        cumulative = 0
+        for bound, bucket in zip(self.buckets + (float('inf'),), counts):
+            cumulative += bucket
+            lines.append(f"{self.name}_bucket{_labels(pairs + [('le', _number(bound))])} {cumulative}")
+        lines.append(f'{self.name}_sum{_labels(pairs)} {_number(total)}')
+        lines.append(f'{self.name}_count{_labels(pairs)} {count}')
+        return lines
+
+class MetricsRegistry:
+    """Instrumentos por nome, exportados juntos no formato do Prometheus"""
+
+    def __init__(self):
+        self._metrics = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif type(metric) is not cls:
+                raise ValueError(f'Metric {name} already registered as a {metric.kind}')
+            return metric
+
+    def counter(self, name, help, labels=()):
+        return self._get_or_create(Counter, name, help, labels)
+
+    def gauge(self, name, help, labels=()):
+        return self._get_or_create(Gauge, name, help, labels)
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, help, labels, buckets)
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+# Registro padrão, exportado em /internal/metrics
+metrics = MetricsRegistry()
+
+ANALYSES = metrics.counter(
+    'pg_analyses_total', 'Analyses run, by mode and outcome', ('mode', 'outcome'))
+ANALYSIS_SECONDS = metrics.histogram(
+    'pg_analysis_duration_seconds', 'Duration of analyze_url', ('mode',))
+ANALYSES_IN_FLIGHT = metrics.gauge(
+    'pg_analyses_in_flight', 'Analyses currently running')
+ANALYSIS_REQUESTS = metrics.histogram(
+    'pg_analysis_outbound_requests', 'Outbound HTTP requests made by one analysis',
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500))
+ANOMALIES = metrics.counter(
+    'pg_anomalies_total', 'Spikes and regressions against the per-URL baseline', ('mode', 'kind'))
+STAGE_SECONDS = metrics.histogram(
+    'pg_stage_duration_seconds', 'Duration of each analyzer stage', ('stage', 'outcome'))
+
+HTTP_REQUESTS = metrics.counter(
+    'pg_outbound_requests_total', 'Outbound HTTP requests, by method and status', ('method', 'status'))
+HTTP_SECONDS = metrics.histogram(
+    'pg_outbound_request_duration_seconds', 'Time until the response headers of outbound requests', ('method',))
+HTTP_IN_FLIGHT = metrics.gauge(
+    'pg_outbound_requests_in_flight', 'Outbound HTTP requests in progress')
+
+DB_SECONDS = metrics.histogram(
+    'pg_db_operation_duration_seconds', 'Duration of Database operations', ('operation', 'outcome'))
+DB_COMMIT_SECONDS = metrics.histogram(
+    'pg_db_commit_duration_seconds', 'Duration of each group commit of the write queue')
+DB_COMMIT_WRITES = metrics.histogram(
+    'pg_db_commit_writes', 'Writes grouped in each commit', buckets=(1, 2, 5, 10, 50, 100, 500))
+DB_RETENTION_DELETED = metrics.counter(
+    'pg_db_retention_deleted_total', 'Rows removed by the retention task, by table', ('table',))
+
+API_REQUESTS = metrics.counter(
+    'pg_api_requests_total', 'API requests, by endpoint, method and status', ('endpoint', 'method', 'status'))
+API_SECONDS = metrics.histogram(
+    'pg_api_request_duration_seconds', 'Duration of API requests', ('endpoint',))
+API_IN_FLIGHT = metrics.gauge(
+    'pg_api_requests_in_flight', 'API requests being served')
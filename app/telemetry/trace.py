@@ -0,0 +1,78 @@
+"""Árvore de tempos de uma análise: etapas, requisições de saída e banco
+
+O span atual fica numa ContextVar; o escalonador de etapas e o run_batch
+copiam o contexto para as threads de trabalho, então uma requisição feita
+dentro de uma etapa aparece como filha dela.
+"""
+import contextvars
+from contextlib import contextmanager
+from time import perf_counter
+
+_current = contextvars.ContextVar('performanceguard_span', default=None)
+
+class Span:
+    def __init__(self, name, kind='span', **attrs):
+        self.name = name
+        self.kind = kind
+        self.attrs = attrs
+        self.children = []
+        self.error = None
+        self.start = perf_counter()
+        self.end = None
+
+    @property
+    def duration_ms(self):
+        end = self.end if self.end is not None else perf_counter()
+        return round((end - self.start) * 1000, 2)
+
+    def count(self, kind):
+        """Descendentes de um tipo (ex.: 'http' = requisições de saída)"""
+        return sum((child.kind == kind) + child.count(kind) for child in list(self.children))
+
+    def to_dict(self, origin=None):
+        origin = self.start if origin is None else origin
+        node = {
+            'name': self.name,
+            'kind': self.kind,
+            'start_ms': round((self.start - origin) * 1000, 2),
+            'duration_ms': self.duration_ms,
+            **self.attrs
+        }
+        if self.end is None:
+            # Etapa que estourou o tempo e ainda roda em segundo plano
+            node['running'] = True
+        if self.error is not None:
+            node['error'] = self.error
+        if self.children:
+            node['children'] = [child.to_dict(origin) for child in list(self.children)]
+        return node
+
+@contextmanager
+def span(name, kind='span', **attrs):
+    """Abre um span filho do atual (ou uma raiz, se não houver)"""
+    parent = _current.get()
+    current = Span(name, kind, **attrs)
+    if parent is not None:
+        parent.children.append(current)
+    token = _current.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current.error = str(e) or e.__class__.__name__
+        raise
+    finally:
+        current.end = perf_counter()
+        _current.reset(token)
+
+@contextmanager
+def measured(name, histogram, kind='span', **labels):
+    """Span na árvore e observação no histograma, juntos"""
+    with span(name, kind) as current, histogram.time(**labels):
+        yield current
+
+def current_span():
+    return _current.get()
+
+def submit(executor, func, *args):
+    """executor.submit que leva o span atual para a thread de trabalho"""
+    return executor.submit(contextvars.copy_context().run, func, *args)
@@ -148,11 +148,13 @@ function analyzeUrl() {
     document.getElementById('metricsCards').innerHTML = '';
     document.getElementById('responseTimeChart').innerHTML = '';
     document.getElementById('resourcesChart').innerHTML = '';
+    document.getElementById('historyChart').innerHTML = '';
     document.getElementById('detailedMetrics').innerHTML = '';
     document.getElementById('healthStatus').innerHTML = '';
     document.getElementById('recommendations').innerHTML = '';
 
-    fetch('/analyze', {
+    // A análise roda em segundo plano; o job é acompanhado por polling
+    fetch('/jobs', {
         method: 'POST',
         headers: {
             'Content-Type': 'application/json',
@@ -160,123 +162,217 @@ function analyzeUrl() {
         body: JSON.stringify({url: url})
     })
     .then(response => response.json())
-    .then(data => {
-        // Esconder loading e mostrar resultados
+    .then(job => {
+        if (job.error) throw new Error(job.error);
+        return waitForJob(job.id);
+    })
+    .catch(error => {
+        // Job perdido (expirado, worker reiniciado): analisa direto, sem fila
+        if (error instanceof JobNotFoundError) return analyzeNow(url);
+        throw error;
+    })
+    .then(data => renderResults(data, url))
+    .catch(error => {
         document.getElementById('loading').style.display = 'none';
-        document.getElementById('results').style.display = 'block';
-
-        // Métricas básicas em cards
-        const basicMetrics = data.basic_metrics;
-        document.getElementById('metricsCards').innerHTML = `
-            <div class="metric-card">
-                <h3>Tempo de Resposta</h3>
-                <div class="metric-value ${getStatusClass(basicMetrics.response_time, 'response_time')}">
-                    ${basicMetrics.response_time}ms
-                </div>
+        alert('Erro ao analisar o site: ' + error);
+    });
+}
+
+class JobNotFoundError extends Error {}
+
+function analyzeNow(url) {
+    return fetch('/analyze', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({url: url})
+    })
+    .then(response => response.json());
+}
+
+function waitForJob(jobId, interval = 1000) {
+    return new Promise((resolve, reject) => {
+        const poll = () => {
+            fetch(`/jobs/${jobId}`)
+                .then(response => {
+                    if (response.status === 404) throw new JobNotFoundError(`Job ${jobId} not found`);
+                    return response.json();
+                })
+                .then(job => {
+                    if (job.status === 'queued' || job.status === 'running') {
+                        setTimeout(poll, interval);
+                        return;
+                    }
+                    return fetch(`/jobs/${jobId}/result`)
+                        .then(response => {
+                            if (response.status === 404) throw new JobNotFoundError(`Job ${jobId} not found`);
+                            return response.json();
+                        })
+                        .then(resolve);
+                })
+                .catch(reject);
+        };
+        poll();
+    });
+}
+
+function loadHistory(url, days = 90) {
+    // Série agregada: o servidor escolhe minuto, hora ou dia conforme a janela
+    const since = new Date(Date.now() - days * 24 * 60 * 60 * 1000).toISOString().slice(0, 19);
+    const params = new URLSearchParams({url: url, since: since, max_points: 500});
+
+    return fetch(`/history/rollup?${params}`)
+        .then(response => response.json())
+        .then(data => {
+            const points = (data.points || []).filter(point => point.response_time);
+            const x = points.map(point => point.timestamp);
+            const line = (key, color) => ({
+                x: x,
+                y: points.map(point => point.response_time[key]),
+                name: key,
+                type: 'scatter',
+                mode: 'lines+markers',
+                line: {color: color}
+            });
+
+            Plotly.newPlot('historyChart', [line('p50', '#2196F3'), line('p95', '#FFC107')], {
+                title: `Histórico de Tempo de Resposta (${days} dias, por ${data.resolution})`,
+                paper_bgcolor: 'rgba(0,0,0,0)',
+                plot_bgcolor: 'rgba(0,0,0,0)',
+                yaxis: {title: 'Millisegundos'}
+            });
+        });
+}
+
+function renderResults(data, url) {
+    if (data.error) throw new Error(data.error);
+
+    // Esconder loading e mostrar resultados
+    document.getElementById('loading').style.display = 'none';
+    document.getElementById('results').style.display = 'block';
+
+    // Métricas básicas em cards
+    const basicMetrics = data.basic_metrics;
+    document.getElementById('metricsCards').innerHTML = `
+        <div class="metric-card">
+            <h3>Tempo de Resposta</h3>
+            <div class="metric-value ${getStatusClass(basicMetrics.response_time, 'response_time')}">
+                ${basicMetrics.response_time}ms
             </div>
-            <div class="metric-card">
-                <h3>Status</h3>
-                <div class="metric-value ${getStatusClass(basicMetrics.status_code, 'status_code')}">
-                    ${basicMetrics.status_code}
-                </div>
+        </div>
+        <div class="metric-card">
+            <h3>Status</h3>
+            <div class="metric-value ${getStatusClass(basicMetrics.status_code, 'status_code')}">
+                ${basicMetrics.status_code}
             </div>
-            <div class="metric-card">
-                <h3>Tamanho Total</h3>
-                <div class="metric-value">
-                    ${formatBytes(basicMetrics.content_size)}
-                </div>
+        </div>
+        <div class="metric-card">
+            <h3>Tamanho Total</h3>
+            <div class="metric-value">
+                ${formatBytes(basicMetrics.content_size)}
             </div>
-            <div class="metric-card">
-                <h3>Tempo Total</h3>
-                <div class="metric-value">
-                    ${data.total_time}ms
-                </div>
+        </div>
+        <div class="metric-card">
+            <h3>Tempo Total</h3>
+            <div class="metric-value">
+                ${data.total_time}ms
             </div>
-        `;
+        </div>
+    `;
 
-        // Status de Saúde
-        if (data.health_check) {
-            document.getElementById('healthStatus').innerHTML = createHealthIndicator(data.health_check);
-        }
+    // Status de Saúde
+    if (data.health_check) {
+        document.getElementById('healthStatus').innerHTML = createHealthIndicator(data.health_check);
+    }
 
-        // Recomendações
-        if (data.recommendations) {
-            document.getElementById('recommendations').innerHTML = createRecommendations(data.recommendations);
+    // Recomendações
+    if (data.recommendations) {
+        document.getElementById('recommendations').innerHTML = createRecommendations(data.recommendations);
+    }
+
+    // Gráficos
+    // Fases medidas na própria busca da página, quando disponíveis
+    const timing = basicMetrics.timing;
+    const timelineData = timing ? {
+        dns: timing.dns,
+        connect: timing.connect,
+        tls: timing.tls,
+        espera: timing.wait,
+        download: timing.download,
+        total: timing.total
+    } : {
+        dns: data.dns_metrics?.dns_time || 0,
+        ssl: data.ssl_metrics?.ssl_time || 0,
+        response: basicMetrics.response_time,
+        total: data.total_time
+    };
+
+    const timelineTrace = {
+        x: Object.keys(timelineData),
+        y: Object.values(timelineData),
+        type: 'bar',
+        marker: {
+            color: '#2196F3'
         }
+    };
+
+    Plotly.newPlot('responseTimeChart', [timelineTrace], {
+        title: 'Análise de Tempo (ms)',
+        paper_bgcolor: 'rgba(0,0,0,0)',
+        plot_bgcolor: 'rgba(0,0,0,0)',
+        yaxis: {title: 'Millisegundos'}
+    });
 
-        // Gráficos
-        const timelineData = {
-            dns: data.dns_metrics?.dns_time || 0,
-            ssl: data.ssl_metrics?.ssl_time || 0,
-            response: basicMetrics.response_time,
-            total: data.total_time
+    // Gráfico de recursos: bytes transferidos por tipo
+    if (data.resource_metrics && data.resource_metrics.by_type) {
+        const types = {
+            html: {count: 1, bytes: data.resource_metrics.html_size},
+            ...data.resource_metrics.by_type
         };
+        const labels = Object.keys(types).filter(type => types[type].count > 0);
 
-        const timelineTrace = {
-            x: Object.keys(timelineData),
-            y: Object.values(timelineData),
-            type: 'bar',
+        const resourceTrace = {
+            values: labels.map(type => types[type].bytes),
+            labels: labels,
+            text: labels.map(type => formatBytes(types[type].bytes)),
+            textinfo: 'label+text',
+            type: 'pie',
+            hole: 0.4,
             marker: {
-                color: '#2196F3'
+                colors: ['#9E9E9E', '#2196F3', '#4CAF50', '#FFC107', '#9C27B0', '#F44336']
             }
         };
 
-        Plotly.newPlot('responseTimeChart', [timelineTrace], {
-            title: 'Análise de Tempo (ms)',
+        Plotly.newPlot('resourcesChart', [resourceTrace], {
+            title: `Peso da Página (${formatBytes(data.resource_metrics.total_size)})`,
             paper_bgcolor: 'rgba(0,0,0,0)',
-            plot_bgcolor: 'rgba(0,0,0,0)',
-            yaxis: {title: 'Millisegundos'}
+            plot_bgcolor: 'rgba(0,0,0,0)'
         });
+    }
 
-        // Gráfico de recursos
-        if (data.resource_metrics) {
-            const resourceData = {
-                labels: Object.keys(data.resource_metrics),
-                values: Object.values(data.resource_metrics),
-            };
-
-            const resourceTrace = {
-                values: resourceData.values,
-                labels: resourceData.labels,
-                type: 'pie',
-                hole: 0.4,
-                marker: {
-                    colors: ['#2196F3', '#4CAF50', '#FFC107', '#F44336']
-                }
-            };
-
-            Plotly.newPlot('resourcesChart', [resourceTrace], {
-                title: 'Distribuição de Recursos',
-                paper_bgcolor: 'rgba(0,0,0,0)',
-                plot_bgcolor: 'rgba(0,0,0,0)'
-            });
-        }
+    // Métricas detalhadas
+    document.getElementById('detailedMetrics').innerHTML = `
+        <h2>Análise Detalhada</h2>
+        ${createMetricsTable('Performance', {
+            'Métricas Básicas': {
+                'Tempo de Resposta': `${basicMetrics.response_time}ms`,
+                'Tempo Total': `${data.total_time}ms`,
+                'Status Code': basicMetrics.status_code,
+                'Tamanho Total': formatBytes(basicMetrics.content_size),
+                'Redirecionamentos': basicMetrics.redirect_count || 0,
+                'URL Final': basicMetrics.final_url || url
+            },
+            'DNS': data.dns_metrics,
+            'SSL/TLS': data.ssl_metrics,
+            'Recursos': data.resource_metrics,
+            'SEO': data.seo_metrics,
+            'Segurança': data.security_metrics,
+            'Headers': basicMetrics.headers
+        })}
+    `;
 
-        // Métricas detalhadas
-        document.getElementById('detailedMetrics').innerHTML = `
-            <h2>Análise Detalhada</h2>
-            ${createMetricsTable('Performance', {
-                'Métricas Básicas': {
-                    'Tempo de Resposta': `${basicMetrics.response_time}ms`,
-                    'Tempo Total': `${data.total_time}ms`,
-                    'Status Code': basicMetrics.status_code,
-                    'Tamanho Total': formatBytes(basicMetrics.content_size),
-                    'Redirecionamentos': basicMetrics.redirect_count || 0,
-                    'URL Final': basicMetrics.final_url || url
-                },
-                'DNS': data.dns_metrics,
-                'SSL/TLS': data.ssl_metrics,
-                'Recursos': data.resource_metrics,
-                'SEO': data.seo_metrics,
-                'Segurança': data.security_metrics,
-                'Headers': basicMetrics.headers
-            })}
-        `;
-    })
-    .catch(error => {
-        document.getElementById('loading').style.display = 'none';
-        alert('Erro ao analisar o site: ' + error);
-    });
+    loadHistory(url).catch(error => console.error('Erro ao carregar histórico:', error));
 }
 
 // Atualizar o CSS também
@@ -0,0 +1,96 @@
+"""Auditorias em lote pela linha de comando, sem o servidor web
+
+    python audit.py urls.txt
+    python audit.py urls.jsonl --save --resume urls.progress
+    cat urls.txt | python audit.py - --concurrency 16 --per-host 1 --rate 0.5 > results.jsonl
+    python audit.py urls.txt --output results.jsonl --fail-on-error
+"""
+import argparse
+import json
+import os
+import signal
+import sys
+from app.analyzer.performance import PerformanceAnalyzer
+from app.audit.runner import AuditRunner, print_summary
+from app.database.db import Database
+from config import config
+
+def interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+def positive(kind):
+    """Tipo do argparse que só aceita números maiores que zero"""
+    def parse(value):
+        try:
+            number = kind(value)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f'invalid {kind.__name__} value: {value!r}')
+        if number <= 0:
+            raise argparse.ArgumentTypeError(f'must be greater than zero: {value!r}')
+        return number
+    return parse
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('input', help="arquivo com as URLs, ou '-' para stdin")
+    parser.add_argument('--format', choices=('auto', 'text', 'jsonl'), default='auto',
+                        help='uma URL por linha ou objetos {"url", "mode", "stages"} (auto detecta por linha)')
+    parser.add_argument('--concurrency', type=positive(int), default=None, help='análises ao mesmo tempo')
+    parser.add_argument('--per-host', type=positive(int), default=None, help='análises ao mesmo tempo no mesmo host')
+    parser.add_argument('--rate', type=positive(float), default=None, help='análises novas por segundo em cada host')
+    parser.add_argument('--output', default='-', help="arquivo JSONL dos resultados ('-' para stdout)")
+    parser.add_argument('--no-output', action='store_true', help='não escreve os resultados em JSONL')
+    parser.add_argument('--save', action='store_true', help='grava os resultados no banco (DATABASE_PATH)')
+    parser.add_argument('--save-size', type=positive(int), default=None, help='resultados por transação no banco')
+    parser.add_argument('--resume', metavar='ARQUIVO', default=None,
+                        help='arquivo de progresso; alvos concluídos nele são pulados')
+    parser.add_argument('--no-progress', action='store_true', help='sem andamento em stderr')
+    parser.add_argument('--summary', metavar='ARQUIVO', default=None, help='grava o resumo em JSON')
+    parser.add_argument('--fail-on-error', action='store_true', help='sai com código 1 se alguma análise falhar')
+    args = parser.parse_args(argv)
+
+    env = os.environ.get('FLASK_ENV', 'development')
+    settings = config[env]
+    db = Database.from_config(settings) if args.save else None
+    runner = AuditRunner.from_config(
+        PerformanceAnalyzer(settings), db, settings,
+        concurrency=args.concurrency,
+        per_host=args.per_host,
+        rate=args.rate,
+        save_size=args.save_size,
+        checkpoint=args.resume
+    )
+
+    if args.input == '-':
+        targets, invalid = runner.read(sys.stdin, args.format)
+    else:
+        with open(args.input) as f:
+            targets, invalid = runner.read(f, args.format)
+
+    output = None
+    if not args.no_output:
+        output = sys.stdout if args.output == '-' else open(args.output, 'a')
+    signal.signal(signal.SIGTERM, interrupt)
+
+    try:
+        summary = runner.run(targets, output=output, progress=None if args.no_progress else sys.stderr)
+    finally:
+        if output not in (None, sys.stdout):
+            output.close()
+        if db is not None:
+            db.close()
+
+    summary['invalid'] = invalid
+    print_summary(summary)
+    if args.summary:
+        with open(args.summary, 'w') as f:
+            f.write(json.dumps(summary, indent=2) + '\n')
+
+    if summary['interrupted']:
+        return 130
+    if args.fail_on_error and summary['failed']:
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,94 @@
+"""Benchmark de inserções sustentadas com várias threads escrevendo
+
+Compara o acesso original (uma conexão por chamada, journal padrão) com o
+Database atual (conexões persistentes, WAL e group commit). Uso:
+
+    python -m benchmarks.db_writes --threads 8 --inserts 500
+"""
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+from app.database.db import Database
+
+SAMPLE = {
+    'basic_metrics': {'response_time': 200, 'status_code': 200, 'content_size': 10240},
+    'dns_metrics': {'dns_time': 12},
+    'health_check': {'overall': 'good'}
+}
+
+class LegacyDatabase:
+    """Reprodução do save_metrics original, para comparação"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS metrics (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    url TEXT NOT NULL,
+                    timestamp TEXT NOT NULL,
+                    response_time INTEGER,
+                    status_code INTEGER,
+                    metrics_data TEXT
+                )
+            ''')
+
+    def save_metrics(self, url, metrics):
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('''
+                INSERT INTO metrics (url, timestamp, response_time, status_code, metrics_data)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (url, datetime.utcnow().isoformat(), 200, 200, json.dumps(metrics)))
+            conn.commit()
+
+def load(db, threads, inserts):
+    """Devolve (inserções por segundo, erros)"""
+    errors = []
+
+    def worker(n):
+        for i in range(inserts):
+            try:
+                db.save_metrics(f'https://site{n}.example.com/', SAMPLE)
+            except sqlite3.OperationalError as e:
+                errors.append(str(e))
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return round((threads * inserts - len(errors)) / elapsed, 1), len(errors)
+
+def run(threads, inserts):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = LegacyDatabase(os.path.join(tmp, 'legacy.db'))
+        results['legacy'] = load(legacy, threads, inserts)
+
+        current = Database(os.path.join(tmp, 'current.db'))
+        results['current'] = load(current, threads, inserts)
+        results['commits'] = current.writer.stats()['commits']
+        current.close()
+
+    for name in ('legacy', 'current'):
+        rate, errors = results[name]
+        print(f'{name:>8}: {rate:>10.1f} inserções/s  ({errors} erros)')
+    print(f'commits do writer: {results["commits"]} para {threads * inserts} inserções')
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--inserts', type=int, default=500)
+    args = parser.parse_args()
+    run(args.threads, args.inserts)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""Medição, relatório JSON e comparação com uma execução de referência"""
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+def _percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+def measure(func, repeat=20, warmup=2, setup=None):
+    """Executa func `repeat` vezes e devolve as estatísticas de latência (ms)
+
+    `setup()` roda antes de cada execução, fora da medição, e o que ele
+    devolve é passado para func.
+    """
+    def run_once():
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        if setup:
+            func(arg)
+        else:
+            func()
+        return (time.perf_counter() - start) * 1000
+
+    for _ in range(warmup):
+        run_once()
+    return summarize([run_once() for _ in range(repeat)])
+
+def summarize(samples):
+    """Estatísticas de latência (ms) de amostras já medidas"""
+    mean = statistics.fmean(samples)
+    return {
+        'repeat': len(samples),
+        'mean_ms': round(mean, 3),
+        'p50_ms': round(statistics.median(samples), 3),
+        'p95_ms': round(_percentile(samples, 0.95), 3),
+        'min_ms': round(min(samples), 3),
+        'max_ms': round(max(samples), 3),
+        'ops_per_s': round(1000 / mean, 2) if mean else None
+    }
+
+def environment():
+    """Contexto da execução, para que relatórios de commits diferentes sejam comparáveis"""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': datetime.utcnow().isoformat(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform()
+    }
+
+def compare(results, baseline, tolerance=0.10):
+    """Variação do p50 de cada benchmark em relação à referência
+
+    Uma mudança maior que `tolerance` (fração) é marcada como regressão ou
+    melhora; benchmarks ausentes em um dos lados são ignorados.
+    """
+    changes = {}
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous or not previous.get('p50_ms'):
+            continue
+        change = (current['p50_ms'] - previous['p50_ms']) / previous['p50_ms']
+        if change > tolerance:
+            status = 'regression'
+        elif change < -tolerance:
+            status = 'improvement'
+        else:
+            status = 'unchanged'
+        changes[name] = {
+            'baseline_p50_ms': previous['p50_ms'],
+            'p50_ms': current['p50_ms'],
+            'change': round(change, 4),
+            'status': status
+        }
+    return changes
+
+class Report:
+    """Resultados nomeados como 'grupo.benchmark', gravados em JSON"""
+
+    def __init__(self):
+        self.results = {}
+
+    def add(self, name, stats, **info):
+        self.results[name] = {**stats, **info}
+        # Progresso em stderr; o JSON pode ir para stdout
+        print(f"{name:<48} p50 {stats['p50_ms']:>10.3f} ms  p95 {stats['p95_ms']:>10.3f} ms",
+              file=sys.stderr, flush=True)
+
+    def to_dict(self, baseline=None, tolerance=0.10):
+        report = {'environment': environment(), 'results': self.results}
+        if baseline is not None:
+            report['baseline'] = baseline.get('environment')
+            report['comparison'] = compare(self.results, baseline.get('results', {}), tolerance)
+        return report
+
+def load_report(path):
+    with open(path) as f:
+        return json.load(f)
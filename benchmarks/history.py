@@ -0,0 +1,103 @@
+"""Benchmark da consulta de histórico por URL
+
+Compara o esquema original (sem índices) com o esquema atual à medida que o
+número de linhas cresce. Uso:
+
+    python -m benchmarks.history --sizes 10000 100000 1000000
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from app.database.db import Database
+
+LEGACY_SCHEMA = '''
+    CREATE TABLE metrics (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        url TEXT NOT NULL,
+        timestamp TEXT NOT NULL,
+        response_time INTEGER,
+        status_code INTEGER,
+        metrics_data TEXT
+    )
+'''
+
+LEGACY_QUERY = '''
+    SELECT * FROM metrics
+    WHERE url = ?
+    ORDER BY timestamp DESC
+    LIMIT ?
+'''
+
+def generate_rows(count, urls):
+    """Linhas sintéticas espalhadas no tempo entre várias URLs"""
+    start = datetime(2024, 1, 1)
+    payload = json.dumps({'basic_metrics': {'response_time': 200, 'status_code': 200}})
+    for i in range(count):
+        yield (
+            urls[i % len(urls)],
+            (start + timedelta(seconds=i * 30)).isoformat(),
+            random.randint(50, 2000),
+            200,
+            payload
+        )
+
+def populate_legacy(path, count, urls):
+    with sqlite3.connect(path) as conn:
+        conn.execute(LEGACY_SCHEMA)
+        conn.executemany('''
+            INSERT INTO metrics (url, timestamp, response_time, status_code, metrics_data)
+            VALUES (?, ?, ?, ?, ?)
+        ''', generate_rows(count, urls))
+
+def time_queries(func, urls, repeat):
+    samples = []
+    for url in random.sample(urls, min(repeat, len(urls))):
+        start = time.perf_counter()
+        func(url)
+        samples.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(samples), 3)
+
+def run(sizes, url_count=1000, repeat=50):
+    results = []
+    urls = [f'https://site{i}.example.com/' for i in range(url_count)]
+
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            legacy_path = os.path.join(tmp, 'legacy.db')
+            populate_legacy(legacy_path, size, urls)
+
+            def legacy_lookup(url):
+                with sqlite3.connect(legacy_path) as conn:
+                    conn.execute(LEGACY_QUERY, (url, 100)).fetchall()
+
+            legacy_ms = time_queries(legacy_lookup, urls, repeat)
+
+            # O mesmo banco migrado para o esquema atual
+            db = Database(legacy_path)
+            current_ms = time_queries(lambda url: db.get_metrics(url=url), urls, repeat)
+
+        results.append({
+            'rows': size,
+            'legacy_median_ms': legacy_ms,
+            'indexed_median_ms': current_ms
+        })
+        print(f'{size:>10} linhas  original: {legacy_ms:>9.3f} ms  indexado: {current_ms:>7.3f} ms')
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 300_000])
+    parser.add_argument('--urls', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+    run(args.sizes, args.urls, args.repeat)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Benchmark da extração de SEO e recursos em páginas grandes
+
+Compara o caminho original (BeautifulSoup com árvore completa mais
+contagens de substrings) com extract_page, nos backends html.parser e lxml.
+Mede tempo (perf_counter) e pico de memória (tracemalloc). Uso:
+
+    python -m benchmarks.html_parsing --sizes 100 1000 5000
+"""
+import argparse
+import time
+import tracemalloc
+from app.analyzer.extract import extract_page, etree
+
+CHUNK_SIZE = 64 * 1024
+
+def make_page(kib):
+    """Página sintética com aproximadamente `kib` KiB"""
+    block = (
+        '<div class="item"><h2>Produto</h2><p>Descrição longa do produto, com texto '
+        'suficiente para pesar no parser.</p><img src="p.jpg" alt="p"><img src="q.jpg">'
+        '<a href="/produto">ver</a></div>\n'
+    )
+    head = (
+        '<html><head><title>Catálogo</title>'
+        '<meta name="description" content="Página de teste">'
+        '<link href="a.css" rel="stylesheet"><script src="app.js"></script></head><body><h1>Catálogo</h1>\n'
+    )
+    body = block * max(1, kib * 1024 // len(block))
+    return (head + body + '</body></html>').encode('utf-8')
+
+def legacy(body):
+    """Reprodução das análises originais de recursos e SEO"""
+    from bs4 import BeautifulSoup
+
+    html = body.decode('utf-8')
+    soup = BeautifulSoup(html, 'html.parser')
+    description = soup.find('meta', {'name': 'description'})
+    return {
+        'images': html.count('<img'),
+        'scripts': html.count('<script'),
+        'styles': html.count('<link rel="stylesheet"'),
+        'title': soup.title.string if soup.title else None,
+        'meta_description': description['content'] if description else None,
+        'h1_count': len(soup.find_all('h1')),
+        'images_without_alt': len([img for img in soup.find_all('img') if not img.get('alt')])
+    }
+
+def streaming(backend):
+    def parse(body):
+        chunks = (body[i:i + CHUNK_SIZE] for i in range(0, len(body), CHUNK_SIZE))
+        return extract_page(chunks, encoding='utf-8', max_bytes=len(body), backend=backend)
+    return parse
+
+def measure(parse, body):
+    """Devolve (ms, pico de memória em KiB)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    parse(body)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return round(elapsed * 1000, 1), round(peak / 1024)
+
+def run(sizes):
+    candidates = {'bs4 (original)': legacy, 'html.parser': streaming('html.parser')}
+    if etree is not None:
+        candidates['lxml'] = streaming('lxml')
+
+    results = {}
+    for kib in sizes:
+        body = make_page(kib)
+        for name, parse in candidates.items():
+            ms, peak = measure(parse, body)
+            results[(kib, name)] = (ms, peak)
+            print(f'{kib:>6} KiB  {name:>15}: {ms:>9.1f} ms  pico {peak:>9} KiB')
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 5000])
+    args = parser.parse_args()
+    run(args.sizes)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""Servidor local que substitui os sites reais nos benchmarks
+
+Rotas (todas aceitam `?delay=ms`, somado à latência padrão do servidor):
+
+    /page?kb=100               página HTML sintética com o tamanho pedido
+    /drip?kb=64&chunks=16&interval=20
+                               corpo enviado aos poucos, em blocos espaçados
+    /robots.txt, /sitemap.xml  arquivos pequenos
+    qualquer outra             recurso binário de 1 KiB (imagens, scripts...)
+
+Com tls=True o servidor usa um certificado autoassinado gerado pelo
+openssl e exporta SSL_CERT_FILE/REQUESTS_CA_BUNDLE para que o analisador
+confie nele.
+"""
+import os
+import shutil
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+from benchmarks.html_parsing import make_page
+
+ASSET = b'\0' * 1024
+
+def tls_available():
+    return shutil.which('openssl') is not None
+
+def make_certificate(directory):
+    """Certificado autoassinado para 127.0.0.1/localhost; devolve (cert, chave)"""
+    cert = os.path.join(directory, 'cert.pem')
+    key = os.path.join(directory, 'key.pem')
+    subprocess.run([
+        'openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+        '-keyout', key, '-out', cert, '-subj', '/CN=localhost',
+        '-addext', 'subjectAltName=IP:127.0.0.1,DNS:localhost'
+    ], check=True, capture_output=True)
+    return cert, key
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self._respond(send_body=True)
+
+    def do_HEAD(self):
+        self._respond(send_body=False)
+
+    def _respond(self, send_body):
+        parts = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+        delay = self.server.latency + float(query.get('delay', 0)) / 1000
+        if delay:
+            time.sleep(delay)
+
+        if parts.path == '/page':
+            self._send(make_page(int(query.get('kb', 100))), 'text/html', send_body)
+        elif parts.path == '/drip':
+            self._drip(int(query.get('kb', 64)), int(query.get('chunks', 16)),
+                       float(query.get('interval', 20)) / 1000, send_body)
+        elif parts.path == '/robots.txt':
+            self._send(b'User-agent: *\nAllow: /\n', 'text/plain', send_body)
+        elif parts.path == '/sitemap.xml':
+            self._send(b'<urlset></urlset>', 'application/xml', send_body)
+        else:
+            self._send(ASSET, 'application/octet-stream', send_body)
+
+    def _send(self, body, content_type, send_body):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def _drip(self, kb, chunks, interval, send_body):
+        body = make_page(kb)
+        size = -(-len(body) // chunks)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if not send_body:
+            return
+        for start in range(0, len(body), size):
+            self.wfile.write(body[start:start + size])
+            self.wfile.flush()
+            time.sleep(interval)
+
+    def log_message(self, *args):
+        pass
+
+class StandInServer:
+    """Servidor em uma thread própria, usado como gerenciador de contexto"""
+
+    def __init__(self, latency=0.0, tls=False):
+        self.latency = latency
+        self.tls = tls
+        self._tmp = None
+        self._env = {}
+
+    def __enter__(self):
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+        self.httpd.latency = self.latency
+        self.httpd.daemon_threads = True
+        scheme = 'http'
+        if self.tls:
+            self._tmp = tempfile.TemporaryDirectory()
+            cert, key = make_certificate(self._tmp.name)
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(cert, key)
+            self.httpd.socket = context.wrap_socket(self.httpd.socket, server_side=True)
+            for name in ('SSL_CERT_FILE', 'REQUESTS_CA_BUNDLE'):
+                self._env[name] = os.environ.get(name)
+                os.environ[name] = cert
+            scheme = 'https'
+
+        self.url = f'{scheme}://127.0.0.1:{self.httpd.server_port}'
+        self.thread = threading.Thread(target=self.httpd.serve_forever,
+                                       kwargs={'poll_interval': 0.05}, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        for name, value in self._env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        if self._tmp is not None:
+            self._tmp.cleanup()
@@ -0,0 +1,150 @@
+"""Benchmark da inicialização: tempo de import e memória por worker
+
+Cada medição roda em um interpretador novo, como um worker recém-criado
+pelo autoscaling: tempo do import do ponto de entrada, tempo até ficar
+pronto (com o aquecimento do create_app) e RSS. Com --workers, compara N
+workers que importam tudo sozinhos com N workers criados por fork depois
+do aquecimento (pre-fork), pela memória própria (USS) de cada um. Uso:
+
+    python -m benchmarks.startup --repeat 10
+    python -m benchmarks.startup --workers 4
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from benchmarks.harness import summarize
+
+# Ponto de entrada -> (módulo, função chamada depois do import)
+TARGETS = {
+    'analyzer': ('app.analyzer.performance', None),
+    'run': ('run', None),
+    'run.create_app': ('run', 'create_app'),
+    'monitor': ('monitor', None),
+    'maintenance': ('maintenance', None)
+}
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Dependências que só deveriam carregar quando uma etapa precisa delas
+HEAVY = ('requests', 'urllib3', 'ssl', 'bs4', 'lxml', 'dns', 'plotly', 'whois')
+
+CHILD = r'''
+import importlib, json, os, sys, time
+start = time.perf_counter()
+module = importlib.import_module(sys.argv[1])
+imported = time.perf_counter()
+app = getattr(module, sys.argv[2])() if sys.argv[2] else None
+ready = time.perf_counter()
+workers = int(sys.argv[3])
+
+def memory():
+    """RSS e memória própria (USS) do processo em KiB"""
+    fields = {}
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                name, value = line.split(':', 1)
+                if name in ('Rss', 'Private_Clean', 'Private_Dirty'):
+                    fields[name] = int(value.split()[0])
+    except OSError:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return {'rss_kb': rss, 'uss_kb': rss}
+    return {'rss_kb': fields['Rss'], 'uss_kb': fields['Private_Clean'] + fields['Private_Dirty']}
+
+def serve():
+    # Uma requisição, para que o worker toque a memória que vai usar
+    if app is not None:
+        app.test_client().get('/stats/http')
+    return memory()
+
+result = {
+    'import_ms': (imported - start) * 1000,
+    'ready_ms': (ready - start) * 1000,
+    'modules': len(sys.modules),
+    'heavy': [name for name in HEAVY if name in sys.modules],
+    **memory()
+}
+if workers:
+    pipes = []
+    for _ in range(workers):
+        read, write = os.pipe()
+        if os.fork() == 0:
+            os.close(read)
+            os.write(write, json.dumps(serve()).encode())
+            os._exit(0)
+        os.close(write)
+        pipes.append(read)
+    result['workers'] = []
+    for read in pipes:
+        with os.fdopen(read) as f:
+            result['workers'].append(json.loads(f.read()))
+    for _ in pipes:
+        os.wait()
+print(json.dumps(result))
+'''
+
+def spawn(target, workers=0):
+    """Executa o import de um ponto de entrada em um interpretador novo"""
+    module, factory = TARGETS[target]
+    env = dict(os.environ, FLASK_ENV=os.environ.get('FLASK_ENV', 'testing'))
+    code = f'HEAVY = {HEAVY!r}\n' + CHILD
+    output = subprocess.run(
+        [sys.executable, '-c', code, module, factory or '', str(workers)],
+        capture_output=True, text=True, check=True, env=env, cwd=ROOT
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+def measure_target(target, repeat=10):
+    """Tempo de import e até ficar pronto (ms), RSS e dependências pesadas carregadas"""
+    runs = [spawn(target) for _ in range(repeat)]
+    return {
+        'import': summarize([run['import_ms'] for run in runs]),
+        'ready': summarize([run['ready_ms'] for run in runs]),
+        'rss_kb': round(statistics.median(run['rss_kb'] for run in runs)),
+        'modules': runs[-1]['modules'],
+        'heavy': runs[-1]['heavy']
+    }
+
+def measure_workers(workers, target='run.create_app'):
+    """Memória própria por worker: cada um importando tudo vs. pre-fork depois do aquecimento"""
+    cold = [spawn(target) for _ in range(workers)]
+    prefork = spawn(target, workers=workers)['workers']
+    return {
+        'workers': workers,
+        'cold_uss_kb': round(statistics.fmean(run['uss_kb'] for run in cold)),
+        'cold_rss_kb': round(statistics.fmean(run['rss_kb'] for run in cold)),
+        'prefork_uss_kb': round(statistics.fmean(run['uss_kb'] for run in prefork)),
+        'prefork_rss_kb': round(statistics.fmean(run['rss_kb'] for run in prefork))
+    }
+
+def run(targets=None, repeat=10, workers=0):
+    results = {}
+    for target in targets or TARGETS:
+        result = results[target] = measure_target(target, repeat)
+        print(f"{target:<15} import: {result['import']['p50_ms']:>7.1f} ms  "
+              f"pronto: {result['ready']['p50_ms']:>7.1f} ms  RSS: {result['rss_kb'] / 1024:>6.1f} MiB  "
+              f"pesadas: {', '.join(result['heavy']) or '-'}")
+    if workers:
+        result = results['workers'] = measure_workers(workers)
+        print(f"{workers} workers  sem pre-fork: {result['cold_uss_kb'] / 1024:.1f} MiB próprios cada  "
+              f"com pre-fork: {result['prefork_uss_kb'] / 1024:.1f} MiB próprios cada")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--targets', nargs='+', choices=TARGETS, default=None)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=0, help='compara a memória de N workers')
+    parser.add_argument('--output', help='arquivo JSON')
+    args = parser.parse_args()
+    results = run(args.targets, args.repeat, args.workers)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(json.dumps(results, indent=2) + '\n')
+
+if __name__ == '__main__':
+    main()
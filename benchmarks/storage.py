@@ -0,0 +1,169 @@
+"""Benchmark do tamanho e da velocidade do metrics_data
+
+Compara o formato original (JSON em texto) com o BlobCodec (zlib com
+dicionário e sub-documentos deduplicados) em análises sintéticas que
+variam como as reais: cabeçalhos com Date diferente, tempos aleatórios e
+SEO/segurança que raramente mudam. Uso:
+
+    python -m benchmarks.storage --rows 5000 --urls 50
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from app.database.blobs import BlobCodec
+from app.database.db import Database
+
+def generate_analyses(count, urls):
+    """Análises completas, como as gravadas pelo analisador"""
+    start = datetime(2024, 1, 1)
+    for i in range(count):
+        url = urls[i % len(urls)]
+        site = i % len(urls)
+        when = start + timedelta(seconds=i * 30)
+        yield url, {
+            'timestamp': when.isoformat(),
+            'url': url,
+            'mode': 'audit',
+            'basic_metrics': {
+                'response_time': random.randint(50, 2000),
+                'status_code': 200,
+                'content_size': 40000 + site * 17,
+                'truncated': False,
+                'headers': {
+                    'Date': when.strftime('%a, %d %b %Y %H:%M:%S GMT'),
+                    'Content-Type': 'text/html; charset=utf-8',
+                    'Content-Length': str(40000 + site * 17),
+                    'Server': 'nginx',
+                    'Cache-Control': 'max-age=600',
+                    'Strict-Transport-Security': 'max-age=31536000; includeSubDomains',
+                    'X-Request-Id': f'{random.getrandbits(64):016x}',
+                    'Vary': 'Accept-Encoding'
+                },
+                'encoding': 'utf-8',
+                'redirect_count': 0,
+                'is_redirect': False,
+                'final_url': url,
+                'timing': {
+                    'dns': 0.0,
+                    'connect': round(random.uniform(5, 50), 2),
+                    'tls': round(random.uniform(10, 80), 2),
+                    'wait': round(random.uniform(20, 500), 2),
+                    'ttfb': round(random.uniform(40, 600), 2),
+                    'download': round(random.uniform(1, 40), 2),
+                    'total': round(random.uniform(50, 700), 2),
+                    'connection_reused': False,
+                    'redirects': [],
+                    'hops': 1
+                }
+            },
+            'dns_metrics': {
+                'ip': f'192.0.2.{site % 250}', 'ipv4': [f'192.0.2.{site % 250}'], 'ipv6': [],
+                'dns_time': random.randint(0, 40), 'lookup_time': 0, 'cached': True, 'ttl': 300
+            },
+            'ssl_metrics': {
+                'ssl_time': random.randint(20, 120),
+                'handshake_time': round(random.uniform(5, 60), 2),
+                'resumed': True,
+                'version': 'TLSv1.3',
+                'cipher': ['TLS_AES_256_GCM_SHA384', 'TLSv1.3', 256],
+                'certificate': {
+                    'subject': url.split('/')[2], 'issuer': "Let's Encrypt",
+                    'not_before': '2024-01-01T00:00:00+00:00', 'not_after': '2024-04-01T00:00:00+00:00',
+                    'san': [url.split('/')[2]], 'serial_number': f'{site:032X}', 'chain_length': 3,
+                    'days_to_expiry': 90 - when.timetuple().tm_yday, 'cached': True
+                }
+            },
+            'resource_metrics': {
+                'images': 12, 'scripts': 8, 'styles': 3, 'html_size': 40000, 'total_size': 900000 + site,
+                'by_type': {'image': 600000, 'script': 250000, 'style': 50000},
+                'largest': [{'url': f'{url}static/hero.jpg', 'type': 'image', 'bytes': 300000}]
+            },
+            'security_metrics': {
+                'has_https': True, 'hsts': True, 'csp': False, 'x_frame_options': 'DENY',
+                'cookies': {'secure': True, 'httponly': True}
+            },
+            'seo_metrics': {
+                'title': f'Site {site}', 'title_length': 7, 'meta_description': 'Uma descrição razoável',
+                'h1_count': 1, 'images_without_alt': site % 3, 'canonical': url
+            },
+            'health_check': {'performance': 'good', 'security': 'good', 'seo': 'good', 'overall': 'good'},
+            'recommendations': [
+                {'type': 'security', 'priority': 'medium', 'message': 'Add a Content-Security-Policy header'}
+            ]
+        }
+
+def measure_codec(analyses, codec):
+    """Bytes por linha (com os documentos amortizados) e vazão de codificação/decodificação"""
+    docs = {}
+    rows = []
+    start = time.perf_counter()
+    for _, metrics in analyses:
+        if codec is None:
+            rows.append(json.dumps(metrics))
+        else:
+            data, shared = codec.encode(metrics)
+            rows.append(data)
+            docs.update(shared)
+    encode_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for data in rows:
+        if codec is None:
+            json.loads(data)
+        else:
+            codec.decode(data, lambda hashes: {h: docs[h] for h in hashes})
+    decode_time = time.perf_counter() - start
+
+    size = lambda data: len(data.encode() if isinstance(data, str) else data)
+    total = sum(size(data) for data in rows) + sum(len(key) + size(data) for key, data in docs.items())
+    return {
+        'bytes_per_row': round(total / len(rows), 1),
+        'documents': len(docs),
+        'encode_per_second': round(len(rows) / encode_time),
+        'decode_per_second': round(len(rows) / decode_time)
+    }
+
+def measure_database(analyses, codec):
+    """Tamanho do arquivo SQLite por linha, depois de um VACUUM"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, 'storage.db'), blob_codec=codec)
+        try:
+            for i in range(0, len(analyses), 500):
+                db.save_many(analyses[i:i + 500])
+            db.vacuum()
+            return round(db.size() / len(analyses), 1)
+        finally:
+            db.close()
+
+def run(rows, url_count=50, database=True):
+    urls = [f'https://site{i}.example.com/' for i in range(url_count)]
+    analyses = list(generate_analyses(rows, urls))
+
+    results = {'rows': rows, 'urls': url_count}
+    for name, codec in (('legacy', None), ('json', BlobCodec('json')), ('zlib', BlobCodec('zlib'))):
+        result = measure_codec(analyses, codec)
+        if database and codec is not None:
+            result['file_bytes_per_row'] = measure_database(analyses, name)
+        results[name] = result
+        print(f"{name:<7} {result['bytes_per_row']:>9.1f} B/linha  "
+              f"codifica: {result['encode_per_second']:>7}/s  decodifica: {result['decode_per_second']:>7}/s"
+              + (f"  arquivo: {result['file_bytes_per_row']:>8.1f} B/linha" if 'file_bytes_per_row' in result else ''))
+
+    results['ratio'] = round(results['legacy']['bytes_per_row'] / results['zlib']['bytes_per_row'], 2)
+    print(f"redução: {results['ratio']}x")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--urls', type=int, default=50)
+    parser.add_argument('--no-database', action='store_true', help='não mede o arquivo SQLite')
+    args = parser.parse_args()
+    run(args.rows, args.urls, database=not args.no_database)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+"""Suíte de benchmarks do analisador e do banco, com saída em JSON
+
+Roda contra um servidor local (HTTP e, se o openssl existir, HTTPS) e
+compara o p50 de cada benchmark com uma execução anterior. Uso:
+
+    python -m benchmarks.suite --output bench.json
+    python -m benchmarks.suite --baseline bench.json --output new.json --fail-on-regression
+    python -m benchmarks.suite --groups database --rows 10000 1000000 10000000
+    python -m benchmarks.suite --groups startup
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import tracemalloc
+from app.analyzer.anomaly import AnomalyDetector
+from app.analyzer.extract import etree
+from app.analyzer.performance import PerformanceAnalyzer
+from app.database.db import Database
+from benchmarks.db_writes import SAMPLE
+from benchmarks.harness import Report, load_report, measure
+from benchmarks.history import generate_rows
+from benchmarks.html_parsing import make_page, streaming
+from benchmarks.server import StandInServer, tls_available
+from benchmarks.startup import TARGETS, measure_target
+from config import Config
+
+GROUPS = ('analyzer', 'parsing', 'database', 'anomaly', 'startup')
+
+class BenchmarkConfig(Config):
+    # Cada repetição precisa fazer o trabalho de verdade
+    CACHE_ENABLED = False
+    HTTP_MAX_RETRIES = 0
+
+def stage_setup(analyzer, plugin, url):
+    """Contexto com as entradas da etapa já calculadas (fora da medição)"""
+    def setup():
+        ctx = analyzer._context(url)
+        results = {}
+        if plugin.inputs:
+            for dep in analyzer.registry.resolve(plugin.inputs):
+                results[dep.name] = dep.func(analyzer, ctx, {})
+        return ctx, {name: results[name] for name in plugin.inputs}
+    return setup
+
+def bench_analyzer(report, repeat):
+    analyzer = PerformanceAnalyzer(BenchmarkConfig)
+    servers = [('http', StandInServer())]
+    if tls_available():
+        servers.append(('https', StandInServer(tls=True)))
+
+    for scheme, server in servers:
+        with server:
+            cases = {
+                'page': '/page?kb=100',
+                'large_page': '/page?kb=2000',
+                'latency_50ms': '/page?kb=100&delay=50',
+                'slow_drip': '/drip?kb=64&chunks=16&interval=10'
+            }
+            for case, path in cases.items():
+                url = server.url + path
+                report.add(f'analyzer.analyze_url.{case}.{scheme}',
+                           measure(lambda: analyzer.analyze_url(url, use_cache=False), repeat))
+
+            url = server.url + cases['page']
+            for plugin in analyzer.registry:
+                report.add(
+                    f'analyzer.stage.{plugin.name}.{scheme}',
+                    measure(lambda arg: plugin.func(analyzer, *arg), repeat,
+                            setup=stage_setup(analyzer, plugin, url)),
+                    cost=plugin.cost
+                )
+
+def bench_parsing(report, repeat, sizes=(100, 1000, 5000)):
+    backends = ['html.parser'] + (['lxml'] if etree is not None else [])
+    for kib in sizes:
+        body = make_page(kib)
+        for backend in backends:
+            parse = streaming(backend)
+            report.add(f'parsing.extract_page.{backend}.{kib}kb',
+                       measure(lambda: parse(body), max(3, repeat // 4), warmup=1),
+                       bytes=len(body))
+
+def populate(db, count, urls):
+    """Preenche o banco direto pelo SQLite, bem mais rápido que save_metrics"""
+    conn = db.connections.connection()
+    conn.executemany('INSERT OR IGNORE INTO urls (url) VALUES (?)', ((url,) for url in urls))
+    ids = dict(conn.execute('SELECT url, id FROM urls'))
+    conn.executemany('''
+        INSERT INTO metrics (
+            url, timestamp, response_time, status_code, metrics_data,
+            url_id, dns_time, tls_time, content_size, health_status
+        )
+        VALUES (?, ?, ?, ?, ?, ?, 10, 20, 10240, 'good')
+    ''', (row + (ids[row[0]],) for row in generate_rows(count, urls)))
+    conn.commit()
+
+def bench_database(report, repeat, rows, url_count=1000):
+    urls = [f'https://site{i}.example.com/' for i in range(url_count)]
+    for count in rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = Database(os.path.join(tmp, 'bench.db'))
+            populate(db, count, urls)
+
+            report.add(f'database.save_metrics.{count}',
+                       measure(lambda: db.save_metrics(random.choice(urls), SAMPLE), repeat),
+                       rows=count)
+            report.add(f'database.get_metrics_by_url.{count}',
+                       measure(lambda: db.get_metrics(url=random.choice(urls)), repeat),
+                       rows=count)
+            report.add(f'database.get_metrics_latest.{count}',
+                       measure(lambda: db.get_metrics(), repeat),
+                       rows=count)
+            db.close()
+
+def bench_anomaly(report, repeat, url_counts=(10_000, 50_000)):
+    """Custo de cada amostra e memória por URL da linha de base"""
+    for count in url_counts:
+        urls = [f'https://site{i}.example.com/' for i in range(count)]
+        tracemalloc.start()
+        detector = AnomalyDetector(max_urls=count)
+        for url in urls:
+            detector.observe(url, {'response_time': 200.0, 'ttfb': 120.0})
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        def observe_batch():
+            for _ in range(1000):
+                detector.observe(random.choice(urls), {'response_time': random.uniform(100, 300),
+                                                       'ttfb': random.uniform(50, 150)})
+
+        report.add(f'anomaly.observe_1000.{count}', measure(observe_batch, repeat),
+                   urls=count, bytes_per_url=round(memory / count))
+
+def bench_startup(report, repeat):
+    """Import de cada ponto de entrada em um interpretador novo, com o RSS"""
+    for target in TARGETS:
+        result = measure_target(target, repeat)
+        report.add(f'startup.import.{target}', result['import'], rss_kb=result['rss_kb'],
+                   heavy=result['heavy'])
+        if TARGETS[target][1]:
+            report.add(f'startup.ready.{target}', result['ready'], rss_kb=result['rss_kb'])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--groups', nargs='+', choices=GROUPS, default=list(GROUPS))
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--output', help='arquivo JSON (padrão: stdout)')
+    parser.add_argument('--baseline', help='relatório JSON de referência')
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help='variação do p50 considerada mudança (fração)')
+    parser.add_argument('--fail-on-regression', action='store_true')
+    args = parser.parse_args(argv)
+
+    report = Report()
+    if 'analyzer' in args.groups:
+        bench_analyzer(report, args.repeat)
+    if 'parsing' in args.groups:
+        bench_parsing(report, args.repeat)
+    if 'database' in args.groups:
+        bench_database(report, args.repeat, args.rows)
+    if 'anomaly' in args.groups:
+        bench_anomaly(report, args.repeat)
+    if 'startup' in args.groups:
+        bench_startup(report, args.repeat)
+
+    baseline = load_report(args.baseline) if args.baseline else None
+    result = report.to_dict(baseline, args.tolerance)
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    regressions = [
+        name for name, change in result.get('comparison', {}).items()
+        if change['status'] == 'regression'
+    ]
+    for name in regressions:
+        change = result['comparison'][name]
+        print(f"regressão: {name} {change['baseline_p50_ms']} -> {change['p50_ms']} ms "
+              f"({change['change']:+.1%})", file=sys.stderr)
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
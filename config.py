@@ -5,14 +5,100 @@ class Config:
     DEBUG = False
     TESTING = False
     DATABASE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app/database/metrics.db')
+    DATABASE_BUSY_TIMEOUT = 5000  # ms
+    DATABASE_SYNCHRONOUS = 'NORMAL'  # seguro em modo WAL
+    DATABASE_CACHE_SIZE = -20000  # KiB (negativo, como no PRAGMA cache_size)
+    DATABASE_MMAP_SIZE = 256 * 1024 * 1024
+    DATABASE_WRITE_BATCH_SIZE = 500
+    DATABASE_BLOB_CODEC = 'zlib'  # 'zlib' (compactado) ou 'json' (texto); ambos deduplicados
+    
+    # Retenção: linhas brutas por N dias; depois disso só os agregados
+    RETENTION_RAW_DAYS = 30  # None mantém tudo
+    RETENTION_ROLLUP_DAYS = {'minute': 7, 'hour': 365, 'day': None}  # None mantém tudo
+    RETENTION_INTERVAL = 3600  # segundos entre execuções em segundo plano (0 desativa)
+    RETENTION_BATCH_SIZE = 1000  # linhas apagadas por transação
+    RETENTION_BATCH_PAUSE = 0.05  # segundos entre lotes, para as gravações da aplicação passarem
+    RETENTION_VACUUM_PAGES = 1000  # páginas devolvidas ao disco por transação
     
     # Configurações de análise
     RESPONSE_TIME_THRESHOLD = 1000  # ms
     SECURITY_CHECK_ENABLED = True
     
+    # Configurações do pool HTTP
+    HTTP_POOL_MAX_HOSTS = 100
+    HTTP_POOL_CONNECTIONS_PER_HOST = 10
+    HTTP_MAX_RETRIES = 2
+    HTTP_BACKOFF_FACTOR = 0.3
+    HTTP_CONNECT_TIMEOUT = 5  # segundos
+    HTTP_TIMEOUT = 30  # segundos
+    
+    # Cache de DNS (o TTL da resposta vale quando o dnspython está instalado)
+    DNS_CACHE_TTL = 300  # segundos, quando o resolvedor não informa o TTL
+    DNS_CACHE_MAX_TTL = 3600  # segundos
+    DNS_NEGATIVE_TTL = 30  # segundos para nomes que não resolvem
+    DNS_CACHE_MAX_ENTRIES = 10000
+    
+    # Inspeção TLS: sessões retomadas e metadados do certificado em cache
+    TLS_CERT_CACHE_TTL = 3600  # segundos
+    TLS_CACHE_MAX_HOSTS = 10000
+    TLS_TICKET_WAIT = 0.1  # segundos, no máximo, esperando o ticket do TLS 1.3 depois de um handshake completo
+    
+    # Linha de base por URL: picos e regressões contra o próprio histórico
+    ANOMALY_ENABLED = True
+    ANOMALY_ALPHA = 0.05  # peso de cada amostra nas médias móveis
+    ANOMALY_MIN_SAMPLES = 20  # amostras antes de comparar
+    ANOMALY_THRESHOLD = 4.0  # desvios acima da média para um pico
+    ANOMALY_MIN_RATIO = 1.5  # e pelo menos esta fração do p50
+    ANOMALY_PERSISTENCE = 3  # amostras elevadas seguidas para uma regressão
+    ANOMALY_MAX_URLS = 50000  # URLs mantidas em memória
+    
+    # Configurações de leitura do HTML
+    HTML_MAX_BYTES = 5 * 1024 * 1024  # corpo analisado no máximo
+    HTML_PARSER = 'auto'  # 'auto' (lxml se instalado), 'lxml' ou 'html.parser'
+    
+    # Sonda leve (mode='probe'): 'head' ou 'range' (GET só do primeiro byte)
+    PROBE_METHOD = 'head'
+    PROBE_TIMEOUT = 10  # segundos
+    
+    # Inventário dos sub-recursos da página
+    RESOURCES_CRAWL_ENABLED = True
+    RESOURCES_CONCURRENCY = 8
+    RESOURCES_PER_HOST = 4
+    RESOURCES_MAX = 200  # recursos medidos por página
+    RESOURCES_TIMEOUT = 10  # segundos, por recurso
+    RESOURCES_STAGE_TIMEOUT = 30  # segundos, para o inventário inteiro
+    
+    # Configurações de análise em lote
+    BATCH_CONCURRENCY = 8
+    BATCH_PER_HOST = 2
+    BATCH_MAX_URLS = 1000
+    BATCH_SAVE_SIZE = 50
+    BATCH_HOST_RATE = None  # análises novas por segundo em cada host (None = sem limite)
+    
+    # Etapas de uma auditoria: pool de threads compartilhado entre as análises
+    STAGE_WORKERS = 64
+    STAGE_TIMEOUT = 10  # segundos, para etapas sem tempo limite próprio
+    
+    # Configurações da fila de jobs
+    JOBS_WORKERS = 4
+    JOBS_MAX_QUEUE = 1000
+    JOBS_RESULT_TTL = 3600  # segundos
+    
+    # Monitoramento contínuo (monitor.py)
+    MONITOR_DEFAULT_INTERVAL = 60  # segundos entre verificações de um alvo
+    MONITOR_WORKERS = 64
+    MONITOR_MAX_PENDING = 1000  # verificações em andamento antes de pular
+    MONITOR_TICK = 1.0  # segundos por slot da roda de tempo
+    MONITOR_JITTER = 0.1  # fração do intervalo
+    MONITOR_REFRESH_INTERVAL = 30  # segundos entre leituras da lista de alvos
+    
+    # Configurações do histórico
+    HISTORY_MAX_LIMIT = 5000
+    
     # Configurações de cache
     CACHE_ENABLED = True
     CACHE_TIMEOUT = 300  # segundos
+    CACHE_MAX_ENTRIES = 1000
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -20,6 +106,7 @@ class DevelopmentConfig(Config):
 class TestingConfig(Config):
     TESTING = True
     DATABASE_PATH = ':memory:'
+    RETENTION_INTERVAL = 0
 
 class ProductionConfig(Config):
     pass
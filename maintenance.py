@@ -0,0 +1,52 @@
+"""Manutenção do banco de métricas
+
+    python maintenance.py compact
+    python maintenance.py compact --batch-size 5000 --vacuum
+    python maintenance.py retention --dry-run
+    python maintenance.py retention --raw-days 90
+"""
+import argparse
+import json
+import os
+from app.database.db import Database
+from app.database.retention import Retention
+from config import config
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    compact = commands.add_parser('compact', help='converte linhas antigas e remove documentos órfãos')
+    compact.add_argument('--batch-size', type=int, default=1000, help='linhas regravadas por transação')
+    compact.add_argument('--vacuum', action='store_true', help='devolve ao disco o espaço liberado')
+    retention = commands.add_parser('retention', help='apaga o histórico expirado (RETENTION_*)')
+    retention.add_argument('--dry-run', action='store_true', help='só mostra o que seria apagado')
+    retention.add_argument('--raw-days', type=int, default=None, help='dias de linhas brutas mantidos')
+    retention.add_argument('--batch-size', type=int, default=None, help='linhas apagadas por transação')
+    args = parser.parse_args(argv)
+
+    env = os.environ.get('FLASK_ENV', 'development')
+    settings = config[env]
+    db = Database.from_config(settings)
+
+    try:
+        if args.command == 'retention':
+            task = Retention.from_config(db, settings)
+            task.raw_days = args.raw_days or task.raw_days
+            task.batch_size = args.batch_size or task.batch_size
+            print(json.dumps(task.run(dry_run=args.dry_run), indent=2))
+            return
+
+        before = db.size()
+        stats = db.compact(batch_size=args.batch_size)
+        print(f"linhas convertidas: {stats['rows']} "
+              f"({stats['bytes_before']} -> {stats['bytes_after']} bytes)")
+        print(f"documentos: {stats['docs_added']} novos, {stats['docs_removed']} removidos")
+        if args.vacuum:
+            db.vacuum()
+            print(f'arquivo: {before} -> {db.size()} bytes')
+    finally:
+        db.close()
+
+if __name__ == '__main__':
+    main()
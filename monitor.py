@@ -0,0 +1,59 @@
+"""Monitoramento contínuo dos alvos cadastrados no banco
+
+    python monitor.py add https://example.com --interval 60 --mode probe
+    python monitor.py add https://example.com --interval 3600
+    python monitor.py remove https://example.com
+    python monitor.py list
+    python monitor.py run
+"""
+import argparse
+import os
+import signal
+import threading
+from app.analyzer.performance import PerformanceAnalyzer
+from app.database.db import Database
+from app.monitor.monitor import Monitor
+from config import config
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    add = commands.add_parser('add', help='cadastra ou atualiza alvos')
+    add.add_argument('urls', nargs='+')
+    add.add_argument('--interval', type=int, default=None, help='segundos entre verificações')
+    add.add_argument('--mode', choices=PerformanceAnalyzer.MODES, default='audit',
+                     help="'audit' (análise completa) ou 'probe' (só disponibilidade)")
+    remove = commands.add_parser('remove', help='remove alvos')
+    remove.add_argument('urls', nargs='+')
+    remove.add_argument('--mode', choices=PerformanceAnalyzer.MODES, default=None)
+    commands.add_parser('list', help='lista os alvos')
+    commands.add_parser('run', help='executa o monitoramento')
+    args = parser.parse_args(argv)
+
+    env = os.environ.get('FLASK_ENV', 'development')
+    settings = config[env]
+    db = Database.from_config(settings)
+
+    try:
+        if args.command == 'add':
+            interval = args.interval or settings.MONITOR_DEFAULT_INTERVAL
+            db.add_targets((url, interval, args.mode) for url in args.urls)
+        elif args.command == 'remove':
+            for url in args.urls:
+                if not db.remove_target(url, mode=args.mode):
+                    print(f'não cadastrado: {url}')
+        elif args.command == 'list':
+            for target in db.get_targets(enabled_only=False):
+                print(f"{target['mode']:<5}  {target['interval']:>6}s  {target['url']}")
+        else:
+            monitor = Monitor.from_config(PerformanceAnalyzer(settings), db, settings)
+            stop = threading.Event()
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(signum, lambda *_: stop.set())
+            monitor.run(stop)
+    finally:
+        db.close()
+
+if __name__ == '__main__':
+    main()
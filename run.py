@@ -1,7 +1,15 @@
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, Response, g, render_template, jsonify, request, stream_with_context
+from app.analyzer.cache import is_fresh
 from app.analyzer.performance import PerformanceAnalyzer
+from app.analyzer.registry import parse_stages
 from app.database.db import Database
+from app.database.retention import Retention
+from app.jobs.queue import JobQueue, QueueFullError
+from app.telemetry.metrics import metrics as self_metrics, CONTENT_TYPE, API_REQUESTS, API_SECONDS, API_IN_FLIGHT
+from app.telemetry.trace import span
 from config import config
+from time import perf_counter
+import json
 import os
 
 # Inicialização
@@ -14,8 +22,76 @@ env = os.environ.get('FLASK_ENV', 'development')
 app.config.from_object(config[env])
 
 # Instâncias
-analyzer = PerformanceAnalyzer()
-db = Database(app.config['DATABASE_PATH'])
+analyzer = PerformanceAnalyzer(config[env])
+db = Database.from_config(config[env])
+jobs = JobQueue.from_config(analyzer, db, config[env])
+retention = Retention.from_config(db, config[env])
+
+def warmup():
+    """Carrega de antemão os módulos, pools, SSLContext e templates das requisições"""
+    analyzer.warmup()
+    app.jinja_env.get_template('index.html')
+
+def create_app(warm=True):
+    """Ponto de entrada para servidores com pre-fork
+    
+        gunicorn --preload --workers 4 'run:create_app()'
+    
+    O processo mestre importa e aquece tudo uma vez e os workers herdam a
+    memória pronta (copy-on-write). O import já aplica as migrações no
+    mestre, uma vez só; a conexão usada nelas é fechada aqui, então cada
+    worker abre as suas conexões SQLite, o writer e os pools de threads
+    (etapas, DNS) no primeiro uso, depois do fork. A retenção em segundo
+    plano roda em um único worker por vez (Retention.is_leader).
+    """
+    if warm:
+        warmup()
+    db.connections.release()
+    return app
+
+_background_started = False
+
+def start_background():
+    """Tarefas periódicas (retenção), iniciadas uma vez por worker
+
+    Todos os workers iniciam a thread, mas só o que tem o flock do banco
+    aplica a retenção; os outros só tentam assumir a cada rodada.
+    """
+    global _background_started
+    if not _background_started:
+        _background_started = True
+        retention.start()
+
+@app.before_request
+def start_timer():
+    start_background()
+    g.started = perf_counter()
+    API_IN_FLIGHT.inc()
+
+@app.after_request
+def record_request(response):
+    endpoint = request.endpoint or 'unknown'
+    API_REQUESTS.inc(endpoint=endpoint, method=request.method, status=response.status_code)
+    API_SECONDS.observe(perf_counter() - g.started, endpoint=endpoint)
+    return response
+
+@app.teardown_request
+def stop_timer(exc):
+    API_IN_FLIGHT.dec()
+
+def analysis_options(body):
+    """Modo e subconjunto de etapas do corpo da requisição, validados pelo registro
+
+    `stages` aceita "basic,dns" ou ["basic", "dns"]; levanta ValueError
+    com a mensagem devolvida ao cliente.
+    """
+    mode = body.get('mode', 'audit')
+    if mode not in analyzer.MODES:
+        raise ValueError(f"mode must be one of: {', '.join(analyzer.MODES)}")
+    stages = parse_stages(body.get('stages'))
+    if stages:
+        analyzer.registry.resolve(stages)
+    return mode, stages
 
 @app.route('/')
 def index():
@@ -28,21 +104,211 @@ def analyze():
         return jsonify({'error': 'URL is required'}), 400
     
     try:
-        # Analisar URL
-        metrics = analyzer.analyze_url(url)
-        
-        # Salvar métricas
-        db.save_metrics(url, metrics)
+        mode, stages = analysis_options(request.json)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # ?trace=1 ou "trace": true devolvem a árvore de tempos junto do resultado
+    trace = request.args.get('trace') in ('1', 'true') or request.json.get('trace') is True
+    
+    try:
+        with span('POST /analyze', kind='request') as root:
+            # Analisar URL (auditoria completa ou sonda leve)
+            metrics = analyzer.analyze_url(url, mode=mode, stages=stages)
+            
+            # Salvar métricas (resultados vindos do cache já foram gravados)
+            if is_fresh(metrics):
+                db.save_metrics(url, metrics)
         
+        if trace:
+            return jsonify({**metrics, 'trace': root.to_dict()})
         return jsonify(metrics)
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/analyze/stages')
+def analyze_stages():
+    """Etapas disponíveis, com entradas, custo e esquema de saída"""
+    return jsonify({'stages': analyzer.registry.describe()})
+
+def batch_limit(body, name, maximum):
+    """Limite pedido pelo cliente: inteiro de 1 até `maximum` (o padrão, se ausente)"""
+    value = body.get(name)
+    if value is None:
+        return maximum
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(f'{name} must be a positive integer')
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValueError(f'{name} must be a positive integer')
+    if value < 1:
+        raise ValueError(f'{name} must be a positive integer')
+    return min(value, maximum)
+
+@app.route('/analyze/batch', methods=['POST'])
+def analyze_batch():
+    urls = (request.json or {}).get('urls')
+    if not urls or not isinstance(urls, list):
+        return jsonify({'error': 'A list of URLs is required'}), 400
+    if len(urls) > app.config['BATCH_MAX_URLS']:
+        return jsonify({'error': f"At most {app.config['BATCH_MAX_URLS']} URLs per batch"}), 400
+    
+    # O cliente pode pedir menos concorrência, nunca mais que o configurado
+    try:
+        concurrency = batch_limit(request.json, 'concurrency', app.config['BATCH_CONCURRENCY'])
+        per_host = batch_limit(request.json, 'per_host', app.config['BATCH_PER_HOST'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    save_size = app.config['BATCH_SAVE_SIZE']
+    
+    def generate():
+        # Cada resultado sai como uma linha NDJSON assim que fica pronto;
+        # a gravação no banco é feita em blocos
+        pending = []
+        try:
+            for metrics in analyzer.analyze_many(urls, concurrency, per_host):
+                if is_fresh(metrics):
+                    pending.append((metrics['url'], metrics))
+                if len(pending) >= save_size:
+                    db.save_many(pending)
+                    pending = []
+                yield json.dumps(metrics) + '\n'
+        finally:
+            db.save_many(pending)
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/stats/cache')
+def cache_stats():
+    if analyzer.cache is None:
+        return jsonify({'enabled': False})
+    return jsonify(analyzer.cache.stats())
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    body = request.json or {}
+    url = body.get('url')
+    if not url:
+        return jsonify({'error': 'URL is required'}), 400
+    
+    try:
+        mode, stages = analysis_options(body)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        job = jobs.submit(url, mode=mode, stages=stages)
+    except QueueFullError as e:
+        return jsonify({'error': str(e)}), 503
+    
+    return jsonify(job.to_dict()), 202
+
+@app.route('/jobs/stats')
+def job_stats():
+    return jsonify(jobs.stats())
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = jobs.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    job = jobs.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    if not job.finished:
+        return jsonify(job.to_dict()), 202
+    return jsonify(job.result or {'error': job.error})
+
 @app.route('/metrics/<path:url>')
 def get_metrics(url):
     metrics = db.get_metrics(url)
     return jsonify(metrics)
 
+@app.route('/internal/metrics')
+def internal_metrics():
+    # Métricas do próprio serviço no formato de texto do Prometheus
+    return Response(self_metrics.render(), content_type=CONTENT_TYPE)
+
+@app.route('/stats/http')
+def http_stats():
+    # Reaproveitamento de conexões do pool do analisador
+    return jsonify(analyzer.http.stats())
+
+@app.route('/stats/dns')
+def dns_stats():
+    # Acertos do cache de DNS compartilhado pelas análises
+    return jsonify(analyzer.resolver.stats())
+
+@app.route('/stats/tls')
+def tls_stats():
+    # Handshakes retomados e acertos do cache de certificados
+    return jsonify(analyzer.tls.stats())
+
+@app.route('/stats/anomalies')
+def anomaly_stats():
+    # URLs com linha de base, amostras, picos e regressões
+    if analyzer.anomalies is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **analyzer.anomalies.stats()})
+
+@app.route('/history')
+def history():
+    url = request.args.get('url')
+    if not url:
+        return jsonify({'error': 'URL is required'}), 400
+    
+    fields = [f for f in request.args.get('fields', '').split(',') if f] or None
+    try:
+        limit = max(1, min(int(request.args.get('limit', 100)), app.config['HISTORY_MAX_LIMIT']))
+        # Uma linha a mais para saber se existe próxima página
+        rows = db.iter_history(
+            url,
+            fields=fields,
+            since=request.args.get('since'),
+            until=request.args.get('until'),
+            cursor=request.args.get('cursor'),
+            limit=limit + 1
+        )
+        first = next(rows, None)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    def generate():
+        # JSON montado linha a linha, sem materializar a página inteira
+        yield '{"url": %s, "items": [' % json.dumps(url)
+        row, cursor, count = first, None, 0
+        while row is not None and count < limit:
+            item, cursor = row
+            yield (',' if count else '') + json.dumps(item)
+            count += 1
+            row = next(rows, None)
+        # Se sobrou uma linha, existe uma próxima página
+        next_cursor = cursor if row is not None else None
+        yield '], "next_cursor": %s}' % json.dumps(next_cursor)
+    
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+@app.route('/history/rollup')
+def history_rollup():
+    url = request.args.get('url')
+    since = request.args.get('since')
+    if not url or not since:
+        return jsonify({'error': 'URL and since are required'}), 400
+    
+    try:
+        max_points = min(int(request.args.get('max_points', 500)), app.config['HISTORY_MAX_LIMIT'])
+        series = db.get_rollups(url, since, request.args.get('until'), max_points)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({'url': url, **series})
+
 if __name__ == '__main__':
+    start_background()
     app.run(debug=app.config['DEBUG'])
\ No newline at end of file
@@ -0,0 +1,182 @@
+import gzip
+import threading
+import pytest
+import shutil
+import socket
+import ssl
+import subprocess
+from types import SimpleNamespace
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from app.analyzer.resolver import Resolver
+
+PAGE = b'''<html>
+    <head>
+        <title>Stand-in</title>
+        <meta name="description" content="Local test page">
+    </head>
+    <body><h1>Stand-in</h1><img src="a.png" alt="a"></body>
+</html>'''
+
+RESOURCE_PAGE = b'''<html>
+    <head>
+        <link href="/static/style.css" rel="stylesheet">
+        <script src="/static/app.js"></script>
+    </head>
+    <body>
+        <img src="/static/photo.jpg"><img src="static/photo.jpg#again">
+        <img src="/static/nohead.jpg"><img src="/missing.png">
+        <img src="data:image/png;base64,AAAA">
+    </body>
+</html>'''
+
+# Sub-recursos: caminho -> (corpo, cabeçalhos extras)
+RESOURCES = {
+    '/resources': (RESOURCE_PAGE, {}),
+    '/static/style.css': (b'@font-face { src: url("fonts/a.woff2") format("woff2"); }', {'Content-Type': 'text/css'}),
+    '/static/app.js': (gzip.compress(b'console.log(1);' * 100), {'Content-Encoding': 'gzip'}),
+    '/static/fonts/a.woff2': (b'f' * 300, {}),
+    '/static/photo.jpg': (b'p' * 2000, {}),
+    '/static/nohead.jpg': (b'n' * 500, {})
+}
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Servidor HTTP local que substitui os sites reais nos testes"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.hits.append(self.path)
+        if self.path == '/redirect':
+            self.send_response(302)
+            self.send_header('Location', '/')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if self.path in RESOURCES:
+            body, headers = RESOURCES[self.path]
+            self.send_response(200)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if self.path in ('/robots.txt', '/sitemap.xml', '/missing', '/missing.png'):
+            body, status = b'not found', 404
+        else:
+            body, status = PAGE, 200
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html')
+        if self.path == '/cookie':
+            self.send_header('Set-Cookie', 'session=abc; Path=/')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_HEAD(self):
+        self.server.hits.append(self.path)
+        # HEAD recusado (405) ou recurso inexistente (404)
+        status = {'/static/nohead.jpg': 405, '/missing.png': 404}.get(self.path)
+        if status:
+            self.send_response(status)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if self.path in RESOURCES:
+            body, headers = RESOURCES[self.path]
+            self.send_response(200)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(PAGE)))
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def http_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    server.hits = []
+    server.url = f'http://127.0.0.1:{server.server_port}'
+    thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+# Zona DNS falsa: host -> {família: (endereços, ttl)}
+ZONE = {
+    'example.com': {
+        'ipv4': (['93.184.216.34'], 60),
+        'ipv6': (['2606:2800:220:1:248:1893:25c8:1946'], 120)
+    },
+    'v4only.example': {'ipv4': (['192.0.2.10'], None)}
+}
+
+@pytest.fixture
+def stub_resolver():
+    """Resolver com um lookup falso que registra cada consulta"""
+    calls = []
+
+    def lookup(host, family):
+        calls.append((host, family))
+        if family not in ZONE.get(host, {}):
+            raise socket.gaierror(socket.EAI_NONAME, 'not found')
+        return ZONE[host][family]
+
+    resolver = Resolver(lookup=lookup)
+    resolver.calls = calls
+    yield resolver
+    resolver.close()
+
+@pytest.fixture(scope='session')
+def certificate(tmp_path_factory):
+    """Certificado autoassinado para 127.0.0.1/localhost, gerado pelo openssl"""
+    if shutil.which('openssl') is None:
+        pytest.skip('openssl not available')
+    directory = tmp_path_factory.mktemp('tls')
+    cert, key = str(directory / 'cert.pem'), str(directory / 'key.pem')
+    subprocess.run([
+        'openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '20',
+        '-keyout', key, '-out', cert, '-subj', '/CN=localhost/O=Stand-in CA',
+        '-addext', 'subjectAltName=DNS:localhost,IP:127.0.0.1'
+    ], check=True, capture_output=True)
+    return cert, key
+
+@pytest.fixture
+def tls_server(certificate):
+    """Servidor TLS que só completa o handshake e espera o cliente fechar"""
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(*certificate)
+    listener = socket.create_server(('127.0.0.1', 0))
+    listener.settimeout(0.05)
+    stop = threading.Event()
+
+    def handle(conn):
+        try:
+            with context.wrap_socket(conn, server_side=True) as tls:
+                while tls.recv(1024):
+                    pass
+        except OSError:
+            pass
+
+    def serve():
+        while not stop.is_set():
+            try:
+                conn, _ = listener.accept()
+            except OSError:
+                continue
+            conn.settimeout(5)
+            threading.Thread(target=handle, args=(conn,), daemon=True).start()
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    yield SimpleNamespace(port=listener.getsockname()[1], cafile=certificate[0])
+    stop.set()
+    thread.join()
+    listener.close()
@@ -1,5 +1,9 @@
 import pytest
+import threading
+import time
 from app.analyzer.performance import PerformanceAnalyzer
+from app.analyzer.fetch import FetchContext
+from app.analyzer.batch import run_batch
 from unittest.mock import Mock, patch
 from datetime import datetime
 
@@ -13,6 +17,7 @@ def mock_response():
     mock.status_code = 200
     mock.content = b"<html><body><img src='test.jpg'><script></script></body></html>"
     mock.text = mock.content.decode()
+    mock.iter_content = lambda chunk_size=1: iter([mock.content])
     mock.headers = {'Content-Type': 'text/html'}
     mock.encoding = 'utf-8'
     mock.history = []
@@ -26,7 +31,7 @@ def test_analyzer_initialization(analyzer):
     assert 'size' in analyzer.thresholds
     assert 'resources' in analyzer.thresholds
 
-@patch('requests.get')
+@patch('requests.Session.get')
 def test_analyze_basic_metrics(mock_get, analyzer, mock_response):
     mock_get.return_value = mock_response
     
@@ -39,20 +44,25 @@ def test_analyze_basic_metrics(mock_get, analyzer, mock_response):
     assert 'content_size' in metrics
     assert 'headers' in metrics
 
-@patch('socket.gethostbyname')
-def test_analyze_dns(mock_dns, analyzer):
-    mock_dns.return_value = '93.184.216.34'
+def test_analyze_dns(stub_resolver):
+    analyzer = PerformanceAnalyzer(resolver=stub_resolver)
     
     metrics = analyzer._analyze_dns('https://example.com')
+    again = analyzer._analyze_dns('https://example.com/other')
     
-    assert isinstance(metrics, dict)
-    assert 'ip' in metrics
-    assert 'dns_time' in metrics
     assert metrics['ip'] == '93.184.216.34'
+    assert metrics['ipv6'] == ['2606:2800:220:1:248:1893:25c8:1946']
+    assert 'dns_time' in metrics
+    assert metrics['cached'] is False
+    assert again['cached'] is True
+    assert again['dns_time'] == metrics['dns_time']
+    assert len(stub_resolver.calls) == 2
 
-@patch('requests.get')
-def test_analyze_resources(mock_get, analyzer, mock_response):
+@patch('requests.Session.head')
+@patch('requests.Session.get')
+def test_analyze_resources(mock_get, mock_head, analyzer, mock_response):
     mock_get.return_value = mock_response
+    mock_head.return_value = Mock(status_code=200, headers={'Content-Length': '1000'})
     
     metrics = analyzer._analyze_resources('https://example.com')
     
@@ -61,8 +71,12 @@ def test_analyze_resources(mock_get, analyzer, mock_response):
     assert metrics['images'] == 1
     assert 'scripts' in metrics
     assert metrics['scripts'] == 1
+    # O HTML mais a imagem medida com HEAD
+    assert mock_head.call_args.args[0] == 'https://example.com/test.jpg'
+    assert metrics['requests'] == 2
+    assert metrics['total_size'] == len(mock_response.content) + 1000
 
-@patch('requests.get')
+@patch('requests.Session.get')
 def test_analyze_seo(mock_get, analyzer):
     mock_response = Mock()
     mock_response.text = '''
@@ -77,17 +91,50 @@ def test_analyze_seo(mock_get, analyzer):
             </body>
         </html>
     '''
+    mock_response.encoding = 'utf-8'
+    mock_response.iter_content.return_value = iter([mock_response.text.encode()])
     mock_get.return_value = mock_response
     
-    metrics = analyzer._analyze_seo('https://example.com')
+    inputs = {'robots_txt': True, 'sitemap_xml': {'error': 'Stage timed out after 35s'}}
+    metrics = analyzer._analyze_seo('https://example.com', inputs)
     
     assert isinstance(metrics, dict)
     assert 'title' in metrics
     assert metrics['title'] == 'Test Page'
     assert 'meta_description' in metrics
     assert metrics['h1_count'] == 1
+    # As sondas vêm das etapas de entrada, sem buscar de novo
+    assert metrics['has_robots_txt'] is True
+    assert metrics['has_sitemap'] is False
+    assert mock_get.call_count == 1
 
-@patch('requests.get')
+def test_slow_robots_txt_keeps_seo_metrics(analyzer, http_server, monkeypatch):
+    """Testa que uma sonda de robots.txt travada não derruba a etapa de SEO"""
+    from app.analyzer.fetch import FetchContext
+    probe = FetchContext.probe
+    
+    def slow_probe(ctx, path):
+        if path == '/robots.txt':
+            time.sleep(1)
+        return probe(ctx, path)
+    
+    monkeypatch.setattr(FetchContext, 'probe', slow_probe)
+    monkeypatch.setattr(analyzer.registry.get('robots_txt'), 'timeout', 0.2)
+    
+    result = analyzer.analyze_url(f'{http_server.url}/', use_cache=False, stages='seo')
+    
+    assert result['seo_metrics']['title']
+    assert result['seo_metrics']['has_robots_txt'] is False
+    assert result['seo_metrics']['has_sitemap'] is False
+
+def test_seo_probes_are_fetched_once(analyzer, http_server):
+    result = analyzer.analyze_url(f'{http_server.url}/', use_cache=False, stages='seo')
+    
+    assert result['seo_metrics']['has_robots_txt'] is False
+    assert http_server.hits.count('/robots.txt') == 1
+    assert http_server.hits.count('/sitemap.xml') == 1
+
+@patch('requests.Session.get')
 def test_analyze_security(mock_get, analyzer):
     mock_response = Mock()
     mock_response.headers = {
@@ -96,6 +143,7 @@ def test_analyze_security(mock_get, analyzer):
     }
     mock_response.url = 'https://example.com'
     mock_response.cookies = []
+    mock_response.iter_content.return_value = iter([b''])
     mock_get.return_value = mock_response
     
     metrics = analyzer._analyze_security('https://example.com')
@@ -135,7 +183,7 @@ def test_generate_recommendations(analyzer):
     assert all('priority' in rec for rec in recommendations)
     assert all('message' in rec for rec in recommendations)
 
-@patch('requests.get')
+@patch('requests.Session.get')
 def test_analyze_url_complete(mock_get, analyzer, mock_response):
     mock_get.return_value = mock_response
     
@@ -152,3 +200,93 @@ def test_analyze_url_complete(mock_get, analyzer, mock_response):
     assert 'availability_metrics' in result
     assert 'health_check' in result
     assert 'recommendations' in result
+
+@patch('requests.Session.get')
+def test_analyze_url_fetches_page_once(mock_get, analyzer, mock_response):
+    mock_get.return_value = mock_response
+    
+    analyzer.analyze_url('https://example.com')
+    
+    # Uma busca da página + robots.txt + sitemap.xml
+    fetched = [call.args[0] for call in mock_get.call_args_list]
+    assert fetched.count('https://example.com') == 1
+    assert len(fetched) == 3
+
+@patch('requests.get')
+def test_fetch_context_shares_response(mock_get, mock_response):
+    mock_get.return_value = mock_response
+    ctx = FetchContext('https://example.com')
+    
+    assert ctx.response is ctx.response
+    assert ctx.page is ctx.page
+    assert ctx.headers == {'Content-Type': 'text/html'}
+    assert mock_get.call_count == 1
+
+def test_analyze_many_against_local_server(analyzer, http_server):
+    urls = [f'{http_server.url}/', f'{http_server.url}/a', f'{http_server.url}/b']
+    
+    results = list(analyzer.analyze_many(urls, concurrency=2))
+    
+    assert sorted(r['url'] for r in results) == sorted(urls)
+    assert all(r['basic_metrics']['status_code'] == 200 for r in results)
+    assert all(r['seo_metrics']['title'] == 'Stand-in' for r in results)
+
+def test_run_batch_limits_per_host():
+    lock = threading.Lock()
+    active, peak = {}, {}
+    
+    def work(url):
+        host = url.split('/')[2]
+        with lock:
+            active[host] = active.get(host, 0) + 1
+            peak[host] = max(peak.get(host, 0), active[host])
+        time.sleep(0.02)
+        with lock:
+            active[host] -= 1
+        return url
+    
+    urls = [f'http://{host}/{i}' for host in ('a.com', 'b.com') for i in range(6)]
+    results = list(run_batch(work, urls, concurrency=4, per_host=2))
+    
+    assert sorted(url for url, _ in results) == sorted(urls)
+    assert all(result == url for url, result in results)
+    assert peak == {'a.com': 2, 'b.com': 2}
+
+def test_run_batch_limits_rate_per_host():
+    starts = {}
+    
+    def work(url):
+        starts.setdefault(url.split('/')[2], []).append(time.monotonic())
+        return url
+    
+    urls = [f'http://{host}/{i}' for host in ('a.com', 'b.com') for i in range(4)]
+    results = list(run_batch(work, urls, concurrency=4, per_host=4, rate=20))
+    
+    assert len(results) == 8
+    for times in starts.values():
+        gaps = [later - earlier for earlier, later in zip(times, times[1:])]
+        assert min(gaps) >= 0.045
+    # Hosts diferentes não esperam um pelo outro
+    assert abs(starts['a.com'][0] - starts['b.com'][0]) < 0.04
+
+@patch('requests.Session.get')
+def test_analyze_url_uses_result_cache(mock_get, analyzer, mock_response):
+    mock_get.return_value = mock_response
+    
+    first = analyzer.analyze_url('https://example.com')
+    second = analyzer.analyze_url('https://example.com/')
+    
+    assert first['cache']['hit'] is False
+    assert second['cache']['hit'] is True
+    assert second['basic_metrics'] == first['basic_metrics']
+    assert mock_get.call_count == 3
+
+@pytest.mark.parametrize('limits', [
+    {'concurrency': 0}, {'concurrency': -1}, {'per_host': 0}, {'per_host': -1}, {'rate': 0}
+])
+def test_batch_limits_must_be_positive(analyzer, limits):
+    # A exceção sai na chamada, não só quando o gerador é consumido
+    with pytest.raises(ValueError):
+        run_batch(lambda url: url, ['https://a.com'], **{'concurrency': 2, 'per_host': 1, **limits})
+    with pytest.raises(ValueError):
+        analyzer.analyze_many(['https://a.com'], **{'concurrency': 2, 'per_host': 1, **limits})
@@ -0,0 +1,99 @@
+import math
+import random
+from app.analyzer.anomaly import AnomalyDetector, extract
+from app.analyzer.performance import PerformanceAnalyzer
+
+def normal_traffic(detector, url='https://example.com', samples=500, median=200, sigma=0.1, seed=1):
+    rng = random.Random(seed)
+    findings = []
+    for _ in range(samples):
+        findings += detector.observe(url, {'response_time': rng.lognormvariate(math.log(median), sigma)})
+    return findings
+
+def test_stable_history_has_no_anomalies():
+    """Testa que a variação normal não gera alarmes e os quantis acompanham a série"""
+    detector = AnomalyDetector()
+
+    assert normal_traffic(detector) == []
+    baseline = detector.baseline('https://example.com')['response_time']
+    assert baseline['samples'] == 500
+    assert 180 < baseline['p50'] < 220
+    assert baseline['p50'] < baseline['p95'] < 260
+
+def test_isolated_spike_does_not_move_the_baseline():
+    detector = AnomalyDetector()
+    normal_traffic(detector)
+    before = detector.baseline('https://example.com')['response_time']
+
+    findings = detector.observe('https://example.com', {'response_time': 5000})
+
+    assert [(f['kind'], f['severity']) for f in findings] == [('spike', 'warning')]
+    after = detector.baseline('https://example.com')['response_time']
+    assert after['mean'] < before['mean'] * 1.1
+    assert normal_traffic(detector, samples=20, seed=2) == []
+
+def test_sustained_regression_is_reported():
+    """Testa que uma piora que persiste vira regressão e continua sinalizada"""
+    detector = AnomalyDetector(persistence=3)
+    normal_traffic(detector)
+
+    kinds = []
+    for value in [600, 620, 580, 610, 590, 605] * 5:
+        findings = detector.observe('https://example.com', {'response_time': value})
+        kinds.append(findings[0]['kind'] if findings else None)
+
+    assert kinds[2] == 'regression'
+    assert all(kind == 'regression' for kind in kinds[2:])
+    assert detector.stats()['regressions'] == len(kinds) - 2
+
+def test_state_is_bounded_and_separated_by_mode():
+    detector = AnomalyDetector(max_urls=3)
+    for i in range(5):
+        detector.observe(f'https://site{i}.example.com', {'response_time': 100})
+    detector.observe('https://site4.example.com', {'response_time': 100}, mode='probe')
+
+    assert detector.stats()['urls'] == 3
+    assert detector.baseline('https://site0.example.com') == {}
+    assert detector.baseline('https://site4.example.com')['response_time']['samples'] == 1
+    assert detector.observe('https://site4.example.com', {}) == []
+
+def test_extract_tracked_metrics():
+    metrics = {'basic_metrics': {'response_time': 120, 'timing': {'ttfb': 80.5}}, 'dns_metrics': {'dns_time': 3}}
+    assert extract(metrics) == {'response_time': 120, 'ttfb': 80.5}
+    assert extract({'basic_metrics': {'response_time': None}}) == {}
+
+def test_anomalies_feed_health_and_recommendations():
+    analyzer = PerformanceAnalyzer()
+    regression = {
+        'metric': 'response_time', 'kind': 'regression', 'severity': 'bad', 'value': 600, 'score': 20.0,
+        'baseline': {'samples': 500, 'mean': 200, 'std': 20, 'p50': 200, 'p95': 235}
+    }
+    metrics = {'basic_metrics': {'response_time': 250}, 'anomalies': [regression]}
+
+    health = analyzer._analyze_health(metrics)
+    assert health['baseline'] == 'bad'
+    assert health['overall'] == 'bad'
+
+    recommendations = analyzer._generate_recommendations(metrics)
+    assert recommendations[0]['priority'] == 'high'
+    assert '3.0x' in recommendations[0]['message']
+
+    assert analyzer._analyze_health({'basic_metrics': {'response_time': 250}, 'anomalies': []})['baseline'] == 'good'
+
+def test_probe_reports_baseline(http_server):
+    analyzer = PerformanceAnalyzer()
+
+    result = analyzer.analyze_url(f'{http_server.url}/', mode='probe')
+
+    assert result['anomalies'] == []
+    assert result['health_check']['baseline'] == 'good'
+    assert analyzer.anomalies.baseline(f'{http_server.url}/', mode='probe')['response_time']['samples'] == 1
+
+def test_audit_reports_baseline(http_server):
+    analyzer = PerformanceAnalyzer()
+
+    result = analyzer.analyze_url(f'{http_server.url}/', use_cache=False)
+
+    assert result['anomalies'] == []
+    assert result['health_check']['baseline'] == 'good'
+    assert set(analyzer.anomalies.baseline(f'{http_server.url}/')) == {'response_time', 'ttfb'}
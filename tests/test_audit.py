@@ -0,0 +1,101 @@
+import io
+import json
+import pytest
+from types import SimpleNamespace
+from app.analyzer.performance import PerformanceAnalyzer
+from app.analyzer.registry import registry
+from app.audit.runner import AuditRunner, Target, parse_target
+from audit import main
+from app.database.db import Database
+from config import TestingConfig
+
+@pytest.fixture
+def test_db(tmp_path):
+    db = Database(str(tmp_path / 'audit.db'))
+    yield db
+    db.close()
+
+def test_parse_text_and_jsonl_lines():
+    assert parse_target('  https://example.com/  ') == Target('https://example.com/', 'audit', None)
+    assert parse_target('# comentário') is None
+    assert parse_target('') is None
+    assert parse_target('{"url": "https://example.com", "mode": "probe"}') == \
+        Target('https://example.com', 'probe', None)
+    assert parse_target('{"url": "https://example.com", "stages": "basic, dns"}').stages == ('basic', 'dns')
+
+    for line in ('example.com', 'ftp://example.com', '{"mode": "audit"}', '{"url": "https://a.com", "mode": "x"}'):
+        with pytest.raises(ValueError):
+            parse_target(line)
+    with pytest.raises(ValueError):
+        parse_target('https://example.com', fmt='jsonl')
+
+def test_audit_saves_in_bulk_and_resumes(http_server, test_db, tmp_path):
+    """Testa a saída JSONL, a gravação no banco e a retomada pelo arquivo de progresso"""
+    checkpoint = str(tmp_path / 'audit.progress')
+    runner = AuditRunner(PerformanceAnalyzer(TestingConfig), test_db, save_size=2, checkpoint=checkpoint)
+    lines = [
+        f'{http_server.url}/',
+        f'{http_server.url}/other',
+        f'{http_server.url}/',
+        json.dumps({'url': f'{http_server.url}/', 'mode': 'probe'}),
+        'http://127.0.0.1:1/',
+        json.dumps({'url': f'{http_server.url}/', 'stages': 'nope'})
+    ]
+    targets, invalid = runner.read(lines)
+    assert len(targets) == 4
+    assert invalid == ['line 6: Unknown stage: nope']
+
+    output = io.StringIO()
+    summary = runner.run(targets, output=output)
+
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert len(results) == 4
+    assert summary['ok'] == 3 and summary['failed'] == 1
+    assert summary['saved'] == 4
+    assert summary['health']['good'] >= 1
+    assert len(test_db.get_metrics(f'{http_server.url}/')) == 2
+
+    # Só a URL que falhou é refeita
+    http_server.hits.clear()
+    output = io.StringIO()
+    summary = runner.run(targets, output=output)
+    assert summary['skipped'] == 3
+    assert summary['failed'] == 1 and summary['ok'] == 0
+    assert [json.loads(line)['url'] for line in output.getvalue().splitlines()] == ['http://127.0.0.1:1/']
+    assert http_server.hits == []
+
+def test_interrupted_run_keeps_finished_targets(tmp_path):
+    """Testa que uma interrupção grava o que terminou e a retomada faz o resto"""
+    calls = []
+
+    def analyze_url(url, mode='audit', stages=None):
+        calls.append(url)
+        if url.endswith('/2') and len(calls) == 2:
+            raise KeyboardInterrupt
+        return {'url': url, 'health_check': {'overall': 'good'}}
+
+    analyzer = SimpleNamespace(MODES=PerformanceAnalyzer.MODES, registry=registry, analyze_url=analyze_url)
+    runner = AuditRunner(analyzer, concurrency=1, per_host=1, checkpoint=str(tmp_path / 'progress'))
+    targets, _ = runner.read([f'https://example.com/{i}' for i in range(1, 4)])
+
+    summary = runner.run(targets)
+    assert summary['interrupted'] is True
+    assert summary['ok'] == 1
+
+    summary = runner.run(targets)
+    assert summary['skipped'] == 1
+    assert summary['ok'] == 2
+    assert calls == ['https://example.com/1', 'https://example.com/2', 'https://example.com/2', 'https://example.com/3']
+
+@pytest.mark.parametrize('option', ['--concurrency', '--per-host', '--save-size', '--rate'])
+@pytest.mark.parametrize('value', ['0', '-1', 'x'])
+def test_limits_must_be_positive(option, value, capsys):
+    with pytest.raises(SystemExit) as exit:
+        main(['-', option, value])
+    assert exit.value.code == 2
+    assert option in capsys.readouterr().err
+
+@pytest.mark.parametrize('option', ['concurrency', 'per_host', 'save_size', 'rate'])
+def test_runner_rejects_zero_limits(option):
+    with pytest.raises(ValueError):
+        AuditRunner(None, **{option: 0})
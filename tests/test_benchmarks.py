@@ -0,0 +1,26 @@
+from benchmarks.harness import compare, measure
+
+def test_measure_runs_setup_outside_timing():
+    calls = []
+    stats = measure(calls.append, repeat=5, warmup=1, setup=lambda: 'ctx')
+    assert calls == ['ctx'] * 6
+    assert stats['repeat'] == 5
+    assert stats['min_ms'] <= stats['p50_ms'] <= stats['max_ms']
+
+def test_compare_flags_changes_beyond_tolerance():
+    baseline = {
+        'slower': {'p50_ms': 10.0},
+        'faster': {'p50_ms': 10.0},
+        'same': {'p50_ms': 10.0}
+    }
+    results = {
+        'slower': {'p50_ms': 12.0},
+        'faster': {'p50_ms': 8.0},
+        'same': {'p50_ms': 10.5},
+        'new': {'p50_ms': 1.0}
+    }
+    changes = compare(results, baseline, tolerance=0.10)
+    assert changes['slower']['status'] == 'regression'
+    assert changes['faster']['status'] == 'improvement'
+    assert changes['same']['status'] == 'unchanged'
+    assert 'new' not in changes
@@ -0,0 +1,148 @@
+import json
+import os
+import sqlite3
+import pytest
+from app.database.blobs import BlobCodec, references, unpack
+from app.database.db import Database
+
+def analysis(date, days=40):
+    return {
+        'url': 'https://example.com',
+        'basic_metrics': {
+            'response_time': 120,
+            'status_code': 200,
+            'headers': {'Server': 'nginx', 'Content-Type': 'text/html', 'Date': date}
+        },
+        'ssl_metrics': {'ssl_time': 30, 'certificate': {'subject': 'example.com', 'days_to_expiry': days}},
+        'seo_metrics': {'title': 'Example', 'h1_count': 1},
+        'recommendations': []
+    }
+
+@pytest.fixture
+def test_db():
+    db_path = "test_blobs.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    db = Database(db_path)
+    yield db
+    db.close()
+    for path in (db_path, db_path + "-wal", db_path + "-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+
+def test_round_trip_and_shared_documents():
+    """Testa que os sub-documentos iguais geram o mesmo hash e a análise volta inteira"""
+    codec = BlobCodec()
+    first, first_docs = codec.encode(analysis('Mon, 01 Jan 2024 00:00:00 GMT', days=40))
+    second, second_docs = codec.encode(analysis('Mon, 01 Jan 2024 00:01:00 GMT', days=39))
+
+    # Date e days_to_expiry ficam na linha; o resto é o mesmo documento
+    assert dict(first_docs) == dict(second_docs)
+    assert isinstance(first, bytes) and first != second
+    assert references(first) == {digest.hex() for digest, _ in first_docs}
+
+    docs = dict(first_docs)
+    decoded = codec.decode(second, lambda hashes: {h: docs[h] for h in hashes if h in docs})
+    assert decoded == analysis('Mon, 01 Jan 2024 00:01:00 GMT', days=39)
+
+def test_missing_document_is_reported():
+    """Testa uma referência sem documento no banco"""
+    row, _ = BlobCodec('json').encode(analysis('Mon, 01 Jan 2024 00:00:00 GMT'))
+    decoded = BlobCodec().decode(row, lambda hashes: {})
+    assert decoded['seo_metrics'] == {'error': 'Missing shared document'}
+
+def test_unknown_codec():
+    with pytest.raises(ValueError):
+        BlobCodec('zstd')
+    with pytest.raises(ValueError):
+        unpack(b'\x09abc')
+
+def test_database_deduplicates_documents(test_db):
+    """Testa que análises repetidas não gravam de novo os documentos compartilhados"""
+    for minute in range(5):
+        test_db.save_metrics('https://example.com', analysis(f'Mon, 01 Jan 2024 00:0{minute}:00 GMT'))
+
+    with sqlite3.connect(test_db.db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM metric_docs").fetchone()[0] == 3
+
+    latest = json.loads(test_db.get_metrics('https://example.com')[0][5])
+    assert latest['basic_metrics']['headers']['Date'] == 'Mon, 01 Jan 2024 00:04:00 GMT'
+    assert [item['metrics_data'] for item, _ in test_db.iter_history('https://example.com', fields=['metrics_data'], limit=1)] == [latest]
+
+def test_documents_are_reference_counted(test_db):
+    """Testa que apagar linhas desconta as referências e só libera documentos sem uso"""
+    for minute in range(5):
+        test_db.save_metrics('https://example.com', analysis(f'Mon, 01 Jan 2024 00:0{minute}:00 GMT'))
+    with sqlite3.connect(test_db.db_path) as conn:
+        conn.execute("UPDATE metrics SET timestamp = '2000-01-01T00:00:0' || id")
+
+    refs = lambda: sorted(r for (r,) in sqlite3.connect(test_db.db_path).execute('SELECT refs FROM metric_docs'))
+    assert refs() == [5, 5, 5]
+
+    assert test_db.expire_metrics('2000-01-01T00:00:03', limit=10) == 2
+    assert refs() == [3, 3, 3]
+    assert test_db.collect_docs() == 0
+
+    assert test_db.expire_metrics('2001-01-01', limit=10) == 3
+    assert refs() == [0, 0, 0]
+    assert test_db.release_docs(limit=2) == 2
+    assert test_db.collect_docs() == 1
+    assert refs() == []
+
+@pytest.mark.parametrize('codec', ['json', 'zlib'])
+def test_repeated_compact_keeps_reference_counts(codec):
+    """Testa que compactar de novo (e trocar de codec) não soma referências que nunca saem"""
+    db_path = f'test_compact_{codec}.db'
+    for path in (db_path, db_path + '-wal', db_path + '-shm'):
+        if os.path.exists(path):
+            os.remove(path)
+    db = Database(db_path, blob_codec='json')
+    refs = lambda: sorted(r for (r,) in sqlite3.connect(db_path).execute('SELECT refs FROM metric_docs'))
+    try:
+        db.save_metrics('https://example.com', analysis('Mon, 01 Jan 2024 00:00:00 GMT'))
+        assert refs() == [1, 1, 1]
+
+        # Linhas já gravadas com documentos: 'json' não regrava, 'zlib' converte
+        db.blobs.codec = codec
+        assert db.compact()['rows'] == (0 if codec == 'json' else 1)
+        assert db.compact()['rows'] == 0
+        assert refs() == [1, 1, 1]
+        assert db.get_metrics('https://example.com')
+
+        assert db.expire_metrics('9999', limit=10) == 1
+        assert refs() == [0, 0, 0]
+        assert db.collect_docs() == 3
+        assert refs() == []
+    finally:
+        db.close()
+        for path in (db_path, db_path + '-wal', db_path + '-shm'):
+            if os.path.exists(path):
+                os.remove(path)
+
+def test_compact_converts_legacy_rows_and_collects_documents(test_db):
+    """Testa a conversão de linhas em texto e a remoção de documentos órfãos"""
+    legacy = analysis('Mon, 01 Jan 2024 00:00:00 GMT')
+    with sqlite3.connect(test_db.db_path) as conn:
+        url_id = conn.execute("INSERT INTO urls (url) VALUES ('https://example.com')").lastrowid
+        conn.executemany(
+            "INSERT INTO metrics (url, url_id, timestamp, metrics_data) VALUES ('https://example.com', ?, ?, ?)",
+            [(url_id, '2024-01-01T00:00:00', json.dumps(legacy)), (url_id, '2024-01-01T00:00:01', 'not json')]
+        )
+        conn.execute("INSERT INTO metric_docs (hash, data) VALUES (?, ?)", (b'\x00' * 16, '{}'))
+
+    # Um texto legado continua legível antes da conversão
+    assert json.loads(test_db.get_metrics('https://example.com')[1][5]) == legacy
+
+    stats = test_db.compact(batch_size=1)
+    assert stats['rows'] == 1
+    assert stats['docs_added'] == 3
+    assert stats['docs_removed'] == 1
+    assert stats['bytes_after'] < stats['bytes_before']
+
+    with sqlite3.connect(test_db.db_path) as conn:
+        kinds = [kind for (kind,) in conn.execute("SELECT typeof(metrics_data) FROM metrics ORDER BY id")]
+    assert kinds == ['blob', 'text']
+    assert json.loads(test_db.get_metrics('https://example.com')[1][5]) == legacy
+
+    test_db.vacuum()
+    assert test_db.size() > 0
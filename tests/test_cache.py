@@ -0,0 +1,75 @@
+import threading
+import time
+from app.analyzer.cache import ResultCache, normalize_url, is_fresh
+
+def test_normalize_url():
+    assert normalize_url('HTTPS://Example.com:443') == 'https://example.com/'
+    assert normalize_url('http://example.com:8080/a?b=1#top') == 'http://example.com:8080/a?b=1'
+
+def test_hit_after_miss():
+    cache = ResultCache(ttl=60)
+    calls = []
+    
+    value, info = cache.get_or_compute('https://example.com', lambda: calls.append(1) or {'ok': True})
+    assert info == {'hit': False, 'age': 0}
+    
+    value, info = cache.get_or_compute('https://EXAMPLE.com/', lambda: calls.append(1) or {'ok': True})
+    assert value == {'ok': True}
+    assert info['hit'] is True
+    assert info['age'] >= 0
+    assert len(calls) == 1
+    assert cache.stats()['hits'] == 1
+
+def test_entries_expire_after_ttl():
+    cache = ResultCache(ttl=0.05)
+    cache.get_or_compute('https://example.com', lambda: 1)
+    time.sleep(0.1)
+    
+    _, info = cache.get_or_compute('https://example.com', lambda: 2)
+    
+    assert info['hit'] is False
+
+def test_lru_eviction():
+    cache = ResultCache(ttl=60, max_entries=2)
+    for url in ('https://a.com', 'https://b.com'):
+        cache.get_or_compute(url, lambda: url)
+    cache.get_or_compute('https://a.com', lambda: None)  # a.com passa a ser o mais recente
+    cache.get_or_compute('https://c.com', lambda: 'c')
+    
+    _, info = cache.get_or_compute('https://a.com', lambda: None)
+    assert info['hit'] is True
+    _, info = cache.get_or_compute('https://b.com', lambda: 'b')
+    assert info['hit'] is False
+    assert cache.stats()['evictions'] >= 1
+
+def test_concurrent_requests_are_coalesced():
+    cache = ResultCache(ttl=60)
+    calls = []
+    results = []
+    
+    def slow():
+        calls.append(1)
+        time.sleep(0.1)
+        return {'ok': True}
+    
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_compute('https://example.com', slow)))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert len(calls) == 1
+    assert all(value == {'ok': True} for value, _ in results)
+    assert sum(1 for value, info in results if info.get('coalesced')) == 4
+    assert sum(1 for value, info in results if is_fresh({'cache': info})) == 1
+
+def test_uncacheable_results_are_not_stored():
+    cache = ResultCache(ttl=60)
+    cache.get_or_compute('https://example.com', lambda: {'error': 'x'}, cacheable=lambda v: 'error' not in v)
+    
+    _, info = cache.get_or_compute('https://example.com', lambda: {})
+    
+    assert info['hit'] is False
@@ -0,0 +1,79 @@
+import sqlite3
+import threading
+import pytest
+from app.database.connection import ConnectionManager, WriteQueue
+from app.database.db import Database
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = ConnectionManager(str(tmp_path / 'conn.db'))
+    manager.connection().execute('CREATE TABLE items (value INTEGER UNIQUE)')
+    yield manager
+    manager.close()
+
+def test_connection_is_reused_per_thread_in_wal_mode(manager):
+    conn = manager.connection()
+    other = []
+    thread = threading.Thread(target=lambda: other.append(manager.connection()))
+    thread.start()
+    thread.join()
+    
+    assert manager.connection() is conn
+    assert other[0] is not conn
+    assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+def test_connections_close_when_their_thread_exits(manager):
+    """Testa que threads de curta duração não acumulam conexões abertas"""
+    opened = []
+    for _ in range(20):
+        thread = threading.Thread(target=lambda: opened.append(manager.connection()))
+        thread.start()
+        thread.join()
+    
+    assert manager.open_connections() == 1  # só a da thread principal
+    with pytest.raises(sqlite3.ProgrammingError):
+        opened[0].execute('SELECT 1')
+    assert manager.connection().execute('SELECT COUNT(*) FROM items').fetchone() == (0,)
+
+def test_concurrent_writes_are_group_committed(manager):
+    writer = WriteQueue(manager)
+    
+    def insert(value):
+        writer.execute(lambda cursor: cursor.execute('INSERT INTO items VALUES (?)', (value,)))
+    
+    threads = [
+        threading.Thread(target=lambda start=start: [insert(start + i) for i in range(50)])
+        for start in range(0, 400, 50)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    writer.close()
+    
+    stats = writer.stats()
+    assert manager.connection().execute('SELECT COUNT(*) FROM items').fetchone()[0] == 400
+    assert stats['writes'] == 400
+    assert stats['commits'] <= 400
+
+def test_failed_write_does_not_affect_the_batch(manager):
+    writer = WriteQueue(manager)
+    good = writer.submit(lambda cursor: cursor.execute('INSERT INTO items VALUES (1)'))
+    bad = writer.submit(lambda cursor: cursor.execute('INSERT INTO items VALUES (1)'))
+    other = writer.submit(lambda cursor: cursor.execute('INSERT INTO items VALUES (2)'))
+    
+    good.result()
+    other.result()
+    with pytest.raises(sqlite3.IntegrityError):
+        bad.result()
+    writer.close()
+    assert manager.connection().execute('SELECT COUNT(*) FROM items').fetchone()[0] == 2
+
+def test_memory_database_is_shared_between_threads():
+    db = Database(':memory:')
+    thread = threading.Thread(target=lambda: db.save_metrics('https://example.com', {'basic_metrics': {}}))
+    thread.start()
+    thread.join()
+    
+    assert len(db.get_metrics(url='https://example.com')) == 1
+    db.close()
@@ -3,6 +3,8 @@ import sqlite3
 import json
 from datetime import datetime
 from app.database.db import Database
+from app.database.migrations import SCHEMA_VERSION, migrate
+import threading
 import os
 
 @pytest.fixture
@@ -14,8 +16,10 @@ def test_db():
     db = Database(db_path)
     yield db
     # Limpeza após os testes
-    if os.path.exists(db_path):
-        os.remove(db_path)
+    db.close()
+    for path in (db_path, db_path + "-wal", db_path + "-shm"):
+        if os.path.exists(path):
+            os.remove(path)
 
 @pytest.fixture
 def sample_metrics():
@@ -59,8 +63,9 @@ def test_save_metrics(test_db, sample_metrics):
         assert row[3] == 200  # response_time
         assert row[4] == 200  # status_code
         
-        # Verifica se os dados JSON foram salvos corretamente
-        saved_metrics = json.loads(row[5])  # metrics_data
+        # metrics_data é gravado compactado e volta como o JSON original
+        assert isinstance(row[5], bytes)
+        saved_metrics = json.loads(test_db.get_metrics(url)[0][5])
         assert saved_metrics == sample_metrics
 
 def test_get_metrics_with_url(test_db, sample_metrics):
@@ -128,3 +133,131 @@ def test_save_metrics_with_missing_data(test_db):
     assert len(results) == 1
     assert results[0][3] is None  # response_time should be NULL
     assert results[0][4] is None  # status_code should be NULL
+
+def test_save_many(test_db, sample_metrics):
+    """Testa a gravação em lote em uma única transação"""
+    items = [(f"https://example{i}.com", sample_metrics) for i in range(5)]
+    
+    test_db.save_many(items)
+    
+    results = test_db.get_metrics()
+    assert len(results) == 5
+    assert {row[1] for row in results} == {url for url, _ in items}
+
+def test_schema_version_and_indexes(test_db):
+    """Testa se o banco novo já nasce na última versão do esquema"""
+    with sqlite3.connect(test_db.db_path) as conn:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        indexes = {row[1] for row in conn.execute("PRAGMA index_list(metrics)")}
+    
+    assert version == SCHEMA_VERSION
+    assert 'idx_metrics_url_timestamp' in indexes
+
+def test_save_metrics_extracts_hot_fields(test_db):
+    """Testa a extração dos campos mais consultados para colunas próprias"""
+    metrics = {
+        'basic_metrics': {'response_time': 120, 'status_code': 200, 'content_size': 2048},
+        'dns_metrics': {'dns_time': 12},
+        'ssl_metrics': {'error': 'SSL analysis failed'},
+        'health_check': {'overall': 'warning'}
+    }
+    test_db.save_metrics("https://example.com", metrics)
+    
+    with sqlite3.connect(test_db.db_path) as conn:
+        row = conn.execute('''
+            SELECT urls.url, dns_time, tls_time, content_size, health_status
+            FROM metrics JOIN urls ON urls.id = metrics.url_id
+        ''').fetchone()
+    
+    assert row == ("https://example.com", 12, None, 2048, 'warning')
+
+def test_migrates_legacy_database(sample_metrics):
+    """Testa a migração de um banco criado antes do versionamento"""
+    db_path = "test_legacy.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    with sqlite3.connect(db_path) as conn:
+        conn.execute('''
+            CREATE TABLE metrics (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL,
+                timestamp TEXT NOT NULL,
+                response_time INTEGER,
+                status_code INTEGER,
+                metrics_data TEXT
+            )
+        ''')
+        legacy = dict(sample_metrics, dns_metrics={'dns_time': 7})
+        conn.execute(
+            "INSERT INTO metrics (url, timestamp, response_time, status_code, metrics_data) VALUES (?, ?, ?, ?, ?)",
+            ("https://example.com", datetime.utcnow().isoformat(), 200, 200, json.dumps(legacy))
+        )
+    
+    try:
+        db = Database(db_path)
+        
+        assert db.schema_version == SCHEMA_VERSION
+        results = db.get_metrics(url="https://example.com")
+        assert len(results) == 1
+        with sqlite3.connect(db_path) as conn:
+            assert conn.execute("SELECT dns_time FROM metrics").fetchone()[0] == 7
+            # Agregados preenchidos a partir do histórico: um por resolução
+            assert conn.execute("SELECT COUNT(*) FROM rollups").fetchone()[0] == 3
+        db.close()
+    finally:
+        for path in (db_path, db_path + "-wal", db_path + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+
+def test_concurrent_migrations_apply_once(tmp_path):
+    """Testa que processos abrindo o mesmo banco novo não aplicam uma versão duas vezes"""
+    db_path = str(tmp_path / 'concurrent.db')
+    barrier = threading.Barrier(4)
+    versions, errors = [], []
+
+    def open_database():
+        conn = sqlite3.connect(db_path, timeout=10)
+        try:
+            barrier.wait()
+            versions.append(migrate(conn))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            conn.close()
+
+    threads = [threading.Thread(target=open_database) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert versions == [SCHEMA_VERSION] * 4
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute('PRAGMA user_version').fetchone()[0] == SCHEMA_VERSION
+        # Rodar de novo não faz nada
+        assert migrate(conn) == SCHEMA_VERSION
+
+def test_iter_history_projection_and_pagination(test_db, sample_metrics):
+    """Testa a paginação por cursor e a projeção de colunas do histórico"""
+    url = "https://example.com"
+    for _ in range(5):
+        test_db.save_metrics(url, sample_metrics)
+    
+    page = list(test_db.iter_history(url, fields=['response_time'], limit=3))
+    assert len(page) == 3
+    assert all(item == {'response_time': 200} for item, _ in page)
+    
+    rest = list(test_db.iter_history(url, fields=['response_time'], cursor=page[-1][1], limit=3))
+    assert len(rest) == 2
+    
+    with pytest.raises(ValueError):
+        list(test_db.iter_history(url, fields=['headers']))
+
+def test_iter_history_time_range(test_db, sample_metrics):
+    """Testa o filtro por intervalo de tempo"""
+    url = "https://example.com"
+    test_db.save_metrics(url, sample_metrics)
+    
+    assert len(list(test_db.iter_history(url, since='2000-01-01'))) == 1
+    assert len(list(test_db.iter_history(url, until='2000-01-01'))) == 0
@@ -0,0 +1,93 @@
+import pytest
+from app.analyzer.extract import extract_page
+
+PAGE = '''
+<html>
+    <head>
+        <title> Página de Teste </title>
+        <meta content="Descrição" name="description">
+        <link href="a.css" rel="stylesheet">
+        <link rel="preload stylesheet" href="b.css">
+        <link rel="icon" href="favicon.ico">
+        <script src="app.js"></script>
+    </head>
+    <body>
+        <h1>Título</h1>
+        <img src="a.jpg" alt="a">
+        <img src="b.jpg">
+        <IMG SRC="c.jpg" alt="">
+    </body>
+</html>
+'''.encode('utf-8')
+
+def chunked(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+@pytest.mark.parametrize('backend', ['html.parser', 'lxml'])
+def test_extract_page_fields(backend):
+    if backend == 'lxml':
+        pytest.importorskip('lxml')
+    page = extract_page([PAGE], encoding='utf-8', backend=backend)
+
+    assert page['title'] == 'Página de Teste'
+    assert page['meta_description'] == 'Descrição'
+    assert page['h1_count'] == 1
+    assert page['images'] == 3
+    assert page['images_without_alt'] == 2
+    assert page['scripts'] == 1
+    # rel com vários valores e atributos em qualquer ordem
+    assert page['stylesheets'] == 2
+    assert page['truncated'] is False
+
+def test_chunk_boundaries_do_not_change_result():
+    # Blocos de 3 bytes cortam tags e caracteres multibyte ao meio
+    whole = extract_page([PAGE], encoding='utf-8', backend='html.parser')
+    split = extract_page(chunked(PAGE, 3), encoding='utf-8', backend='html.parser')
+
+    assert split == whole
+
+def test_truncates_at_max_bytes():
+    body = b'<html><body>' + b'<img src="x.jpg">' * 1000 + b'</body></html>'
+
+    page = extract_page(chunked(body, 100), max_bytes=12 + 17 * 10, backend='html.parser')
+
+    assert page['truncated'] is True
+    assert page['parsed_bytes'] == 12 + 17 * 10
+    assert page['images'] == 10
+
+def test_unknown_encoding_falls_back_to_utf8():
+    page = extract_page([b'<title>ok</title>'], encoding='not-a-charset', backend='html.parser')
+
+    assert page['title'] == 'ok'
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        extract_page([b''], backend='nope')
+
+@pytest.mark.parametrize('backend', ['html.parser', 'lxml'])
+def test_empty_body(backend):
+    if backend == 'lxml':
+        pytest.importorskip('lxml')
+    page = extract_page([], backend=backend)
+
+    assert page['title'] is None
+    assert page['images'] == 0
+
+def test_collects_resource_urls():
+    html = b'''
+        <base href="https://cdn.example.com/">
+        <link rel="preload" as="font" href="f.woff2">
+        <link rel="icon" href="favicon.ico">
+        <video poster="poster.jpg"><source src="clip.mp4"></video>
+        <picture><source srcset="a.webp"><img src="a.jpg"></picture>
+    '''
+    page = extract_page([html], backend='html.parser')
+
+    assert page['base_url'] == 'https://cdn.example.com/'
+    assert page['resources'] == [
+        ('font', 'f.woff2'),
+        ('image', 'favicon.ico'),
+        ('image', 'poster.jpg'),
+        ('media', 'clip.mp4'),
+        ('image', 'a.jpg')
+    ]
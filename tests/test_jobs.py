@@ -0,0 +1,80 @@
+import threading
+import time
+import pytest
+from unittest.mock import Mock
+from app.database.db import Database
+from app.jobs.queue import JobQueue, QueueFullError
+
+@pytest.fixture
+def test_db(tmp_path):
+    return Database(str(tmp_path / 'jobs.db'))
+
+def wait_finished(job, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not job.finished and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return job
+
+def test_job_runs_and_saves_result(test_db):
+    analyzer = Mock()
+    analyzer.analyze_url.return_value = {'basic_metrics': {'response_time': 120, 'status_code': 200}}
+    jobs = JobQueue(analyzer, test_db, workers=2)
+    
+    job = jobs.submit('https://example.com')
+    
+    assert jobs.get(job.id) is job
+    wait_finished(job)
+    assert job.status == 'done'
+    assert job.result['basic_metrics']['status_code'] == 200
+    assert len(test_db.get_metrics(url='https://example.com')) == 1
+    assert jobs.stats()['completed'] == 1
+    analyzer.analyze_url.assert_called_once_with('https://example.com', mode='audit', stages=None)
+
+def test_failed_analysis_marks_job_failed(test_db):
+    analyzer = Mock()
+    analyzer.analyze_url.return_value = {'error': 'DNS failure'}
+    jobs = JobQueue(analyzer, test_db, workers=1)
+    
+    job = wait_finished(jobs.submit('https://invalid.example'))
+    
+    assert job.status == 'failed'
+    assert job.error == 'DNS failure'
+    assert jobs.stats()['failed'] == 1
+
+def test_queue_depth_and_backpressure(test_db):
+    release = threading.Event()
+    analyzer = Mock()
+    analyzer.analyze_url.side_effect = lambda url, **options: release.wait() and {}
+    jobs = JobQueue(analyzer, test_db, workers=1, max_queue=1)
+    
+    jobs.submit('https://a.com')
+    time.sleep(0.05)
+    jobs.submit('https://b.com')
+    
+    stats = jobs.stats()
+    assert stats['busy_workers'] == 1
+    assert stats['queue_depth'] == 1
+    assert stats['utilization'] == 1.0
+    with pytest.raises(QueueFullError):
+        jobs.submit('https://c.com')
+    release.set()
+
+def test_jobs_are_visible_from_another_worker(test_db):
+    """Testa que o polling encontra o job num worker diferente do que o aceitou"""
+    analyzer = Mock()
+    analyzer.analyze_url.return_value = {'basic_metrics': {'response_time': 120, 'status_code': 200}}
+    accepting = JobQueue(analyzer, test_db, workers=1)
+    other = JobQueue(Mock(), test_db, workers=1)
+    
+    job = accepting.submit('https://example.com', mode='audit', stages=['dns'])
+    assert other.get(job.id).status in ('queued', 'running', 'done')
+    wait_finished(job)
+    
+    shared = other.get(job.id)
+    assert shared.to_dict() == job.to_dict()
+    assert shared.result == job.result
+    assert other.get('unknown') is None
+    
+    # Terminados há mais de result_ttl saem do banco também
+    test_db.expire_jobs('9999')
+    assert other.get(job.id) is None
@@ -0,0 +1,105 @@
+import threading
+import time
+import pytest
+from unittest.mock import Mock
+from app.database.db import Database
+from app.monitor.monitor import Monitor
+from app.monitor.wheel import TimingWheel
+
+@pytest.fixture
+def test_db(tmp_path):
+    db = Database(str(tmp_path / 'monitor.db'))
+    yield db
+    db.close()
+
+def wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+def test_wheel_returns_items_when_due():
+    wheel = TimingWheel(tick=1.0, slots=4)
+    wheel.schedule('soon', 2)
+    # Mais de uma volta da roda: fica no slot até o tick certo
+    wheel.schedule('later', 6)
+
+    due = [wheel.advance() for _ in range(6)]
+
+    assert due == [[], ['soon'], [], [], [], ['later']]
+    assert len(wheel) == 0
+
+def test_targets_are_persisted(test_db):
+    test_db.add_targets([('https://a.com', 60), ('https://b.com', 30)])
+    test_db.add_target('https://a.com', interval=120)
+
+    assert test_db.remove_target('https://b.com') is True
+    assert test_db.remove_target('https://b.com') is False
+    assert test_db.get_targets() == [{'url': 'https://a.com', 'mode': 'audit', 'interval': 120, 'enabled': True}]
+
+def test_same_url_can_have_probe_and_audit_targets(test_db):
+    test_db.add_targets([('https://a.com', 3600), ('https://a.com', 30, 'probe')])
+    analyzer = Mock()
+    analyzer.analyze_url.return_value = {}
+    monitor = Monitor(analyzer, test_db, tick=1, jitter=0)
+
+    monitor.refresh()
+    assert monitor.stats()['targets'] == 2
+
+    assert test_db.remove_target('https://a.com', mode='probe') is True
+    assert [target['mode'] for target in test_db.get_targets()] == ['audit']
+
+def test_due_targets_are_checked_and_saved(test_db):
+    test_db.add_targets([('https://a.com', 1), ('https://b.com', 1)])
+    analyzer = Mock()
+    analyzer.analyze_url.return_value = {'basic_metrics': {'response_time': 100, 'status_code': 200}}
+    monitor = Monitor(analyzer, test_db, workers=2, tick=1, jitter=0)
+
+    monitor.refresh()
+    monitor.tick()
+
+    assert wait_for(lambda: monitor.stats()['checks'] == 2)
+    assert len(test_db.get_metrics(url='https://a.com')) == 1
+    analyzer.analyze_url.assert_any_call('https://a.com', use_cache=False, mode='audit')
+    # Reagendados para a próxima rodada
+    assert monitor.stats()['scheduled'] == 2
+
+def test_failed_checks_are_recorded(test_db):
+    test_db.add_target('https://down.com', interval=1)
+    analyzer = Mock()
+    analyzer.analyze_url.side_effect = Exception('connection refused')
+    monitor = Monitor(analyzer, test_db, workers=1, tick=1, jitter=0)
+
+    monitor.refresh()
+    monitor.tick()
+
+    assert wait_for(lambda: monitor.stats()['failures'] == 1)
+    assert wait_for(lambda: len(test_db.get_metrics(url='https://down.com')) == 1)
+
+def test_backpressure_skips_instead_of_queueing(test_db):
+    test_db.add_targets([(f'https://site{i}.com', 1) for i in range(3)])
+    release = threading.Event()
+    analyzer = Mock()
+    analyzer.analyze_url.side_effect = lambda url, **kwargs: release.wait() and {}
+    monitor = Monitor(analyzer, test_db, workers=1, max_pending=1, tick=1, jitter=0)
+
+    monitor.refresh()
+    monitor.tick()
+    stats = monitor.stats()
+    release.set()
+
+    assert stats['in_flight'] == 1
+    assert stats['skipped'] == 2
+
+def test_removed_targets_stop_being_checked(test_db):
+    test_db.add_target('https://gone.com', interval=1)
+    analyzer = Mock()
+    monitor = Monitor(analyzer, test_db, tick=1, jitter=0)
+
+    monitor.refresh()
+    test_db.remove_target('https://gone.com')
+    monitor.refresh()
+    monitor.tick()
+
+    assert analyzer.analyze_url.call_count == 0
+    assert monitor.stats()['targets'] == 0
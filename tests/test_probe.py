@@ -0,0 +1,51 @@
+import pytest
+from app.analyzer.performance import PerformanceAnalyzer
+from app.analyzer.probe import probe
+from app.analyzer.session import SessionPool
+
+def test_head_probe_does_not_download_the_page(http_server):
+    http = SessionPool(max_retries=0)
+
+    result = probe(http, f'{http_server.url}/')
+
+    assert result['status_code'] == 200
+    assert result['method'] == 'head'
+    assert result['timing']['ttfb'] >= 0
+    assert http_server.hits == ['/']
+
+def test_head_probe_falls_back_to_ranged_get(http_server):
+    http = SessionPool(max_retries=0)
+
+    # /static/nohead.jpg recusa HEAD com 405
+    result = probe(http, f'{http_server.url}/static/nohead.jpg')
+
+    assert result['method'] == 'range'
+    assert result['status_code'] == 200
+
+def test_probes_reuse_connections(http_server):
+    http = SessionPool(max_retries=0)
+
+    for _ in range(3):
+        probe(http, f'{http_server.url}/')
+
+    assert http.stats()['connections_reused'] == 2
+
+def test_unknown_probe_method():
+    with pytest.raises(ValueError):
+        probe(SessionPool(), 'https://example.com', method='options')
+
+def test_analyze_url_probe_mode(http_server):
+    analyzer = PerformanceAnalyzer()
+
+    result = analyzer.analyze_url(f'{http_server.url}/', mode='probe')
+
+    assert result['mode'] == 'probe'
+    assert result['basic_metrics']['status_code'] == 200
+    assert result['health_check']['availability'] == 'good'
+    # Nada de SEO, segurança nem recursos; robots.txt e sitemap.xml não são buscados
+    assert 'seo_metrics' not in result
+    assert http_server.hits == ['/']
+
+def test_analyze_url_rejects_unknown_mode():
+    with pytest.raises(ValueError):
+        PerformanceAnalyzer().analyze_url('https://example.com', mode='deep')
@@ -0,0 +1,71 @@
+import pytest
+from unittest.mock import patch
+from app.analyzer.performance import PerformanceAnalyzer
+from app.analyzer.registry import AnalyzerRegistry, parse_stages, registry
+
+def test_resolve_pulls_in_inputs_by_alias():
+    names = [plugin.name for plugin in registry.resolve(['security'])]
+
+    assert sorted(names) == ['basic_metrics', 'security_metrics', 'ssl_metrics']
+
+def test_unknown_stage_is_rejected():
+    with pytest.raises(ValueError):
+        registry.resolve(['basic', 'nope'])
+
+def test_parse_stages():
+    assert parse_stages('basic, dns') == ['basic', 'dns']
+    assert parse_stages(['seo']) == ['seo']
+    assert parse_stages('') is None
+    with pytest.raises(ValueError):
+        parse_stages([1, 2])
+
+def test_builtin_stages_are_described():
+    described = {stage['name']: stage for stage in registry.describe()}
+
+    assert described['security_metrics']['inputs'] == ['basic_metrics', 'ssl_metrics']
+    assert described['resource_metrics']['cost'] == 'crawl'
+    assert described['dns_metrics']['schema']['ipv6'] == 'list'
+
+def test_custom_plugin_runs_in_analysis():
+    custom = AnalyzerRegistry()
+    custom.stage('answer', cost='local')(lambda analyzer, ctx, inputs: {'value': 42})
+    analyzer = PerformanceAnalyzer(registry=custom)
+
+    result = analyzer.analyze_url('https://example.com', use_cache=False)
+
+    assert result['answer'] == {'value': 42}
+    assert result['health_check'] == {'overall': 'good'}
+
+@patch('requests.Session.get')
+def test_selected_stages_skip_the_page_fetch(mock_get, stub_resolver):
+    analyzer = PerformanceAnalyzer(resolver=stub_resolver)
+
+    result = analyzer.analyze_url('https://example.com', stages='dns')
+
+    assert mock_get.call_count == 0
+    assert result['dns_metrics']['ip'] == '93.184.216.34'
+    assert 'seo_metrics' not in result
+    assert result['health_check'] == {'overall': 'good'}
+    assert result['recommendations'] == []
+
+def test_stage_subsets_are_cached_separately(stub_resolver):
+    analyzer = PerformanceAnalyzer(resolver=stub_resolver)
+
+    first = analyzer.analyze_url('https://example.com', stages='dns')
+    again = analyzer.analyze_url('https://example.com', stages=['dns_metrics'])
+
+    assert first['cache']['hit'] is False
+    assert again['cache']['hit'] is True
+    assert analyzer.cache.stats()['entries'] == 1
+
+def test_report_order_does_not_depend_on_imports():
+    assert registry.report_names() == (
+        'basic_metrics', 'dns_metrics', 'ssl_metrics', 'resource_metrics',
+        'seo_metrics', 'security_metrics', 'availability_metrics'
+    )
+
+    custom = AnalyzerRegistry()
+    custom.stage('late', cost='local')(lambda analyzer, ctx, inputs: None)
+    custom.stage('second', cost='local', order=2)(lambda analyzer, ctx, inputs: None)
+    custom.stage('first', cost='local', order=1)(lambda analyzer, ctx, inputs: None)
+    assert custom.report_names() == ('first', 'second', 'late')
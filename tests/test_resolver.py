@@ -0,0 +1,92 @@
+import socket
+import threading
+import time
+from app.analyzer.fetch import FetchContext
+from app.analyzer.resolver import Resolver
+from app.analyzer.session import SessionPool
+
+def test_resolves_both_families_with_answer_ttl(stub_resolver):
+    result = stub_resolver.resolve('Example.com.')
+    
+    assert result['ipv4'] == ['93.184.216.34']
+    assert result['ipv6'] == ['2606:2800:220:1:248:1893:25c8:1946']
+    assert result['cached'] is False
+    # O menor TTL entre as respostas A e AAAA
+    assert 55 <= result['ttl'] <= 60
+    assert sorted(family for _, family in stub_resolver.calls) == ['ipv4', 'ipv6']
+
+def test_warm_lookups_hit_the_cache(stub_resolver):
+    cold = stub_resolver.resolve('example.com')
+    warm = stub_resolver.resolve('example.com')
+    
+    assert warm['cached'] is True
+    assert warm['resolution_time'] == cold['resolution_time']
+    assert len(stub_resolver.calls) == 2
+    assert stub_resolver.stats()['hits'] == 1
+
+def test_default_ttl_when_resolver_has_none(stub_resolver):
+    stub_resolver.ttl = 0
+    stub_resolver.resolve('v4only.example')
+    stub_resolver.resolve('v4only.example')
+    
+    # TTL zero: cada chamada consulta de novo
+    assert stub_resolver.calls.count(('v4only.example', 'ipv4')) == 2
+    assert stub_resolver.resolve('v4only.example')['ipv6'] == []
+
+def test_failures_are_cached_negatively(stub_resolver):
+    for _ in range(2):
+        try:
+            stub_resolver.resolve('missing.example')
+        except socket.gaierror:
+            pass
+        else:
+            raise AssertionError('expected gaierror')
+    
+    assert len(stub_resolver.calls) == 2
+    assert stub_resolver.stats()['failures'] == 1
+
+def test_ip_literals_skip_lookup(stub_resolver):
+    assert stub_resolver.addresses('127.0.0.1') == ['127.0.0.1']
+    assert stub_resolver.calls == []
+
+def test_concurrent_lookups_are_coalesced():
+    started = threading.Event()
+    calls = []
+    
+    def slow_lookup(host, family):
+        calls.append(family)
+        started.set()
+        time.sleep(0.1)
+        return (['192.0.2.1'], 60) if family == 'ipv4' else ([], 60)
+    
+    resolver = Resolver(lookup=slow_lookup)
+    threads = [threading.Thread(target=resolver.resolve, args=('a.example',)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert sorted(calls) == ['ipv4', 'ipv6']
+    assert resolver.stats()['coalesced'] + resolver.stats()['hits'] == 4
+    resolver.close()
+
+def test_connection_pool_resolves_through_the_cache(http_server):
+    def lookup(host, family):
+        calls.append(host)
+        return (['127.0.0.1'], 60) if family == 'ipv4' else ([], 60)
+    
+    calls = []
+    resolver = Resolver(lookup=lookup)
+    pool = SessionPool(resolver=resolver)
+    url = http_server.url.replace('127.0.0.1', 'stand-in.test')
+    
+    ctx = FetchContext(f'{url}/', session=pool)
+    assert ctx.response.status_code == 200
+    # Conexão nova, sem rastreamento, pelo mesmo cache
+    pool.session.close()
+    assert pool.get(f'{url}/other').status_code == 200
+    
+    assert calls == ['stand-in.test', 'stand-in.test']
+    assert resolver.stats()['hits'] >= 1
+    pool.close()
+    resolver.close()
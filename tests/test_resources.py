@@ -0,0 +1,63 @@
+from app.analyzer.extract import extract_page
+from app.analyzer.resources import ResourceCrawler, resolve_resources, summarize
+from app.analyzer.session import SessionPool
+from tests.conftest import RESOURCE_PAGE, RESOURCES
+
+def crawl(http_server, **kwargs):
+    page = extract_page([RESOURCE_PAGE], encoding='utf-8')
+    crawler = ResourceCrawler(SessionPool(max_retries=0), **kwargs)
+    return crawler.crawl(f'{http_server.url}/resources', page['resources'])
+
+def test_resolve_resources_dedupes_and_skips_data_urls():
+    resolved = resolve_resources('https://example.com/a/page', [
+        ('image', 'x.png'),
+        ('image', '/a/x.png#frag'),
+        ('script', 'https://cdn.example.com/app.js'),
+        ('image', 'data:image/png;base64,AAAA')
+    ])
+
+    assert resolved == {
+        'https://example.com/a/x.png': 'image',
+        'https://cdn.example.com/app.js': 'script'
+    }
+
+def test_crawl_measures_each_resource_type(http_server):
+    inventory = crawl(http_server)
+    by_type = inventory['by_type']
+
+    assert by_type['script'] == {'count': 1, 'bytes': len(RESOURCES['/static/app.js'][0]), 'compressed': 1, 'failed': 0}
+    assert by_type['style']['bytes'] == len(RESOURCES['/static/style.css'][0])
+    # A fonte é descoberta dentro da folha de estilo
+    assert by_type['font']['count'] == 1
+    assert by_type['font']['bytes'] == 300
+    # photo.jpg aparece duas vezes mas é medida uma só; missing.png falha
+    assert by_type['image'] == {'count': 3, 'bytes': 2500, 'compressed': 0, 'failed': 1}
+    assert inventory['uncompressed'] == [f'{http_server.url}/static/style.css']
+    assert inventory['largest'][0] == {
+        'url': f'{http_server.url}/static/photo.jpg', 'type': 'image', 'bytes': 2000
+    }
+
+def test_crawl_uses_head_and_falls_back_to_get(http_server):
+    crawl(http_server)
+
+    # Imagens só com HEAD; sem suporte a HEAD, o corpo é baixado
+    assert http_server.hits.count('/static/photo.jpg') == 1
+    assert http_server.hits.count('/static/nohead.jpg') == 2
+
+def test_crawl_respects_max_resources(http_server):
+    inventory = crawl(http_server, max_resources=2)
+
+    assert inventory['requests'] == 2
+    assert inventory['skipped'] == 4
+
+def test_summarize_orders_largest_first():
+    entries = [
+        {'url': 'a', 'type': 'image', 'bytes': 10, 'compressed': False},
+        {'url': 'b', 'type': 'media', 'bytes': 500, 'compressed': False},
+        {'url': 'c', 'type': 'script', 'bytes': 50, 'compressed': True}
+    ]
+
+    summary = summarize(entries, top=2)
+
+    assert summary['bytes'] == 560
+    assert [item['url'] for item in summary['largest']] == ['b', 'c']
@@ -0,0 +1,113 @@
+import os
+import random
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+import pytest
+from app.database.db import Database
+from app.database.retention import Retention, fcntl
+from app.database.rollup import pick_resolution
+
+def analysis(i):
+    return {
+        'basic_metrics': {'response_time': 100 + i, 'status_code': 200, 'headers': {'Server': f'nginx/{i}'}},
+        'seo_metrics': {'title': f'Page {i}', 'padding': 'x' * 4000},
+        # Incompressível e fora dos documentos: as linhas ocupam páginas de verdade
+        'payload': random.Random(i).randbytes(2000).hex()
+    }
+
+@pytest.fixture
+def test_db():
+    db_path = "test_retention.db"
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    db = Database(db_path)
+    yield db
+    db.close()
+    for path in (db_path, db_path + "-wal", db_path + "-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+
+def count(db, sql):
+    with sqlite3.connect(db.db_path) as conn:
+        return conn.execute(sql).fetchone()[0]
+
+def test_dry_run_then_expire(test_db):
+    """Testa o relatório sem alterações e a expiração em lotes"""
+    test_db.save_many([(f'https://site{i % 3}.example.com', analysis(i)) for i in range(20)])
+    retention = Retention(test_db, raw_days=30, rollup_days={'minute': 7, 'hour': 365}, batch_size=3, pause=0)
+    later = datetime.utcnow() + timedelta(days=40)
+
+    report = retention.run(dry_run=True, now=later)
+    assert report['metrics'] == 20
+    assert report['metrics_bytes'] > 0
+    assert report['rollups'] == {'minute': 3, 'hour': 0}
+    assert report['auto_vacuum'] == 'incremental'
+    assert report['docs_unreferenced'] == 0
+    assert count(test_db, 'SELECT COUNT(*) FROM metrics') == 20
+
+    # Nada vence antes do prazo
+    assert retention.run(now=datetime.utcnow())['metrics'] == 0
+
+    report = retention.run(now=later)
+    assert report['metrics'] == 20
+    assert report['rollups'] == {'minute': 3, 'hour': 0}
+    assert report['docs_removed'] == 40
+    assert report['pages_freed'] > 0
+    assert report['analyzed']
+
+    assert count(test_db, 'SELECT COUNT(*) FROM metrics') == 0
+    assert count(test_db, 'SELECT COUNT(*) FROM metric_docs') == 0
+    assert count(test_db, "SELECT COUNT(*) FROM rollups WHERE resolution = 'minute'") == 0
+    # Os agregados por hora e por dia continuam lá
+    assert count(test_db, "SELECT COUNT(*) FROM rollups WHERE resolution = 'day'") == 3
+    assert count(test_db, 'PRAGMA freelist_count') == 0
+    assert count(test_db, "SELECT COUNT(*) FROM sqlite_master WHERE name = 'sqlite_stat1'") == 1
+
+def test_expire_while_writing(test_db):
+    """Testa que as gravações da aplicação seguem durante a retenção"""
+    test_db.save_many([('https://old.example.com', analysis(i)) for i in range(200)])
+    with sqlite3.connect(test_db.db_path) as conn:
+        conn.execute("UPDATE metrics SET timestamp = '2000-01-01T00:00:00'")
+    retention = Retention(test_db, raw_days=1, batch_size=10, pause=0)
+
+    def write():
+        for i in range(50):
+            test_db.save_metrics('https://new.example.com', analysis(i))
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    report = retention.run()
+    writer.join()
+
+    assert report['metrics'] == 200
+    assert len(test_db.get_metrics('https://new.example.com')) == 50
+    assert test_db.get_metrics('https://old.example.com') == []
+
+def test_background_task_is_disabled_without_interval(test_db):
+    retention = Retention(test_db, interval=0)
+    retention.start()
+    assert retention._thread is None
+    retention.stop()
+
+def test_expired_resolutions_are_skipped():
+    """Testa que janelas antigas caem para a resolução ainda mantida"""
+    until = datetime.utcnow()
+    since = until - timedelta(days=10)
+    assert pick_resolution(since, until, 1000) == 'hour'
+    assert pick_resolution(since, until, 100000) == 'minute'
+    assert pick_resolution(since, until, 100000, {'minute': 7}) == 'hour'
+
+def test_only_one_process_runs_background_retention(test_db, tmp_path):
+    """Testa que só o dono do flock faz a retenção e que outro assume quando ele para"""
+    lock_path = str(tmp_path / 'retention.lock')
+    first = Retention(test_db, lock_path=lock_path)
+    second = Retention(test_db, lock_path=lock_path)
+
+    assert first.is_leader() is True
+    assert first.is_leader() is True
+    assert second.is_leader() is (fcntl is None)
+
+    first.stop()
+    assert second.is_leader() is True
+    second.stop()
@@ -0,0 +1,64 @@
+import random
+from datetime import datetime, timedelta
+import pytest
+from app.database.db import Database
+from app.database.rollup import Sketch, pick_resolution
+
+@pytest.fixture
+def test_db(tmp_path):
+    db = Database(str(tmp_path / 'rollup.db'))
+    yield db
+    db.close()
+
+def test_sketch_quantiles_are_accurate():
+    values = [random.randint(1, 5000) for _ in range(10000)]
+    sketch = Sketch()
+    for value in values:
+        sketch.add(value)
+    
+    values.sort()
+    for q in (0.5, 0.95, 0.99):
+        exact = values[int(q * (len(values) - 1))]
+        assert abs(sketch.quantile(q) - exact) <= exact * 0.02 + 1
+
+def test_sketches_merge():
+    a, b = Sketch(), Sketch()
+    for value in range(1, 51):
+        a.add(value)
+    for value in range(51, 101):
+        b.add(value)
+    
+    merged = Sketch(a.state()).merge(b)
+    
+    assert merged.count == 100
+    assert merged.min == 1 and merged.max == 100
+    assert merged.summary()['mean'] == 50.5
+
+def test_pick_resolution():
+    now = datetime(2024, 6, 1)
+    assert pick_resolution(now - timedelta(hours=2), now, 500) == 'minute'
+    assert pick_resolution(now - timedelta(days=7), now, 500) == 'hour'
+    assert pick_resolution(now - timedelta(days=90), now, 500) == 'day'
+
+def test_rollups_update_incrementally(test_db):
+    url = 'https://example.com'
+    for response_time, status in ((100, 200), (300, 200), (500, 503)):
+        test_db.save_metrics(url, {
+            'basic_metrics': {'response_time': response_time, 'status_code': status},
+            'dns_metrics': {'dns_time': 10}
+        })
+    
+    since = (datetime.utcnow() - timedelta(hours=1)).isoformat()
+    series = test_db.get_rollups(url, since)
+    
+    assert series['resolution'] == 'minute'
+    total = sum(point['count'] for point in series['points'])
+    assert total == 3
+    point = series['points'][-1]
+    assert point['response_time']['max'] == 500
+    assert point['dns_time']['p50'] == 10
+    
+    day = test_db.get_rollups(url, (datetime.utcnow() - timedelta(days=90)).isoformat())
+    assert day['resolution'] == 'day'
+    assert day['points'][0]['count'] == 3
+    assert day['points'][0]['error_rate'] == round(1 / 3, 4)
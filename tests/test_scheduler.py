@@ -0,0 +1,121 @@
+import time
+import pytest
+from app.analyzer.scheduler import Stage, StageScheduler
+
+@pytest.fixture
+def scheduler():
+    return StageScheduler(default_timeout=5)
+
+def sleeper(value, delay=0.2):
+    def func(deps):
+        time.sleep(delay)
+        return value
+    return func
+
+def test_independent_stages_run_concurrently(scheduler):
+    stages = [Stage(name, sleeper(name)) for name in ('dns', 'ssl', 'robots', 'sitemap')]
+    
+    start = time.perf_counter()
+    run = scheduler.run(stages)
+    elapsed = time.perf_counter() - start
+    
+    assert run.results == {name: name for name in ('dns', 'ssl', 'robots', 'sitemap')}
+    # Próximo da etapa mais lenta, não da soma
+    assert elapsed < 0.6
+
+def test_dependencies_receive_inputs(scheduler):
+    stages = [
+        Stage('page', sleeper(10, 0.05)),
+        Stage('double', lambda deps: deps['page'] * 2, depends_on=('page',))
+    ]
+    
+    run = scheduler.run(stages)
+    
+    assert run.results['double'] == 20
+
+def test_stage_errors_are_isolated(scheduler):
+    def boom(deps):
+        raise RuntimeError('falhou')
+    
+    stages = [
+        Stage('bad', boom),
+        Stage('good', sleeper('ok', 0)),
+        Stage('after', lambda deps: deps, depends_on=('bad',))
+    ]
+    
+    run = scheduler.run(stages)
+    
+    assert run.errors == {'bad': 'falhou'}
+    assert run.results['good'] == 'ok'
+    assert run.results['after'] == {'bad': {'error': 'falhou'}}
+
+def test_stage_timeout(scheduler):
+    stages = [
+        Stage('slow', sleeper('late', 1), timeout=0.1),
+        Stage('fast', sleeper('ok', 0))
+    ]
+    
+    start = time.perf_counter()
+    run = scheduler.run(stages)
+    
+    assert time.perf_counter() - start < 0.5
+    assert 'timed out' in run.errors['slow']
+    assert run.get('slow') == {'error': run.errors['slow']}
+    assert run.results['fast'] == 'ok'
+
+def test_invalid_graph(scheduler):
+    with pytest.raises(ValueError):
+        scheduler.run([Stage('a', sleeper(1), depends_on=('missing',))])
+    with pytest.raises(ValueError):
+        scheduler.run([
+            Stage('a', sleeper(1), depends_on=('b',)),
+            Stage('b', sleeper(1), depends_on=('a',))
+        ])
+
+def test_timeout_fails_dependents(scheduler):
+    """Testa que as dependentes de uma etapa atrasada falham sem esperar por ela"""
+    calls = []
+    stages = [
+        Stage('fetch', sleeper('late', 1), timeout=0.1),
+        Stage('page', lambda deps: calls.append('page'), depends_on=('fetch',)),
+        Stage('links', lambda deps: calls.append('links'), depends_on=('page',)),
+        Stage('health', lambda deps: deps, depends_on=('fetch', 'page'), partial=True)
+    ]
+
+    start = time.perf_counter()
+    run = scheduler.run(stages)
+
+    assert time.perf_counter() - start < 0.5
+    assert calls == []
+    assert run.errors['page'] == 'Dependency fetch timed out'
+    assert run.errors['links'] == 'Dependency page timed out'
+    assert run.timed_out == {'fetch', 'page', 'links'}
+    assert run.results['health']['page'] == {'error': 'Dependency fetch timed out'}
+
+def test_executor_is_shared_and_queue_time_is_not_counted():
+    scheduler = StageScheduler(default_timeout=5, max_workers=1)
+    stages = [Stage(name, sleeper(name, 0.15), timeout=0.2) for name in ('a', 'b', 'c')]
+
+    run = scheduler.run(stages)
+    executor = scheduler.executor
+
+    # Em fila no pool de uma thread, nenhuma etapa estoura o tempo
+    assert run.errors == {}
+    assert run.results == {'a': 'a', 'b': 'b', 'c': 'c'}
+    assert scheduler.run([Stage('d', sleeper('d', 0))]).results == {'d': 'd'}
+    assert scheduler.executor is executor
+
+def test_optional_dependencies_tolerate_timeouts(scheduler):
+    stages = [
+        Stage('page', sleeper('html', 0)),
+        Stage('probe', sleeper('late', 1), timeout=0.1),
+        Stage('seo', lambda deps: deps, depends_on=('page', 'probe'), partial=('probe',)),
+        Stage('slow_page', sleeper('late', 1), timeout=0.1),
+        Stage('links', lambda deps: deps, depends_on=('slow_page', 'probe'), partial=('probe',))
+    ]
+
+    run = scheduler.run(stages)
+
+    assert run.results['seo'] == {'page': 'html', 'probe': {'error': run.errors['probe']}}
+    # Só as dependências listadas em partial são opcionais
+    assert run.errors['links'] == 'Dependency slow_page timed out'
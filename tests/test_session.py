@@ -0,0 +1,31 @@
+from app.analyzer.session import SessionPool
+from config import Config
+
+def test_pool_from_config():
+    pool = SessionPool.from_config(Config)
+    
+    assert pool.timeout == Config.HTTP_TIMEOUT
+    assert pool.adapter.max_retries.total == Config.HTTP_MAX_RETRIES
+    assert pool._timeout(10) == (Config.HTTP_CONNECT_TIMEOUT, 10)
+
+def test_connections_are_reused(http_server):
+    pool = SessionPool()
+    
+    for path in ('/', '/robots.txt', '/sitemap.xml'):
+        pool.get(f'{http_server.url}{path}')
+    
+    stats = pool.stats()
+    assert stats['requests'] == 3
+    assert stats['connections_opened'] == 1
+    assert stats['connections_reused'] == 2
+    assert len(stats['hosts']) == 1
+    pool.close()
+
+def test_cookies_do_not_leak_between_requests(http_server):
+    pool = SessionPool()
+    response = pool.get(f'{http_server.url}/cookie')
+    
+    # A resposta mantém o cookie, mas a sessão não o guarda
+    assert response.cookies.get('session') == 'abc'
+    assert len(pool.session.cookies) == 0
+    pool.close()
@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+import pytest
+from app.analyzer.performance import PerformanceAnalyzer
+from app.database.db import Database
+from benchmarks.startup import ROOT
+
+def test_heavy_modules_load_on_first_use():
+    """Testa que o import do app não carrega requests/urllib3 e o create_app aquece tudo sem deixar conexões abertas"""
+    code = '''
+import sys
+import run
+print(sorted(name for name in ('requests', 'urllib3') if name in sys.modules))
+assert run.create_app() is run.app
+print(sorted(name for name in ('requests', 'urllib3') if name in sys.modules))
+print(run.analyzer._http is not None and run.analyzer._tls is not None)
+print(run.db.connections.open_connections(), run.analyzer.resolver._executor)
+'''
+    output = subprocess.run(
+        [sys.executable, '-c', code], capture_output=True, text=True, check=True,
+        env=dict(os.environ, FLASK_ENV='testing'), cwd=ROOT
+    ).stdout.splitlines()
+
+    # Nada de conexões SQLite nem pools de threads para os workers herdarem
+    assert output == ['[]', "['requests', 'urllib3']", 'True', '0 None']
+
+def test_pools_are_created_once():
+    analyzer = PerformanceAnalyzer()
+    assert analyzer._http is None and analyzer._tls is None
+
+    http = analyzer.http
+    assert analyzer.http is http
+    assert analyzer.resources.http is http
+    assert analyzer.warmup() == (http, analyzer.tls, analyzer.resources)
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='requer os.fork')
+def test_database_is_usable_after_fork(tmp_path):
+    """Testa que um worker criado por fork abre as próprias conexões e writer"""
+    db = Database(str(tmp_path / 'fork.db'))
+    db.save_metrics('https://example.com', {'basic_metrics': {'response_time': 100, 'status_code': 200}})
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            db.save_metrics('https://example.com', {'basic_metrics': {'response_time': 120, 'status_code': 200}})
+            os._exit(0 if len(db.get_metrics('https://example.com')) == 2 else 1)
+        except BaseException:
+            os._exit(2)
+    _, status = os.waitpid(pid, 0)
+
+    assert os.waitstatus_to_exitcode(status) == 0
+    db.save_metrics('https://example.com', {'basic_metrics': {'response_time': 140, 'status_code': 200}})
+    assert len(db.get_metrics('https://example.com')) == 3
+    db.close()
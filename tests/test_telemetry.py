@@ -0,0 +1,56 @@
+import pytest
+from app.analyzer.scheduler import Stage, StageScheduler
+from app.telemetry.metrics import MetricsRegistry
+from app.telemetry.trace import span, current_span
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    latency = registry.histogram('latency_seconds', 'Latency', ('stage',), buckets=(0.1, 1))
+    for value in (0.05, 0.5, 5):
+        latency.observe(value, stage='dns')
+    
+    text = registry.render()
+    
+    assert '# TYPE latency_seconds histogram' in text
+    assert 'latency_seconds_bucket{stage="dns",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{stage="dns",le="1.0"} 2' in text
+    assert 'latency_seconds_bucket{stage="dns",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{stage="dns"} 3' in text
+
+def test_counter_and_gauge():
+    registry = MetricsRegistry()
+    requests = registry.counter('requests_total', 'Requests', ('status',))
+    in_flight = registry.gauge('in_flight', 'In flight')
+    requests.inc(status=200)
+    requests.inc(2, status=200)
+    with in_flight.track():
+        assert in_flight.value() == 1
+    
+    assert requests.value(status=200) == 3
+    assert in_flight.value() == 0
+    assert 'requests_total{status="200"} 3.0' in registry.render()
+    with pytest.raises(ValueError):
+        requests.inc(code=200)
+    with pytest.raises(ValueError):
+        registry.gauge('requests_total', 'Requests')
+
+def test_histogram_time_records_outcome():
+    registry = MetricsRegistry()
+    stage = registry.histogram('stage_seconds', 'Stages', ('stage', 'outcome'))
+    with pytest.raises(RuntimeError):
+        with stage.time(stage='dns'):
+            raise RuntimeError('boom')
+    
+    assert stage.snapshot(stage='dns', outcome='error')['count'] == 1
+
+def test_spans_follow_stages_into_worker_threads():
+    def fetch(deps):
+        with span('GET', kind='http'):
+            return current_span().name
+    
+    with span('analysis') as root:
+        run = StageScheduler().run([Stage('basic', fetch)])
+    
+    assert run.results['basic'] == 'GET'
+    assert root.count('http') == 1
+    assert root.to_dict()['children'][0]['name'] == 'GET'
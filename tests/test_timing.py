@@ -0,0 +1,40 @@
+from app.analyzer.fetch import FetchContext
+from app.analyzer.session import SessionPool
+
+def test_fetch_records_phase_timings(http_server):
+    pool = SessionPool()
+    ctx = FetchContext(f'{http_server.url}/', session=pool)
+    
+    ctx.response
+    timing = ctx.timing
+    
+    assert timing['hops'] == 1
+    assert timing['connection_reused'] is False
+    assert timing['tls'] == 0
+    for phase in ('dns', 'connect', 'wait', 'ttfb', 'download', 'total'):
+        assert timing[phase] >= 0
+    assert timing['ttfb'] <= timing['total']
+    pool.close()
+
+def test_redirect_hops_and_connection_reuse(http_server):
+    pool = SessionPool()
+    ctx = FetchContext(f'{http_server.url}/redirect', session=pool)
+    
+    assert ctx.response.status_code == 200
+    timing = ctx.timing
+    
+    assert timing['hops'] == 2
+    assert len(timing['redirects']) == 1
+    assert timing['redirects'][0]['status_code'] == 302
+    assert timing['redirects'][0]['reused_connection'] is False
+    # O salto final usa a mesma conexão keep-alive: sem DNS nem connect
+    assert timing['connection_reused'] is True
+    pool.close()
+
+def test_untraced_requests_are_not_affected(http_server):
+    pool = SessionPool()
+    
+    response = pool.get(f'{http_server.url}/')
+    
+    assert response.status_code == 200
+    pool.close()
@@ -0,0 +1,76 @@
+import ssl
+import time
+from app.analyzer.performance import PerformanceAnalyzer
+from app.analyzer.tls import TLSInspector, parse_certificate
+
+def inspector(tls_server, **kwargs):
+    context = ssl.create_default_context(cafile=tls_server.cafile)
+    return TLSInspector(context=context, timeout=5, **kwargs)
+
+def test_second_handshake_is_resumed(tls_server):
+    tls = inspector(tls_server)
+    
+    full = tls.inspect('localhost', tls_server.port)
+    resumed = tls.inspect('localhost', tls_server.port)
+    
+    assert full['resumed'] is False
+    assert resumed['resumed'] is True
+    assert resumed['full_handshake_time'] == full['handshake_time']
+    assert resumed['resumed_handshake_time'] == resumed['handshake_time']
+    assert tls.stats() == {'handshakes': 2, 'resumed': 1, 'certificate_hits': 1, 'hosts': 1}
+
+def test_ticket_wait_ends_when_the_ticket_arrives(tls_server):
+    """Testa que o handshake completo só espera até o ticket chegar e a retomada não espera"""
+    tls = inspector(tls_server, ticket_wait=2)
+    
+    start = time.perf_counter()
+    tls.inspect('localhost', tls_server.port)
+    resumed = tls.inspect('localhost', tls_server.port)
+    
+    assert resumed['resumed'] is True
+    assert time.perf_counter() - start < 1
+
+def test_certificate_metadata_is_cached(tls_server):
+    tls = inspector(tls_server)
+    
+    first = tls.inspect('localhost', tls_server.port)['certificate']
+    again = tls.inspect('localhost', tls_server.port)['certificate']
+    
+    assert first['subject'] == 'localhost'
+    assert first['issuer'] == 'Stand-in CA'
+    assert first['san'] == ['localhost', '127.0.0.1']
+    assert first['chain_length'] in (1, None)
+    assert 18 <= first['days_to_expiry'] <= 20
+    assert first['cached'] is False
+    assert again['cached'] is True
+
+def test_certificate_ttl_zero_reparses(tls_server):
+    tls = inspector(tls_server, cert_ttl=0)
+    
+    tls.inspect('localhost', tls_server.port)
+    
+    assert tls.inspect('localhost', tls_server.port)['certificate']['cached'] is False
+
+def test_parse_certificate():
+    cert = {
+        'subject': ((('commonName', 'example.com'),),),
+        'issuer': ((('countryName', 'US'),), (('organizationName', 'Example CA'),)),
+        'notBefore': 'Jan  1 00:00:00 2024 GMT',
+        'notAfter': 'Jan  1 00:00:00 2025 GMT',
+        'subjectAltName': (('DNS', 'example.com'), ('DNS', 'www.example.com'))
+    }
+    
+    parsed = parse_certificate(cert, chain_length=3)
+    
+    assert parsed['issuer'] == 'Example CA'
+    assert parsed['not_after'] == '2025-01-01T00:00:00+00:00'
+    assert parsed['san'] == ['example.com', 'www.example.com']
+    assert parsed['chain_length'] == 3
+
+def test_expiring_certificate_is_recommended():
+    recommendations = PerformanceAnalyzer()._generate_recommendations({
+        'ssl_metrics': {'certificate': {'days_to_expiry': 5, 'not_after': '2025-01-01T00:00:00+00:00'}}
+    })
+    
+    assert recommendations[0]['priority'] == 'critical'
+    assert '2025-01-01' in recommendations[0]['message']
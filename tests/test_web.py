@@ -0,0 +1,138 @@
+import json
+import os
+import time
+import pytest
+
+os.environ['FLASK_ENV'] = 'testing'
+
+import run
+from app.database.db import Database
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(run, 'db', Database(str(tmp_path / 'web.db')))
+    return run.app.test_client()
+
+def test_analyze_batch_streams_ndjson(client, http_server):
+    urls = [f'{http_server.url}/', f'{http_server.url}/other']
+    
+    response = client.post('/analyze/batch', json={'urls': urls})
+    
+    assert response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.data.decode().splitlines()]
+    assert sorted(line['url'] for line in lines) == sorted(urls)
+    assert len(run.db.get_metrics()) == 2
+
+def test_analyze_probe_mode(client, http_server):
+    response = client.post('/analyze', json={'url': f'{http_server.url}/', 'mode': 'probe'})
+    
+    assert response.json['mode'] == 'probe'
+    assert run.db.get_metrics()[0][4] == 200
+    
+    response = client.post('/analyze', json={'url': f'{http_server.url}/', 'mode': 'deep'})
+    assert response.status_code == 400
+
+def test_analyze_stage_selection(client):
+    response = client.get('/analyze/stages')
+    assert 'basic_metrics' in [stage['name'] for stage in response.json['stages']]
+    
+    response = client.post('/analyze', json={'url': 'https://example.com', 'stages': 'basic,nope'})
+    assert response.status_code == 400
+
+def test_analyze_batch_requires_urls(client):
+    response = client.post('/analyze/batch', json={})
+    
+    assert response.status_code == 400
+
+@pytest.mark.parametrize('limits', [
+    {'per_host': 0}, {'per_host': -1}, {'concurrency': -2}, {'concurrency': 'x'}, {'concurrency': [2]}
+])
+def test_analyze_batch_rejects_invalid_limits(client, limits):
+    response = client.post('/analyze/batch', json={'urls': ['https://example.com'], **limits})
+    
+    assert response.status_code == 400
+    assert 'positive integer' in response.json['error']
+
+def test_job_endpoints(client, monkeypatch):
+    monkeypatch.setattr(run.jobs, 'db', run.db)
+    calls = []
+    
+    def analyze_url(url, **options):
+        calls.append(options)
+        return {'url': url, 'basic_metrics': {}}
+    
+    monkeypatch.setattr(run.jobs.analyzer, 'analyze_url', analyze_url)
+    
+    assert client.post('/jobs', json={'url': 'https://example.com', 'mode': 'x'}).status_code == 400
+    assert client.post('/jobs', json={'url': 'https://example.com', 'stages': 'nope'}).status_code == 400
+    
+    response = client.post('/jobs', json={'url': 'https://example.com', 'stages': 'basic,dns'})
+    assert response.status_code == 202
+    assert response.json['stages'] == ['basic', 'dns']
+    job_id = response.json['id']
+    
+    for _ in range(100):
+        if client.get(f'/jobs/{job_id}').json['status'] == 'done':
+            break
+        time.sleep(0.01)
+    
+    result = client.get(f'/jobs/{job_id}/result')
+    assert result.status_code == 200
+    assert result.json['url'] == 'https://example.com'
+    assert client.get('/jobs/stats').json['completed'] >= 1
+    assert calls == [{'mode': 'audit', 'stages': ['basic', 'dns']}]
+    assert client.get('/jobs/unknown').status_code == 404
+
+def test_job_round_trip_across_workers(client, monkeypatch):
+    """Testa POST /jobs seguido de GET /jobs/<id> num worker que não tem o job em memória"""
+    monkeypatch.setattr(run.jobs, 'db', run.db)
+    monkeypatch.setattr(run.jobs.analyzer, 'analyze_url',
+                        lambda url, **options: {'url': url, 'basic_metrics': {'status_code': 200}})
+    
+    job_id = client.post('/jobs', json={'url': 'https://example.com', 'mode': 'audit'}).json['id']
+    for _ in range(100):
+        if run.jobs.get(job_id).finished:
+            break
+        time.sleep(0.01)
+    
+    # Outro worker: mesma aplicação e banco, fila vazia
+    monkeypatch.setattr(run.jobs, '_jobs', {})
+    status = client.get(f'/jobs/{job_id}')
+    assert status.status_code == 200
+    assert status.json['status'] == 'done'
+    assert status.json['mode'] == 'audit'
+    result = client.get(f'/jobs/{job_id}/result')
+    assert result.status_code == 200
+    assert result.json == {'url': 'https://example.com', 'basic_metrics': {'status_code': 200}}
+    assert client.get('/jobs/0123/result').status_code == 404
+
+def test_history_pages_with_cursor(client):
+    for _ in range(3):
+        run.db.save_metrics('https://example.com', {'basic_metrics': {'response_time': 150, 'status_code': 200}})
+    
+    first = client.get('/history', query_string={'url': 'https://example.com', 'fields': 'response_time', 'limit': 2}).json
+    assert first['items'] == [{'response_time': 150}, {'response_time': 150}]
+    assert first['next_cursor']
+    
+    second = client.get('/history', query_string={
+        'url': 'https://example.com', 'fields': 'response_time', 'limit': 2, 'cursor': first['next_cursor']
+    }).json
+    assert len(second['items']) == 1
+    assert second['next_cursor'] is None
+    
+    assert client.get('/history', query_string={'url': 'https://example.com', 'fields': 'headers'}).status_code == 400
+
+def test_internal_metrics_and_trace(client, http_server):
+    response = client.post('/analyze?trace=1', json={'url': f'{http_server.url}/', 'stages': 'basic'})
+    
+    trace = response.json['trace']
+    analysis = trace['children'][0]
+    assert analysis['name'] == 'analyze_url'
+    stages = {child['name']: child for child in analysis['children']}
+    assert stages['basic_metrics']['children'][0]['kind'] == 'http'
+    assert 'trace' not in run.db.get_metrics()[0][5]
+    
+    text = client.get('/internal/metrics').data.decode()
+    assert 'pg_stage_duration_seconds_count{stage="basic_metrics",outcome="ok"}' in text
+    assert 'pg_outbound_requests_total{method="GET",status="200"}' in text
+    assert 'pg_api_requests_total{endpoint="analyze",method="POST",status="200"}' in text